@@ -0,0 +1,62 @@
+"""
+Broadcast fan-out cost vs. audience size.
+
+Fills a 20-seat room, attaches one socket per player, a storyteller and N anonymous
+viewers, then times a public broadcast (a spectator joining and leaving). Sockets are
+stubs that only count frames, so the numbers are view building plus encoding. With
+encode-once fan-out the cost should track distinct views (players + 2), not sockets.
+
+    python -m benchmarks.broadcast
+"""
+from __future__ import annotations
+
+import timeit
+
+from botc.rooms import GameRoom, PUBLIC
+from botc.scripts import trouble_brewing_script
+
+SEATS = 20
+VIEWER_COUNTS = (0, 100, 300, 1000)
+REPEATS = 200
+
+
+class NullSocket:
+    def __init__(self):
+        self.state_version = 0
+        self.frames = 0
+
+    def send(self, obj):
+        self.frames += 1
+
+    def send_raw(self, data):
+        self.frames += 1
+
+
+def build_room(viewers: int) -> GameRoom:
+    room = GameRoom("bench", "bench", trouble_brewing_script(), {"id": 0, "name": "ST"}, initial_seat_count=SEATS)
+    for i in range(1, SEATS + 1):
+        room.join_unseated(i, f"P{i}")
+        room.sit(i, i)
+        room.player_sockets[i].add(NullSocket())
+    room.storytellerSocket = NullSocket()
+    room.room_viewers.update(NullSocket() for _ in range(viewers))
+    room.broadcast(PUBLIC)
+    return room
+
+
+def churn(room: GameRoom) -> None:
+    room.join_unseated(999, "Visitor")
+    room.leave(999)
+
+
+def main() -> None:
+    print(f"{'viewers':>7}  {'sockets':>7}  {'us/broadcast':>12}  {'us/socket':>9}")
+    for viewers in VIEWER_COUNTS:
+        room = build_room(viewers)
+        sockets = SEATS + 1 + viewers
+        per = timeit.timeit(lambda: churn(room), number=REPEATS) / REPEATS / 2 * 1e6
+        print(f"{viewers:>7}  {sockets:>7}  {per:>12.1f}  {per / sockets:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
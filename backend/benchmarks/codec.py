@@ -0,0 +1,55 @@
+"""
+Wire codec cost for full storyteller views.
+
+Seats a Trouble Brewing game at 5..20 seats (roles assigned directly, as the script
+only deals up to 15), builds the storyteller's full state frame and times encode/decode for each codec in botc.codec, reporting bytes per
+frame alongside. "pack" uses the msgpack package when installed and the built-in
+packer otherwise (printed in the header).
+
+    python -m benchmarks.codec
+"""
+from __future__ import annotations
+
+import timeit
+
+from benchmarks.night_resolution import ROLE_ORDER
+from botc import codec
+from botc.codec import JSON, PACK
+from botc.model import Game, Phase
+from botc.rooms import GameRoom
+from botc.rules import Rules
+from botc.scripts import ROLE_REGISTRY, trouble_brewing_script
+from botc.view import view_for_storyteller
+
+SEAT_COUNTS = (5, 10, 15, 20)
+REPEATS = 2000
+
+
+def storyteller_frame(seats: int) -> dict:
+    room = GameRoom("bench", "bench", trouble_brewing_script(), {"id": 0, "name": "ST"}, initial_seat_count=seats)
+    for i in range(1, seats + 1):
+        room.join_unseated(i, f"Player {i}")
+        room.sit(i, i)
+    room.info.status = "In-play"
+    room.game = g = Game(slots=[p.id for p in room.players], players=room.players, script=room.script, rules=Rules())
+    for p, role_id in zip(room.players, ROLE_ORDER):
+        g.assign_role(p.id, ROLE_REGISTRY[role_id]())
+    g.phase, g.night = Phase.NIGHT, 1
+    return {"type": "state", "version": room.version, "view": view_for_storyteller(room.game, room)}
+
+
+def main() -> None:
+    print(f"pack backend: {'msgpack' if codec.msgpack is not None else 'built-in'}")
+    print(f"{'seats':>5}  {'codec':>5}  {'bytes':>6}  {'encode (us)':>11}  {'decode (us)':>11}")
+    for seats in SEAT_COUNTS:
+        msg = storyteller_frame(seats)
+        for name, c in (("json", JSON), ("pack", PACK)):
+            data = c.encode(msg)
+            assert c.decode(data) == msg
+            enc = timeit.timeit(lambda: c.encode(msg), number=REPEATS) / REPEATS * 1e6
+            dec = timeit.timeit(lambda: c.decode(data), number=REPEATS) / REPEATS * 1e6
+            print(f"{seats:>5}  {name:>5}  {len(data):>6}  {enc:>11.1f}  {dec:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
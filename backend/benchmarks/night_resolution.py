@@ -0,0 +1,76 @@
+"""
+Night resolution cost vs. table size.
+
+Builds a Trouble Brewing game for 5..20 seats, then times the first-night and
+other-night hooks plus the raw lookups they lean on (player(), player_by_role(),
+neighbours(), is_poisoned()). With the indexed registry in Game the per-lookup
+numbers should stay flat as the table grows.
+
+    python -m benchmarks.night_resolution
+"""
+from __future__ import annotations
+
+import random
+import timeit
+
+import botc.roles  # noqa: F401  (registers every role)
+from botc.model import Game, Player
+from botc.prompt import AutoPrompt
+from botc.scripts import ROLE_REGISTRY, trouble_brewing_script
+
+SEAT_COUNTS = (5, 10, 15, 20)
+REPEATS = 2000
+
+# Demon first so every table has one, then a mix that puts night-waking roles early.
+ROLE_ORDER = [
+    "Imp", "Poisoner", "Empath", "Chef", "Fortune Teller", "Washer Woman", "Investigator",
+    "Librarian", "Monk", "Undertaker", "Spy", "Butler", "Ravenkeeper", "Scarlet Woman",
+    "Soldier", "Virgin", "Slayer", "Mayor", "Saint", "Recluse", "Drunk", "Baron",
+]
+
+
+def build_game(seats: int) -> Game:
+    script = trouble_brewing_script()
+    players = [Player(id=i + 1, name=f"P{i + 1}", seat=i + 1) for i in range(seats)]
+    g = Game(slots=[p.id for p in players], players=players, script=script, prompt=AutoPrompt())
+    roles = ROLE_ORDER[:seats]
+    random.Random(seats).shuffle(roles)
+    for p, role_id in zip(players, roles):
+        g.assign_role(p.id, ROLE_REGISTRY[role_id]())
+    return g
+
+
+def run_night(g: Game, night: int) -> int:
+    g.night = night
+    woken = 0
+    for role_id in g.script.night_order(night):
+        p = g.player_by_role(role_id)
+        if p is not None and p.alive:
+            p.role.on_night(g)
+            woken += 1
+    g.pending_dawn.clear()
+    g.log.clear()
+    return woken
+
+
+def run_lookups(g: Game) -> None:
+    for pid in range(1, len(g.players) + 1):
+        g.player(pid)
+        g.neighbours(pid)
+        g.is_poisoned(pid)
+    g.player_by_role("Imp")
+
+
+def main() -> None:
+    print(f"{'seats':>5}  {'night 1 (us/hook)':>18}  {'night 2 (us/hook)':>18}  {'lookup/seat (ns)':>17}")
+    for seats in SEAT_COUNTS:
+        g = build_game(seats)
+        hooks1, hooks2 = run_night(g, 1), run_night(g, 2)
+        n1 = timeit.timeit(lambda: run_night(g, 1), number=REPEATS) / REPEATS * 1e6 / max(hooks1, 1)
+        n2 = timeit.timeit(lambda: run_night(g, 2), number=REPEATS) / REPEATS * 1e6 / max(hooks2, 1)
+        lk = timeit.timeit(lambda: run_lookups(g), number=REPEATS) / REPEATS / seats * 1e9
+        print(f"{seats:>5}  {n1:>18.2f}  {n2:>18.2f}  {lk:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
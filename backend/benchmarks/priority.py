@@ -0,0 +1,103 @@
+"""
+Storyteller prompt latency while a room fans state out to its spectators.
+
+A 20-seat room with N viewers takes a public change (a spectator joins); 1ms later a
+role prompt for the storyteller comes due. The prompt's latency is the time from then
+until the storyteller's socket gets it. Sockets are stubs that spend WRITE_US per frame,
+roughly what a real write costs. Run once with the weighted outbox (rooms.QUANTUM) and
+once with a quantum so large the fan-out goes out in one pass, as it used to.
+
+    python -m benchmarks.priority
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+
+from botc import rooms as rooms_module
+from botc.rooms import GameRoom
+from botc.scripts import trouble_brewing_script
+
+SEATS = 20
+VIEWER_COUNTS = (100, 1000, 3000, 5000)
+WRITE_US = 15
+REPEATS = 20
+
+
+class SlowSocket:
+    def __init__(self):
+        self.state_version = 0
+        self.received_at = None
+
+    def _write(self):
+        end = time.perf_counter() + WRITE_US / 1e6
+        while time.perf_counter() < end:
+            pass
+
+    def send(self, obj):
+        self._write()
+        self.received_at = time.perf_counter()
+
+    def send_raw(self, data):
+        self._write()
+        self.received_at = time.perf_counter()
+
+
+def build_room(viewers: int):
+    room = GameRoom("bench", "bench", trouble_brewing_script(), {"id": 0, "name": "ST"}, initial_seat_count=SEATS)
+    for i in range(1, SEATS + 1):
+        room.join_unseated(i, f"P{i}")
+        room.sit(i, i)
+        room.player_sockets[i].add(SlowSocket())
+    st = room.storytellerSocket = SlowSocket()
+    viewer_socks = [SlowSocket() for _ in range(viewers)]
+    room.room_viewers.update(viewer_socks)
+    room.flush()
+    return room, st, viewer_socks
+
+
+async def one_round(room, st, viewer_socks, n):
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    sent = []
+
+    def prompt():
+        sent.append(True)
+        room._notify_st({"type": "prompt", "cid": n, "title": "Choose a player"})
+
+    room.join_unseated(1000 + n, "Visitor")
+    due = time.perf_counter() + 0.001
+    loop.call_later(0.001, prompt)
+    while viewer_socks and min(v.received_at or 0 for v in viewer_socks) < started:
+        await asyncio.sleep(0.001)
+    while not sent or st.received_at < due:
+        await asyncio.sleep(0.001)
+    fanout = max(v.received_at for v in viewer_socks) - started if viewer_socks else 0.0
+    # from when the prompt came due (a blocked loop runs the timer late) to the storyteller having it
+    return (st.received_at - due) * 1000, fanout * 1000
+
+
+def measure(viewers: int):
+    async def run():
+        room, st, viewer_socks = build_room(viewers)
+        samples = [await one_round(room, st, viewer_socks, n) for n in range(REPEATS)]
+        return statistics.median(s[0] for s in samples), max(s[0] for s in samples), \
+            statistics.median(s[1] for s in samples)
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    print(f"{'mode':>9}  {'viewers':>7}  {'prompt p50 ms':>13}  {'prompt max ms':>13}  {'fan-out ms':>10}")
+    default = rooms_module.QUANTUM
+    for mode, quantum in (("weighted", default), ("one pass", 10 ** 9)):
+        rooms_module.QUANTUM = quantum
+        for viewers in VIEWER_COUNTS:
+            p50, worst, fanout = measure(viewers)
+            print(f"{mode:>9}  {viewers:>7}  {p50:>13.2f}  {worst:>13.2f}  {fanout:>10.1f}")
+    rooms_module.QUANTUM = default
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Reconnect storm: 2,000 sockets opening at once against a live server.
+
+Runs the real Tornado app in its own process, with ROOMS rooms of 20 seated
+players, a storyteller and VIEWERS anonymous viewers each (100 sockets per room), and
+fires every connection at it concurrently from the main thread:
+
+  cold    every socket opens with no history and needs a full state
+  resume  every socket drops, each room changes once, and all of them come back with
+          ?since=<last version seen> and need only a diff
+
+A probe on the server loop records how late its timer fires; that lateness is the
+longest the loop went without getting back to its other work (other rooms, pings,
+prompt deadlines). Each storm runs with the admission gate (botc.ws.admission) and
+with it effectively off.
+
+    python -m benchmarks.reconnect_storm
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+
+import tornado.httpserver
+import tornado.testing
+import tornado.websocket
+
+from botc import metrics
+from botc.rooms import GameRoom, rooms
+from botc.scripts import trouble_brewing_script
+from botc.server import make_app, tune_gc
+from botc.ws import admission
+
+ROOMS = 20
+SEATS = 20
+VIEWERS = 79
+PROBE = 0.005
+
+
+class Server:
+    """The app on its own process (so clients don't share its GIL), driven over a pipe."""
+
+    def __init__(self, rate: float, burst: int):
+        self._conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(child, rate, burst), daemon=True)
+        self.process.start()
+        self.port = self._conn.recv()
+
+    def call(self, command: str):
+        self._conn.send(command)
+        return self._conn.recv()
+
+    def stop(self):
+        self.call("stop")
+        self.process.join()
+
+
+def _serve(conn, rate: float, burst: int) -> None:
+    admission.RATE, admission.BURST = rate, burst
+    build_rooms()
+    tune_gc()
+    max_lag = 0.0
+
+    async def probe(loop):
+        nonlocal max_lag
+        while True:
+            start = loop.time()
+            await asyncio.sleep(PROBE)
+            max_lag = max(max_lag, loop.time() - start - PROBE)
+
+    async def main():
+        nonlocal max_lag
+        loop = asyncio.get_running_loop()
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        task = asyncio.ensure_future(probe(loop))
+        conn.send(port)
+        while True:
+            command = await loop.run_in_executor(None, conn.recv)
+            if command == "stop":
+                break
+            if command == "change":
+                change_every_room()
+                conn.send(None)
+            elif command == "lag":  # max lag since the last ask
+                conn.send(max_lag)
+                max_lag = 0.0
+            elif command == "admission":
+                conn.send({k: metrics.counter(f"admission.{k}") for k in ("immediate", "queued", "rejected")})
+        task.cancel()
+        server.stop()
+        conn.send(None)
+
+    asyncio.run(main())
+
+
+def build_rooms():
+    rooms.clear()
+    for r in range(ROOMS):
+        room = GameRoom(f"storm{r}", f"storm{r}", trouble_brewing_script(), {"id": 0, "name": "ST"},
+                        initial_seat_count=SEATS)
+        for i in range(1, SEATS + 1):
+            room.join_unseated(i, f"P{i}")
+            room.sit(i, i)
+        rooms[room.info.gid] = room
+
+
+def paths():
+    for r in range(ROOMS):
+        gid = f"storm{r}"
+        yield f"/ws/{gid}/st"
+        for i in range(1, SEATS + 1):
+            yield f"/ws/{gid}/player/{i}"
+        for _ in range(VIEWERS):
+            yield f"/ws/{gid}/room"
+
+
+def seen_in(msg) -> int:
+    data = msg.get("data") if isinstance(msg.get("data"), dict) else {}
+    return max(msg.get("version", 0), data.get("version", 0), msg.get("seq", 0))
+
+
+async def open_one(port: int, path: str, since: int):
+    url = f"ws://127.0.0.1:{port}{path}" + (f"?since={since}" if since else "")
+    ws = await tornado.websocket.websocket_connect(url)
+    while True:
+        raw = await ws.read_message()
+        if raw is None:
+            raise RuntimeError(f"{path} closed before its state arrived")
+        msg = tornado.escape.json_decode(raw)
+        if msg["type"] == "state" or msg.get("kind") == "StateDiff":
+            return ws, seen_in(msg), msg["type"]
+
+
+async def storm(port: int, targets):
+    started = time.perf_counter()
+    opened = await asyncio.gather(*(open_one(port, path, since) for path, since in targets))
+    return time.perf_counter() - started, opened
+
+
+def change_every_room():
+    for room in rooms.values():
+        room.join_unseated(900, "Late")
+
+
+def run(mode: str, rate: float, burst: int) -> None:
+    server = Server(rate, burst)
+
+    async def clients():
+        targets = [(p, 0) for p in paths()]
+        server.call("lag")
+        took, opened = await storm(server.port, targets)
+        report(mode, "cold", took, server.call("lag"), opened)
+
+        for ws, _, _ in opened:
+            ws.close()
+        await asyncio.sleep(0.5)
+        server.call("change")
+
+        targets = [(p, seen) for p, (_, seen, _) in zip(paths(), opened)]
+        server.call("lag")
+        took, opened = await storm(server.port, targets)
+        report(mode, "resume", took, server.call("lag"), opened)
+        for ws, _, _ in opened:
+            ws.close()
+
+    asyncio.run(clients())
+    counts = server.call("admission")
+    server.stop()
+    print(f"{'':>10}  admission: {counts['immediate']} immediate, {counts['queued']} queued, "
+          f"{counts['rejected']} refused")
+
+
+def report(mode, storm_name, took, lag, opened):
+    kinds = [k for _, _, k in opened]
+    print(f"{mode:>10}  {storm_name:>6}  {len(opened):>7}  {took:>7.2f}  {lag * 1000:>10.1f}"
+          f"  {kinds.count('state'):>6}  {kinds.count('patch'):>5}")
+
+
+def main() -> None:
+    print(f"{'mode':>10}  {'storm':>6}  {'sockets':>7}  {'seconds':>7}  {'max lag ms':>10}  {'states':>6}  {'diffs':>5}")
+    run("gated", admission.RATE, admission.BURST)
+    run("ungated", 1e12, 10 ** 9)
+
+
+if __name__ == "__main__":
+    main()
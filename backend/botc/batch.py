@@ -0,0 +1,204 @@
+"""
+Vectorised deal-and-first-night-info engine (needs numpy).
+
+Where botc.simulate plays whole games one Python object at a time, this module
+deals millions of games at once as integer arrays (games x seats, values are
+indexes into RoleTable.names) and computes sober, unpoisoned first-night
+information for the whole batch:
+
+- Chef: evil pairs around the table, same counting as Chef.on_night
+- Empath: evil neighbours for every seat, as Empath.on_night
+- Washer Woman / Librarian / Investigator: which seats are valid true pings
+
+Distributions accumulates per-seat counts over chunks so memory stays bounded.
+
+    python -m botc.batch --games 1000000 --players 10
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError as ex:  # pragma: no cover
+    raise ImportError("botc.batch needs numpy (pip install numpy)") from ex
+
+from botc.scripts import Script, trouble_brewing_script
+
+GROUPS = ("townsfolk", "outsiders", "minions", "demons")
+EVIL_GROUPS = ("minions", "demons")
+
+# info role -> group whose members it may be shown
+PING_ROLES = {
+    "Washer Woman": "townsfolk",
+    "Librarian": "outsiders",
+    "Investigator": "minions",
+}
+
+
+@dataclass
+class RoleTable:
+    """Integer encoding of a script's roles: index i <-> names[i]."""
+    names: List[str]
+    group: np.ndarray  # int8, index into GROUPS
+    evil: np.ndarray  # bool
+
+    @classmethod
+    def from_script(cls, script: Script) -> "RoleTable":
+        names, group = [], []
+        for gi, g in enumerate(GROUPS):
+            for role_id in script.role_groups[g]:
+                names.append(role_id)
+                group.append(gi)
+        group = np.array(group, dtype=np.int8)
+        evil = np.isin(group, [GROUPS.index(g) for g in EVIL_GROUPS])
+        return cls(names=names, group=group, evil=evil)
+
+    def index(self, role_id: str) -> int:
+        return self.names.index(role_id)
+
+
+def deal(script: Script, table: RoleTable, player_count: int, games: int,
+         rng: np.random.Generator) -> np.ndarray:
+    """Deal `games` independent tables; returns an int16 array of role indexes, games x seats."""
+    counts = script.role_counts.get(player_count)
+    if not counts:
+        raise ValueError(f"Unsupported player count: {player_count}")
+
+    parts = []
+    offset = 0
+    for g in GROUPS:
+        size = len(script.role_groups[g])
+        k = counts.get(g, 0)
+        if k > size:
+            raise ValueError(f"Not enough roles in group '{g}': need {k}, have {size}")
+        if k:
+            picks = rng.permuted(np.tile(np.arange(size, dtype=np.int16), (games, 1)), axis=1)[:, :k]
+            parts.append(picks + offset)
+        offset += size
+    # shuffle seats independently per game
+    return rng.permuted(np.concatenate(parts, axis=1), axis=1)
+
+
+@dataclass
+class FirstNight:
+    deals: np.ndarray  # (games, seats) role indexes
+    evil: np.ndarray  # (games, seats) bool
+    chef_pairs: np.ndarray  # (games,) what a Chef would learn
+    empath: np.ndarray  # (games, seats) evil neighbours an Empath in that seat would learn
+    group_mask: Dict[str, np.ndarray] = field(default_factory=dict)  # group -> (games, seats) bool
+
+
+def first_night(table: RoleTable, deals: np.ndarray) -> FirstNight:
+    evil = table.evil[deals]
+    right = np.roll(evil, -1, axis=1)
+    left = np.roll(evil, 1, axis=1)
+    chef_pairs = np.count_nonzero(evil & right, axis=1).astype(np.int8)
+    empath = left.astype(np.int8) + right.astype(np.int8)
+    groups = table.group[deals]
+    group_mask = {g: groups == gi for gi, g in enumerate(GROUPS)}
+    return FirstNight(deals=deals, evil=evil, chef_pairs=chef_pairs, empath=empath, group_mask=group_mask)
+
+
+class Distributions:
+    """Per-seat counts accumulated over batches; rates() normalises them."""
+
+    def __init__(self, table: RoleTable, player_count: int):
+        n = player_count
+        self.table = table
+        self.player_count = n
+        self.games = 0
+        self.seat_evil = np.zeros(n, dtype=np.int64)
+        self.seat_role = np.zeros((n, len(table.names)), dtype=np.int64)
+        self.chef_games = 0
+        self.chef = np.zeros(n + 1, dtype=np.int64)
+        self.empath = np.zeros((n, 3), dtype=np.int64)  # seat x evil neighbours
+        self.ping_games = {r: 0 for r in PING_ROLES}
+        self.ping_seat = {r: np.zeros(n, dtype=np.int64) for r in PING_ROLES}
+        self.ping_size = {r: np.zeros(n, dtype=np.int64) for r in PING_ROLES}
+
+    def add(self, fn: FirstNight) -> None:
+        n = self.player_count
+        table = self.table
+        deals = fn.deals
+        self.games += len(deals)
+        self.seat_evil += np.count_nonzero(fn.evil, axis=0)
+        for seat in range(n):
+            self.seat_role[seat] += np.bincount(deals[:, seat], minlength=len(table.names))
+
+        chef = deals == table.index("Chef")
+        chef_in_play = chef.any(axis=1)
+        self.chef_games += int(np.count_nonzero(chef_in_play))
+        self.chef += np.bincount(fn.chef_pairs[chef_in_play], minlength=n + 1)
+
+        empath = deals == table.index("Empath")
+        for seat in range(n):
+            self.empath[seat] += np.bincount(fn.empath[empath[:, seat], seat], minlength=3)
+
+        for role_id, group in PING_ROLES.items():
+            holder = deals == table.index(role_id)
+            in_play = holder.any(axis=1)
+            candidates = fn.group_mask[group][in_play] & ~holder[in_play]
+            self.ping_games[role_id] += int(np.count_nonzero(in_play))
+            self.ping_seat[role_id] += np.count_nonzero(candidates, axis=0)
+            self.ping_size[role_id] += np.bincount(np.count_nonzero(candidates, axis=1), minlength=n)
+
+    def rates(self) -> Dict[str, object]:
+        def norm(a, d):
+            return a / d if d else a * 0.0
+
+        return {
+            "games": self.games,
+            "seat_evil": norm(self.seat_evil, self.games),
+            "seat_role": norm(self.seat_role, self.games),
+            "chef": norm(self.chef, self.chef_games),
+            "empath": self.empath / self.empath.sum(axis=1, keepdims=True).clip(min=1),
+            "pings": {
+                r: {
+                    "seat": norm(self.ping_seat[r], self.ping_games[r]),
+                    "set_size": norm(self.ping_size[r], self.ping_games[r]),
+                }
+                for r in PING_ROLES
+            },
+        }
+
+
+def run(player_count: int, games: int, seed: int = 0, chunk: int = 200_000,
+        script: Script | None = None) -> Distributions:
+    script = script or trouble_brewing_script()
+    table = RoleTable.from_script(script)
+    rng = np.random.default_rng(seed)
+    dist = Distributions(table, player_count)
+    done = 0
+    while done < games:
+        size = min(chunk, games - done)
+        dist.add(first_night(table, deal(script, table, player_count, size, rng)))
+        done += size
+    return dist
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Batch deal and first-night info distributions")
+    ap.add_argument("--games", type=int, default=1_000_000)
+    ap.add_argument("--players", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    rates = run(args.players, args.games, args.seed).rates()
+    elapsed = time.perf_counter() - t0
+
+    print(f"{args.games} games, {args.players} players in {elapsed:.2f}s")
+    print("Chef pairs:   " + "  ".join(f"{k}:{v:.3f}" for k, v in enumerate(rates["chef"]) if v))
+    print(f"{'seat':>4}  {'evil':>6}  {'empath 0/1/2':>20}  " + "  ".join(f"{r[:12]:>12}" for r in PING_ROLES))
+    for seat in range(args.players):
+        e = rates["empath"][seat]
+        pings = "  ".join(f"{rates['pings'][r]['seat'][seat]:>12.3f}" for r in PING_ROLES)
+        print(f"{seat + 1:>4}  {rates['seat_evil'][seat]:>6.3f}  {e[0]:>6.3f} {e[1]:>6.3f} {e[2]:>6.3f}  {pings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import random
+
+import botc.roles  # noqa: F401  (populates ROLE_REGISTRY)
 from botc.model import Game, Player, Phase
 from botc.prompt import CLIPrompt, AutoPrompt
 from botc.rules import Rules
@@ -27,10 +30,12 @@ def default_roles_for(n: int) -> list[str]:
     return implemented[:n]
 
 
-def new_game(names: list[str], script: Script, role_names: list[str] | None = None) -> Game:
+def new_game(names: list[str], script: Script | None = None, role_names: list[str] | None = None,
+             rng: random.Random | None = None) -> Game:
+    """Build a seated game with roles assigned and on_setup hooks run; it is left in Phase.SETUP."""
     players = [Player(id=i + 1, name=n, seat=i + 1) for i, n in enumerate(names)]
-    g = Game(players=players, rules=Rules())
-    g.script = script
+    g = Game(slots=[p.id for p in players], players=players, rules=Rules(),
+             script=script or trouble_brewing_script(), rng=rng or random.Random())
 
     # Back-compat for existing tests
     if role_names is None and len(players) == 3:
@@ -45,6 +50,7 @@ def new_game(names: list[str], script: Script, role_names: list[str] | None = No
     for p in g.players:
         if p.role and hasattr(p.role, "on_setup"):
             p.role.on_setup(g)
+    g.phase = Phase.SETUP
     return g
 
 
@@ -57,7 +63,7 @@ def print_state(g: Game, header: str):
 
 
 def run():
-    g = new_game(["Eve", "Sam", "Kim", "Luke", "Anna", "Ben", "Veronica"],
+    g = new_game(["Eve", "Sam", "Kim", "Luke", "Anna", "Ben", "Veronica"], trouble_brewing_script(),
                  ["Imp", "Poisoner", "Scarlet Woman", "Fortune Teller", "Empath", "Investigator", "Undertaker"])
     g.prompt = CLIPrompt(lambda pid: g.player(pid).name)
     print_state(g, "Game created")
@@ -70,7 +76,7 @@ def run():
             break
 
         if g.phase == Phase.SETUP:
-            g.step()
+            g.advance()
 
         elif g.phase == Phase.NIGHT:
             order = g.current_night_order()
@@ -80,7 +86,7 @@ def run():
                     r = p.role
                     if r and getattr(r, "id", None) == role_name:
                         r.on_night(g)
-            g.step()
+            g.advance()
 
         elif g.phase == Phase.DAY:
             print_state(g, "Day begins")
@@ -112,11 +118,11 @@ def run():
                         g.cast_vote(pid, yes)
 
                     g.close_nomination()
-            g.step()
+            g.advance()
 
         elif g.phase == Phase.EXECUTION:
             g.finish_day()  # will execute best-on-block if unique and with majority
-            g.step()
+            g.advance()
 
         elif g.phase == Phase.FINAL_CHECK:
             if g.rules.check_end(g):
@@ -124,10 +130,10 @@ def run():
                 print("\n".join(g.log) or "(no log lines)")
                 print("\n=== GAME OVER ===")
                 break
-            g.step()
+            g.advance()
 
         else:
-            g.step()
+            g.advance()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+"""
+Wire codecs, negotiated per socket through the websocket subprotocol header.
+
+    botc.json  JSON text frames (the default, and what clients get if they ask for nothing)
+    botc.pack  MessagePack binary frames; dict keys found in KEYS travel as their index
+
+KEYS is the shared key dictionary: both ends must agree on it, so only append to it.
+The MessagePack side uses the msgpack package when installed and a small built-in
+packer otherwise; the bytes are the same either way.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Dict, Iterable, List
+
+try:
+    import msgpack
+except ImportError:  # optional: the built-in packer below speaks the same format
+    msgpack = None
+
+KEYS = (
+    "type", "view", "version", "info", "seats", "seat", "occupant", "id", "name", "role",
+    "spectators", "players", "phase", "night", "player", "you", "alive", "ghost", "status",
+    "gid", "script_name", "storyteller_name", "storyteller_id", "tokens", "data", "kind",
+    "ts", "op", "path", "value", "from", "ops", "cid", "event", "candidates", "title",
+    "tasks", "prompt", "options", "owner_id", "answer", "action", "error", "team",
+)
+KEY_INDEX = {k: i for i, k in enumerate(KEYS)}
+
+
+class JsonCodec:
+    name = "botc.json"
+    binary = False
+
+    def encode(self, msg) -> str:
+        return json.dumps(msg, separators=(",", ":"))
+
+    def decode(self, data):
+        return json.loads(data)
+
+    def join(self, frames: List[str]) -> str:
+        return "[" + ",".join(frames) + "]"
+
+
+class PackCodec:
+    name = "botc.pack"
+    binary = True
+
+    def encode(self, msg) -> bytes:
+        msg = _compress_keys(msg)
+        if msgpack is not None:
+            return msgpack.packb(msg, use_bin_type=True)
+        out = bytearray()
+        _pack(msg, out)
+        return bytes(out)
+
+    def decode(self, data):
+        if isinstance(data, str):  # a text frame from a client that still speaks JSON
+            return json.loads(data)
+        if msgpack is not None:
+            msg = msgpack.unpackb(data, raw=False, strict_map_key=False)
+        else:
+            msg, end = _unpack(memoryview(data), 0)
+            if end != len(data):
+                raise ValueError("trailing bytes after MessagePack value")
+        return _expand_keys(msg)
+
+    def join(self, frames: List[bytes]) -> bytes:
+        # a MessagePack array is its header followed by the already-packed items
+        out = bytearray()
+        _pack_len(len(frames), 0x90, 0xDC, out)
+        for f in frames:
+            out += f
+        return bytes(out)
+
+
+JSON = JsonCodec()
+PACK = PackCodec()
+CODECS: Dict[str, object] = {JSON.name: JSON, PACK.name: PACK}
+
+
+def negotiate(offered: Iterable[str]):
+    """First subprotocol the client offered that we speak, or None (plain JSON, no header)."""
+    for name in offered:
+        codec = CODECS.get(name.strip())
+        if codec is not None:
+            return codec
+    return None
+
+
+def _compress_keys(obj):
+    if isinstance(obj, dict):
+        # JSON would stringify non-string keys; do the same so ints always mean KEYS
+        return {KEY_INDEX.get(k, k) if isinstance(k, str) else str(k): _compress_keys(v)
+                for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_compress_keys(v) for v in obj]
+    return obj
+
+
+def _expand_keys(obj):
+    if isinstance(obj, dict):
+        return {KEYS[k] if isinstance(k, int) else k: _expand_keys(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_expand_keys(v) for v in obj]
+    return obj
+
+
+# ---------------------------
+# Built-in MessagePack (the subset JSON-able values need, plus bytes)
+# ---------------------------
+def _pack_len(n: int, fix: int, base: int, out: bytearray, fix_max: int = 15) -> None:
+    # base is the 16-bit marker (array 0xdc, map 0xde); the 32-bit one follows it
+    if n <= fix_max:
+        out.append(fix | n)
+    elif n < 1 << 16:
+        out += struct.pack(">BH", base, n)
+    else:
+        out += struct.pack(">BI", base + 1, n)
+
+
+def _pack(obj: Any, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif 0 <= obj < 1 << 64:
+            for marker, fmt, limit in ((0xCC, ">BB", 1 << 8), (0xCD, ">BH", 1 << 16),
+                                       (0xCE, ">BI", 1 << 32), (0xCF, ">BQ", 1 << 64)):
+                if obj < limit:
+                    out += struct.pack(fmt, marker, obj)
+                    break
+        elif -(1 << 63) <= obj < 0:
+            for marker, fmt, limit in ((0xD0, ">Bb", 1 << 7), (0xD1, ">Bh", 1 << 15),
+                                       (0xD2, ">Bi", 1 << 31), (0xD3, ">Bq", 1 << 63)):
+                if obj >= -limit:
+                    out += struct.pack(fmt, marker, obj)
+                    break
+        else:
+            raise OverflowError("integer out of MessagePack range")
+    elif isinstance(obj, float):
+        out += struct.pack(">Bd", 0xCB, obj)
+    elif isinstance(obj, str):
+        raw = obj.encode("utf-8")
+        n = len(raw)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n < 1 << 8:
+            out += struct.pack(">BB", 0xD9, n)
+        elif n < 1 << 16:
+            out += struct.pack(">BH", 0xDA, n)
+        else:
+            out += struct.pack(">BI", 0xDB, n)
+        out += raw
+    elif isinstance(obj, (bytes, bytearray)):
+        n = len(obj)
+        if n < 1 << 8:
+            out += struct.pack(">BB", 0xC4, n)
+        elif n < 1 << 16:
+            out += struct.pack(">BH", 0xC5, n)
+        else:
+            out += struct.pack(">BI", 0xC6, n)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _pack_len(len(obj), 0x90, 0xDC, out)
+        for v in obj:
+            _pack(v, out)
+    elif isinstance(obj, dict):
+        _pack_len(len(obj), 0x80, 0xDE, out)
+        for k, v in obj.items():
+            _pack(k, out)
+            _pack(v, out)
+    else:
+        raise TypeError(f"cannot pack {type(obj).__name__}")
+
+
+_FIXED = {
+    0xCC: (">B", 1), 0xCD: (">H", 2), 0xCE: (">I", 4), 0xCF: (">Q", 8),
+    0xD0: (">b", 1), 0xD1: (">h", 2), 0xD2: (">i", 4), 0xD3: (">q", 8),
+    0xCA: (">f", 4), 0xCB: (">d", 8),
+}
+_LENGTHS = {0xD9: (">B", 1), 0xDA: (">H", 2), 0xDB: (">I", 4),   # str
+            0xC4: (">B", 1), 0xC5: (">H", 2), 0xC6: (">I", 4),   # bin
+            0xDC: (">H", 2), 0xDD: (">I", 4),                     # array
+            0xDE: (">H", 2), 0xDF: (">I", 4)}                     # map
+
+
+def _unpack(buf: memoryview, i: int):
+    b = buf[i]
+    i += 1
+    if b < 0x80:
+        return b, i
+    if b >= 0xE0:
+        return b - 0x100, i
+    if 0xA0 <= b <= 0xBF:
+        n = b & 0x1F
+        return str(buf[i:i + n], "utf-8"), i + n
+    if 0x90 <= b <= 0x9F:
+        return _unpack_array(buf, i, b & 0x0F)
+    if 0x80 <= b <= 0x8F:
+        return _unpack_map(buf, i, b & 0x0F)
+    if b == 0xC0:
+        return None, i
+    if b == 0xC2:
+        return False, i
+    if b == 0xC3:
+        return True, i
+    if b in _FIXED:
+        fmt, size = _FIXED[b]
+        return struct.unpack_from(fmt, buf, i)[0], i + size
+    if b in _LENGTHS:
+        fmt, size = _LENGTHS[b]
+        n = struct.unpack_from(fmt, buf, i)[0]
+        i += size
+        if b in (0xD9, 0xDA, 0xDB):
+            return str(buf[i:i + n], "utf-8"), i + n
+        if b in (0xC4, 0xC5, 0xC6):
+            return bytes(buf[i:i + n]), i + n
+        if b in (0xDC, 0xDD):
+            return _unpack_array(buf, i, n)
+        return _unpack_map(buf, i, n)
+    raise ValueError(f"unsupported MessagePack type 0x{b:02x}")
+
+
+def _unpack_array(buf, i, n):
+    items = []
+    for _ in range(n):
+        v, i = _unpack(buf, i)
+        items.append(v)
+    return items, i
+
+
+def _unpack_map(buf, i, n):
+    d = {}
+    for _ in range(n):
+        k, i = _unpack(buf, i)
+        v, i = _unpack(buf, i)
+        d[k] = v
+    return d, i
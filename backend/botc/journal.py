@@ -0,0 +1,276 @@
+"""
+Write-ahead journal: rooms survive a crash or restart.
+
+Each process appends to its own file (python -m botc.server --journal PATH; a worker
+of a multi-process deployment gets PATH.<shard>). Records:
+
+  ("room", gid, snapshot)         the whole room, pickled as for a move (botc.migration)
+  ("cmd", gid, name, args, kw)    a command replayed by calling room.<name>(*args, **kw)
+  ("event", gid, type, data)      a DomainEvent the game emitted (kept for the record;
+                                  replay gets its effects from the snapshots)
+  ("drop", gid)                   the room is gone (deleted, or moved to another worker)
+
+Only lobby commands (REPLAYABLE) are journaled as commands: they are deterministic. Any
+other command (starting the game, stepping it, answering prompts) is followed by a new
+snapshot of the room instead, taken as soon as the room is between prompts; a crash
+mid-night replays to the snapshot before the night. A room is also snapshotted again
+after SNAPSHOT_EVERY commands, so replay never has a long tail to run.
+
+Appends are group-committed: a record is buffered, and one write + fsync goes out
+WINDOW seconds after the first record of a group, covering everything appended by then.
+commit() waits for that, so GameRoom acknowledges a batch of commands once it is on
+disk without each command paying for its own flush. The fsync runs off the loop.
+
+Each record is framed with its length and crc32; replay stops at the first torn or
+corrupt frame (a crash mid-write) and truncates it away. Compaction rewrites the file
+with each room's latest snapshot and only the records after it, once the file has grown
+COMPACT_RATIO times past what that would take (and at least COMPACT_MIN bytes).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import pickle
+import struct
+import zlib
+from typing import Dict, List, Tuple
+
+from botc import metrics
+
+WINDOW = 0.005          # seconds a group stays open for more records
+COMPACT_MIN = 4 << 20   # bytes
+COMPACT_RATIO = 4
+SNAPSHOT_EVERY = 200    # commands
+RETRY = 0.5             # seconds before a failed write is retried, doubling up to RETRY_MAX
+RETRY_MAX = 30.0
+REPLAYABLE = frozenset({"join_unseated", "leave", "sit", "vacate", "update_max_seats"})
+
+_HEADER = struct.Struct(">II")  # payload length, crc32
+
+
+def _frame(record: tuple) -> bytes:
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_frames(path: str) -> Tuple[List[Tuple[tuple, bytes]], int]:
+    """Every intact record in the file, with its frame, and the offset where they end."""
+    records, good = [], 0
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return records, 0
+    while good + _HEADER.size <= len(data):
+        size, crc = _HEADER.unpack_from(data, good)
+        end = good + _HEADER.size + size
+        payload = data[good + _HEADER.size:end]
+        if end > len(data) or zlib.crc32(payload) != crc:
+            break
+        records.append((pickle.loads(payload), data[good:end]))
+        good = end
+    return records, good
+
+
+class Journal:
+    def __init__(self, path: str, window: float = WINDOW, fsync: bool = True):
+        self.path = path
+        self.window = window
+        self.fsync = fsync
+        self._fd: int | None = None
+        self.size = 0
+        # per room, the frames replay needs: its latest snapshot and what came after it
+        self._live: Dict[str, List[bytes]] = {}
+        self._buffer: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._writer: asyncio.Task | None = None
+        self._compact = False
+
+    # ---------------------------
+    # Startup
+    # ---------------------------
+    def open(self) -> Dict[str, object]:
+        """Replay the file into rooms (gid -> GameRoom) and start appending after it."""
+        records, end = read_frames(self.path)
+        rooms: Dict[str, object] = {}
+        for record, frame in records:
+            kind, gid = record[0], record[1]
+            if kind == "room":
+                rooms[gid] = pickle.loads(record[2])
+                self._live[gid] = [frame]
+            elif kind == "drop":
+                rooms.pop(gid, None)
+                self._live.pop(gid, None)
+            elif gid in rooms:
+                if kind == "cmd":
+                    getattr(rooms[gid], record[2])(*record[3], **record[4])
+                self._live[gid].append(frame)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        os.truncate(self._fd, end)  # a torn tail from a crash mid-write
+        self.size = end
+        metrics.inc("journal.replayed", len(records))
+        return rooms
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # ---------------------------
+    # Appending
+    # ---------------------------
+    def _append(self, gid: str, record: tuple, snapshot: bool = False) -> None:
+        frame = _frame(record)
+        if snapshot:
+            self._live[gid] = [frame]
+        elif record[0] == "drop":
+            self._live.pop(gid, None)
+        else:
+            self._live.setdefault(gid, []).append(frame)
+        self._buffer.append(frame)
+        metrics.inc("journal.records")
+        if self._writer is None or self._writer.done():
+            try:
+                self._writer = asyncio.get_running_loop().create_task(self._write())
+            except RuntimeError:
+                self._write_now()  # no loop (replay, scripts): straight to disk
+
+    def room(self, room) -> None:
+        self._append(room.info.gid, ("room", room.info.gid, pickle.dumps(room, protocol=pickle.HIGHEST_PROTOCOL)),
+                     snapshot=True)
+        metrics.inc("journal.snapshots")
+
+    def command(self, gid: str, name: str, args: tuple, kwargs: dict) -> None:
+        self._append(gid, ("cmd", gid, name, args, kwargs))
+
+    def event(self, gid: str, type_: str, data: dict) -> None:
+        self._append(gid, ("event", gid, type_, data))
+
+    def drop(self, gid: str) -> None:
+        self._append(gid, ("drop", gid))
+
+    def commit(self) -> asyncio.Future:
+        """Resolves once everything appended so far is on disk."""
+        fut = asyncio.get_running_loop().create_future()
+        if not self._buffer and not self._compact and (self._writer is None or self._writer.done()):
+            fut.set_result(None)
+        else:
+            self._waiters.append(fut)
+            if self._writer is None or self._writer.done():  # a failed write left the file to rewrite
+                self._writer = asyncio.get_running_loop().create_task(self._write())
+        return fut
+
+    async def _write(self) -> None:
+        loop = asyncio.get_running_loop()
+        backoff = RETRY
+        while self._buffer or self._compact:
+            await asyncio.sleep(self.window)  # let the group fill up
+            waiters, self._waiters = self._waiters, []
+            write, frames = self._next_write()
+            try:
+                await loop.run_in_executor(None, write, frames)
+            except OSError as ex:
+                metrics.inc("journal.errors")
+                # those frames are out of the buffer: rewrite the file from _live, which
+                # has them, rather than append what follows them without them
+                self._compact = True
+                for fut in waiters:
+                    if not fut.done():
+                        fut.set_exception(ex)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, RETRY_MAX)
+                continue
+            backoff = RETRY
+            if write == self._rewrite:
+                metrics.inc("journal.compactions")
+            metrics.inc("journal.commits")
+            metrics.observe("journal.group_size", len(frames))
+            self._resolve(waiters)
+        # asked for during the last write, which covered everything they were waiting on
+        waiters, self._waiters = self._waiters, []
+        self._resolve(waiters)
+
+    def _next_write(self):
+        """The next write: the whole file again when due (or after a failed write), else the buffer."""
+        if self._compact or self._wants_compaction():
+            self._compact = False
+            self._buffer = []  # _live has them all
+            return self._rewrite, [f for live in self._live.values() for f in live]
+        frames, self._buffer = self._buffer, []
+        return self._write_frames, frames
+
+    @staticmethod
+    def _resolve(waiters: List[asyncio.Future]) -> None:
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(None)
+
+    def _write_now(self) -> None:
+        write, frames = self._next_write()
+        try:
+            write(frames)
+        except OSError:
+            self._compact = True  # as in _write
+            raise
+
+    def _write_frames(self, frames: List[bytes]) -> None:
+        data = b"".join(frames)
+        _write_all(self._fd, data)
+        if self.fsync:
+            os.fsync(self._fd)
+        self.size += len(data)
+
+    # ---------------------------
+    # Compaction
+    # ---------------------------
+    def _wants_compaction(self) -> bool:
+        if self.size < COMPACT_MIN:
+            return False
+        return self.size > COMPACT_RATIO * sum(len(f) for live in self._live.values() for f in live)
+
+    def compact(self) -> None:
+        """Rewrite the file as soon as the writer next runs."""
+        self._compact = True
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    def _rewrite(self, frames: List[bytes]) -> None:
+        tmp = self.path + ".compact"
+        data = b"".join(frames)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _write_all(fd, data)
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, self.path)
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self.size = len(data)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """os.write until all of `data` is written: a short write would leave a torn frame mid-file."""
+    view = memoryview(data)
+    while view:
+        n = os.write(fd, view)
+        if not n:
+            raise OSError("journal write made no progress")
+        view = view[n:]
+
+
+_journal: Journal | None = None
+
+
+def open_journal(path: str, **kwargs) -> Dict[str, object]:
+    """Make `path` this process's journal; returns the rooms it held."""
+    global _journal
+    j = Journal(path, **kwargs)
+    rooms = j.open()
+    _journal = j
+    return rooms
+
+
+def current() -> Journal | None:
+    return _journal
@@ -1,6 +1,7 @@
 from dataclasses import asdict
 from datetime import datetime, timezone
 
+from botc.codec import JSON
 from botc.model import Game
 
 EVENT = "event"
@@ -12,6 +13,12 @@ PLAYER_TAKEN_SEAT = "PlayerTakenSeat"
 PLAYER_VACATED_SEAT = "PlayerVacatedSeat"
 PLAYER_LEFT = "PlayerLeft"
 PHASE_CHANGED = "PhaseChange"
+STATE_DIFF = "StateDiff"
+
+
+def encode(msg, codec=JSON):
+    """Wire encoding for a socket frame. Encode once per codec and hand the result to each socket."""
+    return codec.encode(msg)
 
 
 def _iso_now():
@@ -111,4 +118,15 @@ def night_prepared_message(gid: str, wake_list: str):
         PHASE_CHANGED,
         gid,
         wake_list
-    )
\ No newline at end of file
+    )
+
+
+def state_diff_message(gid: str, from_version: int, version: int, ops: list):
+    return construct_patch_message(
+        STATE_DIFF,
+        gid,
+        {
+            "from": from_version,
+            "version": version,
+            "ops": ops
+        })
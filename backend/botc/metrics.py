@@ -0,0 +1,54 @@
+"""
+Process-wide counters and gauges.
+
+Counters only go up (inc); gauges are set to the latest value (set_gauge);
+summaries track count / mean / max / last of observed samples (observe).
+snapshot() is what /api/metrics serves.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List
+
+_counters: Counter = Counter()
+_gauges: Dict[str, float] = {}
+_summaries: Dict[str, List[float]] = {}  # name -> [count, total, max, last]
+
+
+def inc(name: str, n: int = 1) -> None:
+    if n:
+        _counters[name] += n
+
+
+def set_gauge(name: str, value: float) -> None:
+    _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    s = _summaries.get(name)
+    if s is None:
+        _summaries[name] = [1, value, value, value]
+    else:
+        s[0] += 1
+        s[1] += value
+        s[2] = max(s[2], value)
+        s[3] = value
+
+
+def counter(name: str) -> int:
+    return _counters[name]
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    return {
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+        "summaries": {name: {"count": n, "mean": round(total / n, 3), "max": round(top, 3), "last": round(last, 3)}
+                      for name, (n, total, top, last) in _summaries.items()},
+    }
+
+
+def reset() -> None:
+    _counters.clear()
+    _gauges.clear()
+    _summaries.clear()
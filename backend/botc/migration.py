@@ -0,0 +1,64 @@
+"""
+Moving a live room to another worker process.
+
+The router (botc.router) moves a room in four steps, each a request to a worker's
+internal endpoint (botc.request_handlers.migration_handler):
+
+  export   the source waits for the room to go quiet (no command running, no prompt
+           awaiting the storyteller, no night being resolved), then freezes it and
+           returns its snapshot: seats, spectators, the Game with its role objects,
+           setup tasks, the prompt cid counter, and the views and events each audience
+           can resume from. From here the source refuses commands (RoomMoving, a 503).
+  import   the target loads the snapshot and serves the room.
+  (the router now sends the gid to the target)
+  release  the source closes the room's sockets with MOVED and forgets the room.
+
+Room versions carry over, so clients reconnecting with ?since= are resumed with a diff.
+If the import fails the source thaws the room and carries on.
+
+Snapshots are pickles: only ever load them from a worker of the same deployment.
+"""
+from __future__ import annotations
+
+import asyncio
+import pickle
+
+from botc import metrics
+from botc.rooms import GameRoom
+
+MOVED = 4002           # close code: the room moved; reconnect (with ?since=) to carry on
+QUIET_TIMEOUT = 5.0    # how long export waits for the room to go quiet
+
+
+async def export(room: GameRoom, timeout: float = QUIET_TIMEOUT) -> bytes | None:
+    """Freeze the room once it is quiet and return its snapshot; None if it stayed busy."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not room.quiet():
+        if loop.time() >= deadline:
+            metrics.inc("migration.busy")
+            return None
+        await asyncio.sleep(0.01)
+    # no await from here on: nothing can change the room between the check and the snapshot
+    room.frozen = True
+    data = pickle.dumps(room, protocol=pickle.HIGHEST_PROTOCOL)
+    metrics.inc("migration.exported")
+    metrics.observe("migration.snapshot_bytes", len(data))
+    return data
+
+
+def restore(data: bytes) -> GameRoom:
+    room = pickle.loads(data)
+    metrics.inc("migration.imported")
+    return room
+
+
+def thaw(room: GameRoom) -> None:
+    room.frozen = False
+
+
+def release(room: GameRoom) -> int:
+    """Send the room's sockets to its new owner: close each with MOVED. Returns how many."""
+    closed = room.close(MOVED, "room_moved")  # quiet since the export: no prompt to cancel
+    metrics.inc("migration.released_sockets", closed)
+    return closed
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import random
 from dataclasses import dataclass, field
+from math import floor
 from enum import Enum, auto
 from typing import Optional, List, Dict, Callable, Any, Set
 
-from botc.prompt import AutoPrompt
+from botc.prompt import AutoPrompt, AsyncPrompt, PromptExpired, as_async, is_async_prompt, run_sync
 from botc.scripts import ROLE_REGISTRY
 from botc.scripts import Script
 
@@ -121,6 +123,8 @@ class Game:
     current_nomination: Nomination | None = None
     prompt: object = field(default_factory=AutoPrompt)
     force_winner: str | None = None  # "GOOD" or "EVIL"
+    winner: str | None = None  # set by Rules the moment a win condition fires
+    rng: random.Random = field(default_factory=random.Random)  # seed it for reproducible games
     current_nomination: Nomination | None = None
     best_nomination: Nomination | None = None  # highest votes this day
     executed_today: Optional[int] = None  # seat id executed (only once per day)
@@ -131,12 +135,31 @@ class Game:
     wake_index = -1
     n1_info = NightOneInfo()
 
+    # Lookup indexes. Built once by reindex() and then kept in step by the
+    # mutation API below (mark_dead / assign_role / seat_player), so never
+    # write player.alive, player.role or player.seat directly once a game exists.
+    _by_id: Dict[int, Player] = field(default_factory=dict, init=False, repr=False)
+    _by_seat: Dict[int, Player] = field(default_factory=dict, init=False, repr=False)
+    _by_role: Dict[str, Player] = field(default_factory=dict, init=False, repr=False)
+    _by_type: Dict[RoleType, Dict[int, Player]] = field(default_factory=dict, init=False, repr=False)
+    _by_team: Dict[Team, Dict[int, Player]] = field(default_factory=dict, init=False, repr=False)
+    _alive: Set[int] = field(default_factory=set, init=False, repr=False)
+    _alive_cache: tuple | None = field(default=None, init=False, repr=False)
+    _alive_by_team: Dict[Team, int] = field(default_factory=dict, init=False, repr=False)
+    _demons_alive: int = field(default=0, init=False, repr=False)
+    # role hooks scheduled on the loop because they are waiting on an async prompt
+    pending_hooks: Set[asyncio.Future] = field(default_factory=set, init=False, repr=False)
+    _seat_ring: List[int] = field(default_factory=list, init=False, repr=False)
+    _ring_pos: Dict[int, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.reindex()
+
     def setup(self):
         deck = self._build_role_deck()
         for role, slot in zip(deck, self.slots):
             self.roles_by_slot[slot] = role
-            player = self.player(slot)
-            player.role = role
+            self.assign_role(slot, role)
 
     def request_setup_task(self, *, kind: str, role: str, owner_id: int,
                            prompt: str, options: list[int] | None = None,
@@ -156,36 +179,337 @@ class Game:
         # dynamically import role modules without touching roles.__init__ imports
         for _, modname, _ in pkgutil.iter_modules(botc.roles.__path__, prefix="botc.roles."):
             importlib.import_module(modname)
-        counts = self.script.role_counts.get(len(self.players))
-        if not counts:
-            raise ValueError(f"Unsupported player count: {len(self.players)}")
-
-        # Safety checks
-        for k in ("townsfolk", "outsiders", "minions", "demons"):
-            need = counts.get(k, 0)
-            have = len(self.script.role_groups[k])
-            if need > have:
-                raise ValueError(f"Not enough roles in group '{k}': need {need}, have {have}")
-
-        role_selections = []
-        role_selections += random.sample(self.script.role_groups["townsfolk"], counts["townsfolk"])
-        role_selections += random.sample(self.script.role_groups["outsiders"], counts["outsiders"])
-        role_selections += random.sample(self.script.role_groups["minions"], counts["minions"])
-        role_selections += random.sample(self.script.role_groups["demons"], counts["demons"])
-
-        if len(role_selections) != len(self.players):
-            raise AssertionError("Role deck size does not match player count")
+        role_selections = self.script.deal(len(self.players), self.rng)
 
         deck = [ROLE_REGISTRY.get(role)() for role in role_selections]
 
-        random.shuffle(deck)
+        self.rng.shuffle(deck)
         return deck
 
-    def player(self, pid: str) -> Player:
-        return next(p for p in self.players if p.id == pid)
+    # ---------------------------
+    # Indexed lookups
+    # ---------------------------
+    def reindex(self) -> None:
+        """Rebuild every index from self.players."""
+        self._by_id = {p.id: p for p in self.players}
+        self._by_role = {}
+        self._by_type = {t: {} for t in RoleType}
+        self._by_team = {t: {} for t in Team}
+        self._alive = {p.id for p in self.players if p.alive}
+        self._alive_cache = None
+        self._alive_by_team = {t: 0 for t in Team}
+        self._demons_alive = 0
+        for p in self.players:
+            self._index_role(p)
+        self._rebuild_seats()
+
+    def _rebuild_seats(self) -> None:
+        self._by_seat = {p.seat: p for p in self.players if p.seat is not None}
+        self._seat_ring = sorted(self._by_seat)
+        self._ring_pos = {seat: i for i, seat in enumerate(self._seat_ring)}
+
+    def _index_role(self, p: Player) -> None:
+        role = p.role
+        if role is None:
+            return
+        self._by_role[role.id] = p
+        rtype = getattr(role, "type", None)
+        if rtype is not None:
+            self._by_type[rtype][p.id] = p
+        team = getattr(role, "team", None)
+        if team is not None:
+            self._by_team[team][p.id] = p
+        if p.alive:
+            self._count_alive(role, +1)
+
+    def _unindex_role(self, p: Player) -> None:
+        role = p.role
+        if role is None:
+            return
+        if self._by_role.get(role.id) is p:
+            del self._by_role[role.id]
+        self._by_type.get(getattr(role, "type", None), {}).pop(p.id, None)
+        self._by_team.get(getattr(role, "team", None), {}).pop(p.id, None)
+        if p.alive:
+            self._count_alive(role, -1)
+
+    def _count_alive(self, role: object, delta: int) -> None:
+        team = getattr(role, "team", None)
+        if team is not None:
+            self._alive_by_team[team] += delta
+        if getattr(role, "type", None) == RoleType.DEMON:
+            self._demons_alive += delta
+
+    def player(self, pid: int) -> Player:
+        return self._by_id[pid]
+
+    def has_player(self, pid: int) -> bool:
+        return pid in self._by_id
+
+    def player_at(self, seat: int) -> Player | None:
+        return self._by_seat.get(seat)
+
+    def player_by_role(self, role_id: str) -> Player | None:
+        return self._by_role.get(role_id)
 
-    def alive_players(self) -> List[Player]:
-        return [p for p in self.players if p.alive]
+    def players_of_type(self, rtype: RoleType) -> List[Player]:
+        return list(self._by_type[rtype].values())
+
+    def players_of_team(self, team: Team) -> List[Player]:
+        return list(self._by_team[team].values())
+
+    def is_alive(self, pid: int) -> bool:
+        return pid in self._alive
+
+    def alive_count(self, team: Team) -> int:
+        return self._alive_by_team[team]
+
+    def demons_alive(self) -> int:
+        return self._demons_alive
+
+    def alive_players(self) -> tuple[Player, ...]:
+        # Cached until the next death; callers must treat it as read-only.
+        if self._alive_cache is None:
+            self._alive_cache = tuple(p for p in self.players if p.id in self._alive)
+        return self._alive_cache
+
+    def alive_others(self, pid: int) -> List[Player]:
+        return [p for p in self.alive_players() if p.id != pid]
+
+    def neighbours(self, pid: int) -> tuple[Player, Player]:
+        """Seat neighbours (left, right), wrapping around the table."""
+        pos = self._ring_pos[self._by_id[pid].seat]
+        ring = self._seat_ring
+        return self._by_seat[ring[pos - 1]], self._by_seat[ring[(pos + 1) % len(ring)]]
+
+    # ---------------------------
+    # Mutation API (keeps the indexes in step)
+    # ---------------------------
+    def _trigger(self, trigger: str, **ctx) -> None:
+        # Win conditions only apply once the game is running, not while roles are dealt.
+        if self.rules is None or self.phase in (Phase.CREATE, Phase.SETUP):
+            return
+        self.rules.notify(self, trigger, **ctx)
+
+    def assign_role(self, pid: int, role: object) -> None:
+        p = self.player(pid)
+        self._unindex_role(p)
+        p.role = role
+        setattr(role, "owner", pid)
+        self._index_role(p)
+        self._trigger("role_change", pid=pid)
+
+    def seat_player(self, pid: int, seat: int | None) -> None:
+        p = self.player(pid)
+        p.seat = seat
+        self._rebuild_seats()
+
+    def mark_dead(self, pid: int, cause: str) -> None:
+        """Mark a player dead, grant ghost vote, call hooks, and handle specials."""
+        p = self.player(pid)
+        if not p.alive:
+            return  # already dead; ignore duplicates
+        p.alive = False
+        p.ghost_vote_available = True
+        self._alive.discard(pid)
+        self._alive_cache = None
+        if p.role:
+            self._count_alive(p.role, -1)
+        self.log.append(f"{p.name} dies {cause}")
+        # role death hook
+        if p.role and hasattr(p.role, "on_death"):
+            p.role.on_death(self)
+        # special: Scarlet Woman promotion if a Demon just died
+        self._maybe_promote_scarlet_woman_on_demon_death(pid)
+        # evaluated last so a promoted Scarlet Woman keeps the game going
+        self._trigger("death", pid=pid, cause=cause)
+
+    def execute(self, pid: int) -> None:
+        p = self.player(pid)
+        # Mayor: if would be executed, no one dies instead (simple interpretation)
+        if getattr(p.role, "id", "") == "Mayor":
+            self.log.append("Mayor prevents an execution")
+            return
+        if p.role and hasattr(p.role, "on_execution"):
+            p.role.on_execution(self, pid)
+        self.mark_dead(pid, "at dusk")
+        self.last_executed_pid = pid
+        self.log.append(f"{p.name} is executed at dusk")
+        self._trigger("execution", pid=pid)
+
+    def kill_at_dawn(self, pid: int) -> None:
+        if pid not in self.pending_dawn:
+            self.pending_dawn.append(pid)
+
+    def kill_now(self, pid: int) -> None:
+        self.mark_dead(pid, "immediately")
+
+    def _maybe_promote_scarlet_woman_on_demon_death(self, dead_pid: int) -> None:
+        dead = self.player(dead_pid)
+        if getattr(dead.role, "type", None) != RoleType.DEMON:
+            return
+        # Only if 5+ players are alive *after* this death
+        if len(self._alive) < 5:
+            return
+        sw = self.player_by_role("Scarlet Woman")
+        if not sw or not sw.alive:
+            return
+        # Promote her to Demon (Imp). Local import avoids circulars.
+        from botc.roles.imp import Imp
+        self.assign_role(sw.id, Imp())
+        self.log.append(f"{sw.name} becomes the Imp (Scarlet Woman)")
+
+    def is_poisoned(self, pid: int) -> bool:
+        # True if a living Poisoner set this pid last night (simple per-night poison)
+        poisoner = self.player_by_role("Poisoner")
+        if poisoner is None or not poisoner.alive:
+            return False
+        return getattr(poisoner.role, "poisoned_pid", None) == pid
+
+    def is_poisoned_like(self, pid: int) -> bool:
+        # Treat Drunk as 'poisoned' for ability correctness.
+        player = self.player(pid)
+        return self.is_poisoned(pid) or getattr(player.role, "id", "") == "Drunk"
+
+    def protect(self, pid: int) -> None:
+        self.night_protected.add(pid)
+
+    def demon_attack(self, target_pid: int) -> None:
+        # Demon attempts to kill target at night.
+        target = self.player(target_pid)
+        if not target.alive:
+            return
+        # Soldier immunity
+        if getattr(target.role, "id", "") == "Soldier":
+            self.log.append(f"{target.name} (Soldier) resists the demon")
+            return
+        # Monk protection
+        if target_pid in self.night_protected:
+            self.log.append(f"{target.name} is protected from the demon")
+            return
+        # Normal night death
+        self.kill_at_dawn(target_pid)
+
+    # --- Voting helpers ---
+    def majority_required(self) -> int:
+        alive = len(self.alive_players())
+        # In BotC you need strictly more than half the living players
+        return floor(alive / 2) + 1
+
+    def start_nomination(self, nominator_id: int, target_id: int) -> None:
+        assert self.phase == Phase.DAY
+        assert self.player(nominator_id).alive and self.player(target_id).alive
+        self.current_nomination = Nomination(nominator=nominator_id, target=target_id)
+        self.log.append(f"Nomination: {self.player(nominator_id).name} nominates {self.player(target_id).name}")
+
+        # Virgin check
+        target = self.player(target_id)
+        if getattr(target.role, "id", "") == "Virgin" and not self.is_poisoned_like(target_id):
+            nom = self.player(nominator_id)
+            nom_type = getattr(nom.role, "type", None)
+            if nom_type == RoleType.TOWNSFOLK and not self.is_poisoned_like(nominator_id):
+                self.log.append("Virgin ability triggers: immediate execution")
+                self.execute(target_id)  # dusk execution right away
+                self.executed_today = target_id
+                # Close nomination to stop voting
+                self.current_nomination.closed = True
+
+    def cast_vote(self, voter_id: int, vote_for: bool) -> None:
+        assert self.current_nomination and not self.current_nomination.closed
+        voter = self.player(voter_id)
+
+        can_vote_alive = voter.alive
+        can_vote_dead = (not voter.alive) and voter.ghost_vote_available
+        if not (can_vote_alive or can_vote_dead):
+            return
+
+        prev = self.current_nomination.votes.get(voter_id)
+        if prev is True and vote_for is False:
+            self.current_nomination.votes_for -= 1
+        if prev is False and vote_for is True:
+            self.current_nomination.votes_for += 1
+        if prev is None and vote_for is True:
+            self.current_nomination.votes_for += 1
+        self.current_nomination.votes[voter_id] = vote_for
+
+        if not voter.alive and voter.ghost_vote_available:
+            voter.ghost_vote_available = False
+
+    def close_nomination(self) -> bool:
+        assert self.current_nomination and not self.current_nomination.closed
+        n = self.current_nomination
+        n.closed = True
+        needed = self.majority_required()
+
+        # Butler rule: a Butler may only vote if their chosen master votes
+        adjusted_for = n.votes_for
+        for voter_id, voted_for in list(n.votes.items()):
+            if not voted_for:
+                continue
+            voter = self.player(voter_id)
+            if getattr(voter.role, "id", None) == "Butler":
+                master = getattr(voter.role, "master_pid", None)
+                if master is None or not n.votes.get(master, False):
+                    # remove their 'for' vote
+                    n.votes[voter_id] = False
+                    adjusted_for -= 1
+
+        n.votes_for = adjusted_for
+        passes = n.votes_for >= needed
+
+        voters_for = ", ".join(self.player(v).name for v, ok in n.votes.items() if ok)
+        voters_against = ", ".join(self.player(v).name for v, ok in n.votes.items() if not ok)
+        self.log.append(
+            f"Votes for {self.player(n.target).name}: {n.votes_for} (needed {needed}) → {'MAJORITY' if passes else 'NO MAJORITY'}"
+        )
+        self.log.append(f"For: {voters_for or '—'} | Against: {voters_against or '—'}")
+
+        # Best-on-block: strictly greater replaces (ties do not)
+        if not self.best_nomination or n.votes_for > self.best_nomination.votes_for:
+            self.best_nomination = n
+        return passes
+
+    # ---------------------------
+    # Prompts and async role hooks
+    # ---------------------------
+    @property
+    def aprompt(self) -> AsyncPrompt:
+        return as_async(self.prompt)
+
+    def run_hook(self, coro):
+        """
+        Run an async role hook from sync code. With a sync prompt it completes inline;
+        with a real async prompt (WsPrompt) it is scheduled on the running loop and the
+        task is returned, so the caller never blocks the IOLoop.
+        """
+        if not is_async_prompt(self.prompt):
+            return run_sync(coro)
+        task = asyncio.ensure_future(self._guard_hook(coro))
+        self.pending_hooks.add(task)
+        task.add_done_callback(self.pending_hooks.discard)
+        return task
+
+    async def _guard_hook(self, coro) -> None:
+        # An expired prompt abandons that one ability, not the night.
+        try:
+            await coro
+        except PromptExpired:
+            self.log.append("A storyteller prompt expired; the ability was skipped")
+
+    async def resolve_night(self) -> None:
+        """Wake every role on the wake list in order, awaiting each prompt as it comes."""
+        for entry in self.wake_list:
+            p = self.player(entry["owner"])
+            role = p.role
+            # roles can change hands mid-night (Scarlet Woman), so check the current holder
+            if not p.alive or getattr(role, "id", None) != entry["role"]:
+                continue
+            if hasattr(role, "on_night_async"):
+                await self._guard_hook(role.on_night_async(self))
+            else:
+                role.on_night(self)
+        if self.pending_hooks:
+            await asyncio.gather(*list(self.pending_hooks))
 
     def advance(self) -> Phase:
         """Leave current phase, enter next phase, stay there, and return the new current phase."""
@@ -253,17 +577,6 @@ class Game:
                 role.on_setup(self)
 
     def start_day(self) -> None:
-        # ready the day; call role hooks later as needed
-        # self.best_nomination = None
-        # self.executed_today = None
-        pass
-
-    def finish_day(self) -> None:
-        # resolve block, if any
-        pass
-
-    def start_day(self):
-        return
         self.best_nomination = None
         self.executed_today = None
         # call on_day_start for roles
@@ -271,9 +584,12 @@ class Game:
             if p.role and hasattr(p.role, "on_day_start"):
                 p.role.on_day_start(self)
 
-    def finish_day(self):
-        return
+    def finish_day(self) -> None:
         # Execute highest on the block if any (ties = no execution).
+        self._resolve_block()
+        self._trigger("day_end")
+
+    def _resolve_block(self) -> None:
         if self.executed_today is not None:
             return  # already executed via immediate effect or earlier
         n = self.best_nomination
@@ -288,32 +604,26 @@ class Game:
         # For our simple engine, best_nomination is only updated on strictly greater votes,
         # so a tie will never overwrite; that means ties → no execution.
         self.execute(n.target)
+        self.executed_today = n.target
+
+    def current_night_order(self) -> List[str]:
+        if self.script:
+            return self.script.first_night if self.night == 1 else self.script.other_nights
+        return self.night_order
 
     def build_wake_list(self) -> List[Dict]:
         self.wake_list = []
         self.wake_index = -1
 
-        # map role name -> player
-        alive_by_role: Dict[str, int] = {}
-        for p in self.players:
-            if not p.alive:
-                continue
-            r = getattr(p, "role", None)
-            if not r:
-                continue
-            # r.name should match the strings in the Script
-            alive_by_role[r.id] = p.id
-
         order = self.script.night_order(self.night)
 
         for role_name in order:
-            pid = alive_by_role.get(role_name)
-            if pid is None:
+            pl = self.player_by_role(role_name)
+            if pl is None or not pl.alive:
                 continue  # role not in play or dead
-            pl = self.player(pid)  # assume you have g.player(id)
             self.wake_list.append({
                 "role": role_name,
-                "owner": pid,
+                "owner": pl.id,
                 "name": pl.name
             })
 
@@ -322,27 +632,17 @@ class Game:
     def _compute_night_one_info(self):
         """Call this once after setup, before Night 1 starts."""
         # Identify demon and minions in play
-        demon = None
-        minions = []
-        in_play_role_names: Set[str] = set()
+        demons = self.players_of_type(RoleType.DEMON)
+        minions = self.players_of_type(RoleType.MINION)
+        in_play_role_names: Set[str] = set(self._by_role)
 
-        for p in self.players:
-            if not getattr(p, "role", None):
-                continue
-            in_play_role_names.add(p.role.id)
-            rtype = getattr(p.role, "type", None)
-            if rtype == RoleType.DEMON:
-                demon = p
-            elif rtype == RoleType.MINION:
-                minions.append(p)
-
-        demon_id = demon.id if demon else None
+        demon_id = demons[-1].id if demons else None
         minion_ids = [m.id for m in minions]
 
         # Choose 3 bluff roles from townsfolk not in play
         townsfolk_all = set(self.script.role_groups.get("townsfolk", []))
         available_bluffs = list(townsfolk_all - in_play_role_names)
-        random.shuffle(available_bluffs)
+        self.rng.shuffle(available_bluffs)
         bluffs = available_bluffs[:3]
 
         return NightOneInfo(
@@ -352,186 +652,6 @@ class Game:
         )
 
     """
-    def alive_others(self, pid: int) -> List[Player]:
-        return [p for p in self.alive_players() if p.id != pid]
-
-    def assign_role(self, pid: int, role: object):
-        p = self.player(pid)
-        p.role = role
-        setattr(role, "owner", pid)
-
-    def kill_at_dawn(self, pid: int):
-        if pid not in self.pending_dawn:
-            self.pending_dawn.append(pid)
-
-    def kill_now(self, pid: int):
-        self.mark_dead(pid, "immediately")
-
-    
-
-    # --- Voting helpers ---
-    def majority_required(self) -> int:
-        alive = len(self.alive_players())
-        # In BotC you need strictly more than half the living players
-        return floor(alive / 2) + 1
-
-    def start_nomination(self, nominator_id: int, target_id: int):
-        assert self.phase == Phase.DAY
-        assert self.player(nominator_id).alive and self.player(target_id).alive
-        self.current_nomination = Nomination(nominator=nominator_id, target=target_id)
-        self.log.append(f"Nomination: {self.player(nominator_id).name} nominates {self.player(target_id).name}")
-
-        # Virgin check
-        target = self.player(target_id)
-        if getattr(target.role, "id", "") == "Virgin" and not self.is_poisoned_like(target_id):
-            nom = self.player(nominator_id)
-            nom_type = getattr(nom.role, "type", None)
-            if nom_type == RoleType.TOWNSFOLK and not self.is_poisoned_like(nominator_id):
-                self.log.append("Virgin ability triggers: immediate execution")
-                self.execute(target_id)  # dusk execution right away
-                self.executed_today = target_id
-                # Close nomination to stop voting
-                self.current_nomination.closed = True
-
-    def cast_vote(self, voter_id: int, vote_for: bool):
-        assert self.current_nomination and not self.current_nomination.closed
-        voter = self.player(voter_id)
-
-        can_vote_alive = voter.alive
-        can_vote_dead = (not voter.alive) and voter.ghost_vote_available
-        if not (can_vote_alive or can_vote_dead):
-            return
-
-        prev = self.current_nomination.votes.get(voter_id)
-        if prev is True and vote_for is False:
-            self.current_nomination.votes_for -= 1
-        if prev is False and vote_for is True:
-            self.current_nomination.votes_for += 1
-        if prev is None and vote_for is True:
-            self.current_nomination.votes_for += 1
-        self.current_nomination.votes[voter_id] = vote_for
-
-        if not voter.alive and voter.ghost_vote_available:
-            voter.ghost_vote_available = False
-
-    def close_nomination(self) -> bool:
-        assert self.current_nomination and not self.current_nomination.closed
-        n = self.current_nomination
-        n.closed = True
-        needed = self.majority_required()
-
-        # Butler rule: a Butler may only vote if their chosen master votes
-        adjusted_for = n.votes_for
-        for voter_id, voted_for in list(n.votes.items()):
-            if not voted_for:
-                continue
-            voter = self.player(voter_id)
-            if getattr(voter.role, "id", None) == "Butler":
-                master = getattr(voter.role, "master_pid", None)
-                if master is None or not n.votes.get(master, False):
-                    # remove their 'for' vote
-                    n.votes[voter_id] = False
-                    adjusted_for -= 1
-
-        n.votes_for = adjusted_for
-        passes = n.votes_for >= needed
-
-        voters_for = ", ".join(self.player(v).name for v, ok in n.votes.items() if ok)
-        voters_against = ", ".join(self.player(v).name for v, ok in n.votes.items() if not ok)
-        self.log.append(
-            f"Votes for {self.player(n.target).name}: {n.votes_for} (needed {needed}) → {'MAJORITY' if passes else 'NO MAJORITY'}"
-        )
-        self.log.append(f"For: {voters_for or '—'} | Against: {voters_against or '—'}")
-
-        # Best-on-block: strictly greater replaces (ties do not)
-        if not self.best_nomination or n.votes_for > self.best_nomination.votes_for:
-            self.best_nomination = n
-        return passes
-
-    def execute(self, pid: int):
-        p = self.player(pid)
-        # Mayor: if would be executed, no one dies instead (simple interpretation)
-        if getattr(p.role, "id", "") == "Mayor":
-            self.log.append("Mayor prevents an execution")
-            return
-        if p.role and hasattr(p.role, "on_execution"):
-            p.role.on_execution(self, pid)
-        self.mark_dead(pid, "at dusk")
-        self.last_executed_pid = pid
-        self.log.append(f"{p.name} is executed at dusk")
-
-    def mark_dead(self, pid: int, cause: str):
-        #Mark a player dead, grant ghost vote, call hooks, and handle specials.
-        p = self.player(pid)
-        if not p.alive:
-            return  # already dead; ignore duplicates
-        p.alive = False
-        p.ghost_vote_available = True
-        self.log.append(f"{p.name} dies {cause}")
-        # role death hook
-        if p.role and hasattr(p.role, "on_death"):
-            p.role.on_death(self)
-        # special: Scarlet Woman promotion if a Demon just died
-        self._maybe_promote_scarlet_woman_on_demon_death(pid)
-
-    def _maybe_promote_scarlet_woman_on_demon_death(self, dead_pid: int):
-        dead = self.player(dead_pid)
-        if getattr(dead.role, "type", None) != RoleType.DEMON:
-            return
-        # Only if 5+ players are alive *after* this death
-        if len(self.alive_players()) < 5:
-            return
-        # Find a living Scarlet Woman
-        sw = next((p for p in self.alive_players()
-                   if getattr(p.role, "id", None) == "Scarlet Woman"), None)
-        if not sw:
-            return
-        # Promote her to Demon (Imp). Local import avoids circulars.
-        from botc.roles.imp import Imp
-        self.assign_role(sw.id, Imp())
-        self.log.append(f"{sw.name} becomes the Imp (Scarlet Woman)")
-
-   
-
-    
-
-    def is_poisoned(self, pid: int) -> bool:
-        # True if any living Poisoner set this pid last night (simple per-night poison)
-        for p in self.players:
-            if getattr(p.role, "id", None) == "Poisoner" and p.alive:
-                if getattr(p.role, "poisoned_pid", None) == pid:
-                    return True
-        return False
-
-    def is_poisoned_like(self, pid: int) -> bool:
-        #Treat Drunk as 'poisoned' for ability correctness.
-        player = self.player(pid)
-        return self.is_poisoned(pid) or getattr(player.role, "id", "") == "Drunk"
-
-    def protect(self, pid: int):
-        self.night_protected.add(pid)
-
-    def demon_attack(self, target_pid: int):
-        #Demon attempts to kill target at night.
-        target = self.player(target_pid)
-        if not target.alive:
-            return
-        # Soldier immunity
-        if getattr(target.role, "id", "") == "Soldier":
-            self.log.append(f"{target.name} (Soldier) resists the demon")
-            return
-        # Monk protection
-        if target_pid in self.night_protected:
-            self.log.append(f"{target.name} is protected from the demon")
-            return
-        # Normal night death
-        self.kill_at_dawn(target_pid)
-
-    def current_night_order(self) -> List[str]:
-        if self.script:
-            return self.script.first_night if self.night == 1 else self.script.other_nights
-        return self.night_order
-
     def assign_by_names(g, seat_to_role_names: list[str]):
         for seat, role_name in enumerate(seat_to_role_names, start=1):
             if role_name not in ROLE_REGISTRY:  # skip unimplemented
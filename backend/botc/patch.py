@@ -0,0 +1,82 @@
+"""
+RFC 6902 style diffs between two JSON-able views.
+
+diff() only emits add / remove / replace, which is all the client applies. Lists are
+compared index by index (seats keep their order), growing with "add" and shrinking
+with "remove" from the end, so ops are valid when applied in sequence.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List
+
+Op = Dict[str, Any]
+
+
+def _escape(key) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Op]:
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Op] = []
+        for key, value in old.items():
+            sub = f"{path}/{_escape(key)}"
+            if key not in new:
+                ops.append({"op": "remove", "path": sub})
+            else:
+                ops.extend(diff(value, new[key], sub))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for i in range(common):
+            ops.extend(diff(old[i], new[i], f"{path}/{i}"))
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        return ops
+    # bool is an int subclass: True == 1 must still count as a change
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply(doc: Any, ops: List[Op]) -> Any:
+    """Apply ops to a copy of doc and return it (what the client does, used by tests and tools)."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            if op["op"] == "remove":
+                raise ValueError("cannot remove the document root")
+            doc = copy.deepcopy(op["value"])
+            continue
+        parent = doc
+        for t in tokens[:-1]:
+            parent = parent[int(t)] if isinstance(parent, list) else parent[t]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            idx = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(idx, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del parent[idx]
+            else:
+                parent[idx] = copy.deepcopy(op["value"])
+        else:
+            if op["op"] == "remove":
+                del parent[last]
+            else:
+                parent[last] = copy.deepcopy(op["value"])
+    return doc
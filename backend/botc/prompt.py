@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Protocol, Sequence
+import inspect
+from typing import Any, Callable, Coroutine, Protocol, Sequence
+
+
+class PromptExpired(Exception):
+    """A prompt hit its deadline (or lost its storyteller) with no default answer."""
 
 
 class Prompt(Protocol):
@@ -9,6 +14,51 @@ class Prompt(Protocol):
     def confirm(self, requester_pid: int, title: str) -> bool: ...
 
 
+class AsyncPrompt(Protocol):
+    async def choose_one(self, requester_pid: int, candidates: Sequence[int], title: str) -> int | None: ...
+    async def choose_two(self, requester_pid: int, candidates: Sequence[int], title: str) -> tuple[int, int] | None: ...
+    async def confirm(self, requester_pid: int, title: str) -> bool: ...
+
+
+class SyncPromptAdapter:
+    """Presents a sync Prompt through the AsyncPrompt protocol. Its coroutines never suspend."""
+    def __init__(self, prompt: Prompt):
+        self.prompt = prompt
+
+    async def choose_one(self, requester_pid, candidates, title):
+        return self.prompt.choose_one(requester_pid, candidates, title)
+
+    async def choose_two(self, requester_pid, candidates, title):
+        return self.prompt.choose_two(requester_pid, candidates, title)
+
+    async def confirm(self, requester_pid, title):
+        return self.prompt.confirm(requester_pid, title)
+
+
+def is_async_prompt(prompt) -> bool:
+    """True for prompts that genuinely wait on something (e.g. WsPrompt), not for adapted sync ones."""
+    return inspect.iscoroutinefunction(prompt.choose_one) and not isinstance(prompt, SyncPromptAdapter)
+
+
+def as_async(prompt) -> AsyncPrompt:
+    if inspect.iscoroutinefunction(prompt.choose_one):
+        return prompt
+    return SyncPromptAdapter(prompt)
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]):
+    """
+    Drive a coroutine that never suspends (one awaiting only SyncPromptAdapter calls)
+    to completion without an event loop.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("prompt suspended; await the hook from the event loop instead")
+
+
 class AutoPrompt:
     def choose_one(self, requester_pid, candidates, title):
         return candidates[0] if candidates else None
@@ -1,5 +1,7 @@
 import tornado
 
+from botc.rooms import RoomMoving
+
 
 class BaseHandler(tornado.web.RequestHandler):
     def set_default_headers(self):
@@ -10,4 +12,18 @@ class BaseHandler(tornado.web.RequestHandler):
     def options(self, *args, **kwargs):
         # Preflight response
         self.set_status(204)
-        self.finish()
\ No newline at end of file
+        self.finish()
+
+    def log_exception(self, typ, value, tb):
+        if not isinstance(value, RoomMoving):
+            super().log_exception(typ, value, tb)
+
+    def write_error(self, status_code, **kwargs):
+        exc = kwargs.get("exc_info", (None, None))[1]
+        if isinstance(exc, RoomMoving):
+            # moments from now the router sends this room's requests to its new owner
+            self.set_status(503)
+            self.set_header("Retry-After", "1")
+            self.finish({"error": "room_moving"})
+            return
+        super().write_error(status_code, **kwargs)
@@ -5,7 +5,7 @@ from botc.rooms import rooms
 
 class JoinRoomHandler(BaseHandler):
 
-    def post(self, gid: str):
+    async def post(self, gid: str):
         room = rooms.get(gid)
         if not room:
             self.set_status(404)
@@ -20,7 +20,7 @@ class JoinRoomHandler(BaseHandler):
             self.write({"error": "missing_name"})
             return
 
-        spectator = room.join_unseated(spectator_id, spectator_name)
+        spectator = await room.submit(room.join_unseated, spectator_id, spectator_name)
         if not spectator:
             self.set_status(409)
             self.write({"error": "room_not_open"})
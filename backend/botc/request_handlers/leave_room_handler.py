@@ -4,7 +4,7 @@ from botc.rooms import rooms
 
 
 class LeaveRoomHandler(BaseHandler):
-    def post(self, gid: str):
+    async def post(self, gid: str):
         room = rooms.get(gid)
         if not room:
             self.set_status(404)
@@ -19,11 +19,10 @@ class LeaveRoomHandler(BaseHandler):
             self.write({"error": "invalid_payload"})
             return
 
-        ok, err = room.leave(pid)
+        ok, err = await room.submit(room.leave, pid)
         if not ok:
             self.set_status(409)
             self.write({"error": err})
             return
 
-        room.broadcast()
         self.write({"ok": True})
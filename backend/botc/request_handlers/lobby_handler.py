@@ -1,14 +1,18 @@
+from botc import store
 from botc.request_handlers.base_handler import BaseHandler
 from botc.rooms import GameRoom, rooms
 from botc.view import view_for_room
+from botc.ws import throttle
 
 
 class LobbyHandler(BaseHandler):
     def get(self):
-        payload = []
-
-        for room in rooms.values():
-            payload.append(view_for_room(room))
+        s = store.current()
+        if s:
+            payload = s.lobby()  # without hydrating the rooms that aren't resident
+        else:
+            payload = [view_for_room(room) for room in rooms.values()]
 
         print(payload)
-        self.write({"lobby": payload})
+        t = throttle.current()
+        self.write({"lobby": payload, "throttle": t.status() if t else {"level": 0}})
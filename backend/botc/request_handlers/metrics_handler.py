@@ -0,0 +1,12 @@
+from botc import metrics
+from botc.request_handlers.base_handler import BaseHandler
+from botc.rooms import rooms
+from botc.ws import deflate
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        snapshot = metrics.snapshot()
+        snapshot["rooms"] = {gid: room.outbound_stats() for gid, room in rooms.items()}
+        snapshot["compression"] = deflate.stats()
+        self.write(snapshot)
@@ -0,0 +1,51 @@
+from botc import journal, migration
+from botc.request_handlers.base_handler import BaseHandler
+from botc.rooms import rooms
+
+
+class MigrationHandler(BaseHandler):
+    """Worker side of a room move (see botc.migration); only the router, holding the cluster token, may call it."""
+
+    def initialize(self, token: str):
+        self.token = token
+
+    def prepare(self):
+        if self.request.headers.get("X-Cluster-Token") != self.token:
+            self.set_status(403)
+            self.finish({"error": "forbidden"})
+
+    async def post(self, gid: str, action: str):
+        if action == "import":
+            if gid in rooms:
+                self.set_status(409)
+                self.write({"error": "room_exists"})
+                return
+            room = rooms[gid] = migration.restore(self.request.body)
+            j = journal.current()
+            if j:
+                j.room(room)
+                await j.commit()
+            self.write({"ok": True})
+            return
+
+        room = rooms.get(gid)
+        if not room:
+            self.set_status(404)
+            self.write({"error": "room_not_found"})
+            return
+        if action == "export":
+            data = await migration.export(room, float(self.get_query_argument("timeout", migration.QUIET_TIMEOUT)))
+            if data is None:
+                self.set_status(409)
+                self.write({"error": "room_busy"})
+                return
+            self.set_header("Content-Type", "application/octet-stream")
+            self.write(data)
+        elif action == "thaw":
+            migration.thaw(room)
+            self.write({"ok": True})
+        elif action == "release":
+            del rooms[gid]
+            if journal.current():
+                journal.current().drop(gid)
+            self.write({"ok": True, "sockets": migration.release(room)})
@@ -1,7 +1,7 @@
 import json
-import uuid
 from dataclasses import asdict
 
+from botc import journal, shards, sweeper
 from botc.cli import new_game
 from botc.request_handlers.base_handler import BaseHandler
 from botc.rooms import rooms
@@ -10,7 +10,12 @@ from botc.scripts import trouble_brewing_script
 
 
 class RoomsHandler(BaseHandler):
-    def post(self):
+    async def post(self):
+        if sweeper.at_capacity():
+            self.set_status(503)
+            self.set_header("Retry-After", "60")
+            self.write({"error": "at_capacity"})
+            return
         body = json.loads(self.request.body or b"{}")
         creator = body.get("creator")
 
@@ -19,12 +24,17 @@ class RoomsHandler(BaseHandler):
         # For now default to trouble brewing
         script = trouble_brewing_script()
         seat_count = int(body.get("seat_count") or 8)
-        gid = uuid.uuid4().hex[:8]
+        gid = shards.new_gid()
 
         # TODO Do I actually want to create a game right now?
         #g = new_game(initial_names)  # can be []
         room = GameRoom(gid, room_name, script, creator, seat_count)
         rooms[gid] = room
+        sweeper.sweeper()  # running from the first room on
+        j = journal.current()
+        if j:
+            j.room(room)
+            await j.commit()
 
         self.write({
             "gid": gid,
@@ -4,7 +4,7 @@ from botc.rooms import rooms
 
 
 class SeatsHandler(BaseHandler):
-    def post(self, gid: str):
+    async def post(self, gid: str):
         room = rooms.get(gid)
         if not room:
             self.set_status(404)
@@ -18,7 +18,7 @@ class SeatsHandler(BaseHandler):
             self.write({"error": "invalid_seat_count"})
             return
 
-        ok, err = room.update_max_seats(new_seat_count)
+        ok, err = await room.submit(room.update_max_seats, new_seat_count)
         if not ok:
             self.set_status(409)
             self.write({"error": err, "seats": len(room.seats)})
@@ -5,7 +5,7 @@ from botc.rooms import rooms
 
 
 class SitHandler(BaseHandler):
-    def post(self, gid: str):
+    async def post(self, gid: str):
         room = rooms.get(gid)
         if not room:
             self.set_status(404)
@@ -22,7 +22,7 @@ class SitHandler(BaseHandler):
             self.write({"error": "invalid_payload"})
             return
 
-        ok, err = room.sit(spectator_id, seat_no)
+        ok, err = await room.submit(room.sit, spectator_id, seat_no)
         if not ok:
             self.set_status(409)
             self.write({"error": err})
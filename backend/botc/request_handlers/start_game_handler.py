@@ -5,7 +5,7 @@ from botc.rooms import rooms
 
 
 class StartGameHandler(BaseHandler):
-    def post(self, gid: str):
+    async def post(self, gid: str):
         room = rooms.get(gid)
         if not room:
             self.set_status(404)
@@ -13,7 +13,7 @@ class StartGameHandler(BaseHandler):
             return
         body = json.loads(self.request.body or b"{}")
 
-        ok = room.start_game()
+        ok = await room.submit(room.start_game)
 
         if not ok:
             self.set_status(400)
@@ -4,7 +4,7 @@ from botc.rooms import rooms
 
 
 class VacateHandler(BaseHandler):
-    def post(self, gid: str):
+    async def post(self, gid: str):
         room = rooms.get(gid)
         if not room:
             self.set_status(404)
@@ -18,7 +18,7 @@ class VacateHandler(BaseHandler):
             self.set_status(400)
             self.write({"error": "invalid_payload"})
             return
-        ok, err = room.vacate(player_id, seat)
+        ok, err = await room.submit(room.vacate, player_id, seat)
         if not ok:
             self.set_status(409)
             self.write({"error": err})
@@ -17,6 +17,9 @@ class Butler:
     def on_setup(self, g: Game): pass
 
     def on_night(self, g: Game):
+        g.run_hook(self.on_night_async(g))
+
+    async def on_night_async(self, g: Game):
         # Pick a master (alive other). First & other nights.
         me = g.player(self.owner)
         if not me.alive:
@@ -24,7 +27,7 @@ class Butler:
         cands = [p.id for p in g.alive_players() if p.id != me.id]
         if not cands:
             return
-        pick = g.prompt.choose_one(self.owner, cands, "Choose your master")
+        pick = await g.aprompt.choose_one(self.owner, cands, "Choose your master")
         if pick is not None:
             self.master_pid = pick
             g.log.append(f"{me.name} (Butler) chooses {g.player(pick).name} as master")
@@ -16,14 +16,12 @@ class Chef:
         me = g.player(self.owner)
         if not me.alive:
             return
-        players = g.players
         pairs = 0
-        for i in range(len(players)):
-            a, b = players[i], players[(i+1) % len(players)]
-            a_evil = (getattr(a.role, "team", None) == Team.EVIL)
-            b_evil = (getattr(b.role, "team", None) == Team.EVIL)
+        # Each evil player counts the pair they form with their right-hand neighbour
+        for a in g.players_of_team(Team.EVIL):
+            _, b = g.neighbours(a.id)
             # Recluse nuance ignored for now; keep it simple
-            if a_evil and b_evil:
+            if b is not a and getattr(b.role, "team", None) == Team.EVIL:
                 pairs += 1
         if g.is_poisoned_like(self.owner):
             pairs = (pairs + 1) % 3  # small skew
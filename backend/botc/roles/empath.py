@@ -17,9 +17,7 @@ class Empath:
             return
 
         # Seats are arranged numerically; wrap around at ends
-        left = g.players[(me.seat - 2) % len(g.players)]
-        right = g.players[me.seat % len(g.players)]
-        neighbours = [left, right]
+        neighbours = g.neighbours(me.id)
 
         evil_neighbours = sum(
             1 for p in neighbours if getattr(p.role, "team", None) == Team.EVIL
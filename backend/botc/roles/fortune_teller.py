@@ -50,6 +50,9 @@ class FortuneTeller:
             self.red_herring = selection
 
     def on_night(self, g: Game):
+        g.run_hook(self.on_night_async(g))
+
+    async def on_night_async(self, g: Game):
         me = g.player(self.owner)
         if not me.alive:
             return
@@ -58,7 +61,7 @@ class FortuneTeller:
             return
 
         cand_ids = [p.id for p in others]
-        pick = g.prompt.choose_two(self.owner, cand_ids, "Choose two players")
+        pick = await g.aprompt.choose_two(self.owner, cand_ids, "Choose two players")
         if not pick:
             return
         a = g.player(pick[0]); b = g.player(pick[1])
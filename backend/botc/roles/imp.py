@@ -1,4 +1,3 @@
-import random
 from botc.model import Team, RoleType, Game
 from botc.scripts import register_role
 
@@ -19,7 +18,7 @@ class Imp:
         candidates = g.alive_others(self.owner)
         if not candidates:
             return
-        target = random.choice(candidates)
+        target = g.rng.choice(candidates)
         g.demon_attack(target.id)
 
     def on_day_start(self, g: Game): pass
@@ -18,8 +18,8 @@ class Investigator:
             {"id": p.id,
              "name": p.name,
              "role": role_view(p.role)}
-            for p in g.alive_players()
-            if p.id != me.id and getattr(p.role, "type", None) == RoleType.MINION]
+            for p in g.players_of_type(RoleType.MINION)
+            if p.id != me.id and p.alive]
         if minions:
             g.request_setup_task(
                 kind="select_minion",
@@ -66,11 +66,11 @@ class Investigator:
             return
 
         # Pick a minion role that is in the bag or present; simple: prefer ones present
-        present_minions = [p for p in g.players if getattr(p.role, "type", None) == RoleType.MINION]
+        present_minions = g.players_of_type(RoleType.MINION)
         role_name = getattr(present_minions[0].role, "id", "Poisoner") if present_minions else "Poisoner"
 
         # Choose two players, exactly one is that minion (unless poisoned)
-        minion = next((p for p in g.players if getattr(p.role, "id", "") == role_name), None)
+        minion = g.player_by_role(role_name)
         candidates = [p for p in g.players if p.id != me.id]
         if len(candidates) < 2:
             return
@@ -18,8 +18,8 @@ class Librarian:
             {"id": p.id,
              "name": p.name,
              "role": role_view(p.role)}
-            for p in g.alive_players()
-            if p.id != me.id and getattr(p.role, "type", None) == RoleType.OUTSIDER]
+            for p in g.players_of_type(RoleType.OUTSIDER)
+            if p.id != me.id and p.alive]
         if outsiders:
             g.request_setup_task(
                 kind="select_outsider",
@@ -64,7 +64,7 @@ class Librarian:
         me = g.player(self.owner)
         if not me.alive:
             return
-        outsiders = [p for p in g.players if getattr(p.role, "type", None) == RoleType.OUTSIDER]
+        outsiders = g.players_of_type(RoleType.OUTSIDER)
         others = [p for p in g.players if p.id != me.id]
         if len(others) < 2:
             return
@@ -12,6 +12,9 @@ class Monk:
     def on_setup(self, g: Game): pass
 
     def on_night(self, g: Game):
+        g.run_hook(self.on_night_async(g))
+
+    async def on_night_async(self, g: Game):
         me = g.player(self.owner)
         if not me.alive:
             return
@@ -19,7 +22,7 @@ class Monk:
         cands = [p.id for p in g.alive_players() if p.id != me.id]
         if not cands:
             return
-        pid = g.prompt.choose_one(self.owner, cands, "Protect a player")
+        pid = await g.aprompt.choose_one(self.owner, cands, "Protect a player")
         if pid is None:
             return
         if g.is_poisoned_like(self.owner):
@@ -16,13 +16,16 @@ class Poisoner:
     def on_setup(self, g: Game): pass
 
     def on_night(self, g: Game):
+        g.run_hook(self.on_night_async(g))
+
+    async def on_night_async(self, g: Game):
         me = g.player(self.owner)
         if not me.alive:
             return
         candidates = [p.id for p in g.alive_players() if p.id != me.id]
         if not candidates:
             return
-        pid = g.prompt.choose_one(self.owner, candidates, "Poison whom?")
+        pid = await g.aprompt.choose_one(self.owner, candidates, "Poison whom?")
         if pid is not None:
             self.poisoned_pid = pid
             g.log.append(f"{g.player(pid).name} is poisoned tonight")
@@ -11,20 +11,24 @@ class Ravenkeeper:
     def on_setup(self, g: Game): pass
 
     def on_death(self, g: Game):
-        # Trigger only if death happened during night processing (called before DAY)
+        # Trigger only if death happened during night processing (called before DAY).
+        # Checked here, not in the coroutine, which may only run after dawn.
         if g.phase.name == "NIGHT":
-            me = g.player(self.owner)
-            # Choose any player to learn their role
-            cands = [p.id for p in g.players if p.id != me.id]
-            if not cands: return
-            pid = g.prompt.choose_one(self.owner, cands, "Choose a player to learn their role")
-            if pid is None: return
-            seen = g.player(pid)
-            role_id = getattr(seen.role, "id", "Unknown")
-            if g.is_poisoned_like(self.owner):
-                g.log.append(f"{me.name} (Ravenkeeper) learns ???")
-            else:
-                g.log.append(f"{me.name} (Ravenkeeper) learns {seen.name} is the {role_id}")
+            g.run_hook(self.on_death_async(g))
+
+    async def on_death_async(self, g: Game):
+        me = g.player(self.owner)
+        # Choose any player to learn their role
+        cands = [p.id for p in g.players if p.id != me.id]
+        if not cands: return
+        pid = await g.aprompt.choose_one(self.owner, cands, "Choose a player to learn their role")
+        if pid is None: return
+        seen = g.player(pid)
+        role_id = getattr(seen.role, "id", "Unknown")
+        if g.is_poisoned_like(self.owner):
+            g.log.append(f"{me.name} (Ravenkeeper) learns ???")
+        else:
+            g.log.append(f"{me.name} (Ravenkeeper) learns {seen.name} is the {role_id}")
 
     def on_night(self, g: Game): pass
     def on_day_start(self, g: Game): pass
@@ -18,8 +18,8 @@ class WasherWoman:
             {"id": p.id,
              "name": p.name,
              "role": role_view(p.role)}
-            for p in g.alive_players()
-            if p.id != me.id and getattr(p.role, "type", None) == RoleType.TOWNSFOLK]
+            for p in g.players_of_type(RoleType.TOWNSFOLK)
+            if p.id != me.id and p.alive]
         if townsfolk:
             g.request_setup_task(
                 kind="select_townsfolk",
@@ -66,8 +66,8 @@ class WasherWoman:
         if not me.alive:
             return
         # find a townsfolk (excluding me)
-        townsfolk = [p for p in g.alive_players()
-                     if p.id != me.id and getattr(p.role, "type", None) == RoleType.TOWNSFOLK]
+        townsfolk = [p for p in g.players_of_type(RoleType.TOWNSFOLK)
+                     if p.id != me.id and p.alive]
         if not townsfolk:
             return
         t = townsfolk[0]
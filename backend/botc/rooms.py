@@ -1,21 +1,120 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import List, Set, Dict
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Set, Dict, Tuple
+
+import tornado.iostream
+import tornado.websocket
 
 # spectator_joined_message
 # player_taken_seat,
+from botc import journal, metrics, store
+from botc.codec import JSON
 from botc.messages import player_vacated_seat, player_left_message, \
-    role_assigned_info_message, night_prepared_message
+    role_assigned_info_message, night_prepared_message, encode, state_diff_message
 from botc.model import RoomInfo, Game, DomainEvent, SetupTask, TaskStatus, Phase
+from botc.patch import diff
+from botc.rules import Rules
 from botc.scripts import Script
-from botc.view import view_for_player, view_for_storyteller, view_for_room
+from botc.view import view_for_player, view_for_storyteller, view_for_room, shared_view
+from botc.ws import throttle
 from botc.ws.prompt_bus import PromptBus
+from botc.ws.ws_prompt import WsPrompt
 from botc.model import Player
 from botc.model import Spectator
 
+log = logging.getLogger(__name__)
+
+# Seconds the storyteller has to answer a role prompt before it expires.
+PROMPT_TIMEOUT = 300.0
+# Prompt kind -> answer used on expiry. Kinds not listed skip the ability instead.
+PROMPT_DEFAULTS: Dict[str, object] = {}
+# Seconds a storyteller who dropped has to reconnect before their pending prompts are settled.
+ORPHAN_GRACE = 30.0
+# Past views and events kept per audience, so a reconnecting client resumes from what it holds.
+RING_SIZE = 32
+
+
+def _ring() -> deque:
+    return deque(maxlen=RING_SIZE)
+
+# Outbound classes, most urgent first. Each room drains them with a weighted round robin
+# (GameRoom._pump): a round sends up to WEIGHTS[c] * QUANTUM frames of class c and, if
+# anything is left, yields the loop before the next, so a storyteller prompt never waits
+# behind a whole spectator fan-out.
+URGENT, PRIVATE, BULK = 0, 1, 2   # storyteller / players / room viewers
+CLASS_NAMES = ("urgent", "private", "bulk")
+WEIGHTS = (8, 4, 1)
+QUANTUM = 32
+
+# Broadcast scopes: which audiences' views a change can reach.
+# A player id may be passed as well, dirtying that player's view (and the storyteller's).
+PUBLIC = "public"       # info, seats, spectators: every view
+GAME = "game"           # phase, night, player blocks: every player and the storyteller
+ROOM = "room"           # anonymous room viewers only
+STORYTELLER = "st"
+
+
+class RoomMoving(Exception):
+    """The room is on its way to another process; retry against its new owner."""
+
+
+@dataclass
+class AudienceView:
+    """An audience's last built view, stamped with the room version it changed at."""
+    version: int
+    view: dict
+    fresh: bool = True
+    _frames: Dict[str, str | bytes] = field(default_factory=dict)   # codec name -> full state
+    _patches: Dict[tuple, str | bytes] = field(default_factory=dict)  # (codec name, from version) -> diff
+
+    def frame(self, codec=JSON):
+        # encoded at most once per version and codec, then the same frame goes to every socket
+        data = self._frames.get(codec.name)
+        if data is None:
+            data = self._frames[codec.name] = encode(
+                {"type": "state", "version": self.version, "view": self.view}, codec)
+        return data
+
+    def frame_for(self, gid: str, base: "AudienceView | None", codec=JSON):
+        """Frame for a socket holding `base` (an earlier view): a diff from it when smaller, else the full state."""
+        if base is None:
+            return self.frame(codec)
+        key = (codec.name, base.version)
+        patch = self._patches.get(key)
+        if patch is None:
+            ops = diff(base.view, self.view)
+            patch = encode(state_diff_message(gid, base.version, self.version, ops), codec)
+            # size the snapshot off the base's frame when it exists, rather than encoding this one too
+            base_full = base._frames.get(codec.name)
+            full = len(base_full) if base_full is not None else len(self.frame(codec))
+            patch = self._patches[key] = patch if len(patch) < full else b""
+        return patch or self.frame(codec)
+
+
+@dataclass
+class Fanout:
+    """One frame going out to a list of sockets: an event, or (msg None) the audience's current state."""
+    key: object
+    socks: list
+    msg: dict | None = None
+    queued_at: float = 0.0
+    pos: int = 0  # sockets before this one are done
+
 
 class GameRoom:
+    # set by _init_process_state
+    _PROCESS_STATE = frozenset({
+        "room_viewers", "player_sockets", "storytellerSocket", "_shared", "_flush_pending", "_outbox",
+        "_state_jobs", "_pumping", "_pump_scheduled", "_private_dirty", "_sent_at", "_deferred",
+        "_commands", "_worker", "superseded", "frozen", "_snapshot_due", "_since_snapshot", "changes",
+        "_orphaning",
+    })
+
     def __init__(self, gid: str, name: str, script: Script, creator, initial_seat_count: int = 5):
         self.min_residents = 5
         self.max_residents = 20
@@ -27,19 +126,74 @@ class GameRoom:
             storyteller_name=creator['name'],
             storyteller_id=creator['id']
         )
-        self.bus = PromptBus()
+        self.bus = PromptBus(default_timeout=PROMPT_TIMEOUT)
         self.spectators: List[Spectator] = []
         self.players: List[Player] = []
         self.seats = [{"seat": i + 1, "occupant": None} for i in range(initial_seat_count)]
         self.game: Game | None = None
 
+        self._next_task_id = 1
+        self.setup_tasks: List[SetupTask] = []
+        self._resolving_night = False
+
+        # Bumped whenever some audience's view actually changes; each cached view is
+        # stamped with the version it changed at, each socket with the last one it got.
+        self.version = 0
+        self._views: Dict[object, AudienceView] = {}
+        # Per audience, the views before the current one and the events sent to it, each
+        # stamped from the same version counter; see resume().
+        self._history: Dict[object, Deque[AudienceView]] = defaultdict(_ring)
+        self._events: Dict[object, Deque[Tuple[int, dict]]] = defaultdict(_ring)
+        self._init_process_state()
+
+    def _init_process_state(self) -> None:
+        """What belongs to this process rather than the room (sockets, queues, timers); not part of a snapshot."""
         self.room_viewers: Set["RoomViewerSocket"] = set()
         self.player_sockets: Dict[int, Set] = defaultdict(set)
 
         self.storytellerSocket = None  # set by StorytellerSocket.open
-
-        self._next_task_id = 1
-        self.setup_tasks: List[SetupTask] = []
+        self._orphaning: asyncio.TimerHandle | None = None  # storyteller_gone()'s grace period
+
+        self._shared: dict | None = None  # shared_view() for the broadcast in progress
+        self._flush_pending = False
+        # Frames waiting to go out, one queue per class, and the queued state fan-out per audience
+        self._outbox: Tuple[Deque[Fanout], ...] = (deque(), deque(), deque())
+        self._state_jobs: Dict[object, Fanout] = {}
+        self._pumping = False
+        self._pump_scheduled = False
+        # Lag throttling (botc.ws.throttle): player views with a non-public change pending,
+        # when each throttled audience last got a state, and the flush for the ones held back
+        self._private_dirty: Set = set()
+        self._sent_at: Dict[object, float] = {}
+        self._deferred: asyncio.TimerHandle | None = None
+        # Mutations from handlers queue here and are applied in order by one worker task (submit()).
+        self._commands: Deque[tuple] = deque()
+        self._worker: asyncio.Task | None = None
+        self.superseded = 0  # state frames skipped for congested sockets
+        self.frozen = False  # snapshotted for a move (botc.migration): takes no more commands
+        # botc.journal: a snapshot is owed (the room changed in a way commands can't replay),
+        # and commands journaled since the last one
+        self._snapshot_due = False
+        self._since_snapshot = 0
+        # bumped by every touch(), whether or not anyone is watching; botc.store saves the
+        # room when it moved
+        self.changes = 0
+
+    def __getstate__(self):
+        # only the room itself; what _init_process_state sets up is rebuilt on arrival
+        return {k: v for k, v in vars(self).items() if k not in self._PROCESS_STATE}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_process_state()
+
+    def quiet(self) -> bool:
+        """No command queued or running, no prompt awaiting an answer and no night being resolved."""
+        return not self._commands and (self._worker is None or self._worker.done()) and self._between_prompts()
+
+    def _between_prompts(self) -> bool:
+        """Nothing awaiting the storyteller: the room can be snapshotted without losing work in flight."""
+        return not self.bus.pending() and not self._resolving_night and not (self.game and self.game.pending_hooks)
 
     # ---------------------------
     # Room viewers (spectators of the room state, not players)
@@ -75,7 +229,7 @@ class GameRoom:
                     self.seats.pop(i)
                     break
 
-        self.broadcast()
+        self.broadcast(PUBLIC)
         return True, None
 
     # ---------------------------
@@ -122,79 +276,500 @@ class GameRoom:
         self.game = Game(
             slots=slots,
             players=self.players,
-            script=self.script
+            script=self.script,
+            rules=Rules()
         )
 
-        # Broadcast here to clear out existing roles etc
-        self.broadcast()
+        # Broadcast here to clear out existing roles etc; flushed now, before setup deals new ones
+        self.broadcast(PUBLIC)
+        self.flush()
 
         # Single domain event hook
         self.game._emit = self.domain_event
+        # Role prompts go to the storyteller and are awaited, never blocking the IOLoop
+        self.game.prompt = WsPrompt(self._notify_st, self.bus, defaults=PROMPT_DEFAULTS)
         self.info.status = "In-play"
 
         # Assign roles and run role on_setup (roles may request setup tasks)
         self.game.setup()
-        # Only storyteller knows roles at this point.
-        self.send_to_storyteller({"type": "state", "view": view_for_storyteller(self.game, self)})
+        # Only storyteller knows roles at this point; room viewers just see the status change.
+        self.broadcast(STORYTELLER, ROOM)
         return True
 
     # ---------------------------
     # Messaging to ST and clients
     # ---------------------------
-    def send_to_storyteller(self, msg):
-        import json
-        if not self.storytellerSocket:
-            return
-        if isinstance(msg, str):
-            self.storytellerSocket.write_message(msg)
-        else:
-            self.storytellerSocket.write_message(json.dumps(msg))
+    def send_to_storyteller(self, msg: dict) -> None:
+        self.send_event(STORYTELLER, msg)
 
     def _notify_st(self, msg: dict) -> None:
-        if getattr(self, "storytellerSocket", None):
-            self.storytellerSocket.send(msg)
+        self.send_event(STORYTELLER, msg)
+
+    def send_event(self, key, msg: dict) -> None:
+        """Stamp msg with the next version as its seq, keep it for resume() and send it to the audience's sockets."""
+        self.version += 1
+        msg = {**msg, "seq": self.version}
+        self._events[key].append((self.version, msg))
+        if key == STORYTELLER:
+            socks = [self.storytellerSocket] if self.storytellerSocket else []
+        elif key == ROOM:
+            socks = list(self.room_viewers)
+        else:
+            socks = list(self.player_sockets.get(key, ()))
+        self._enqueue(key, socks, msg)
+        self._pump()
 
-    def broadcast(self):
-        # players (per-player view)
-        for pid, socks in list(self.player_sockets.items()):
-            msg = {"type": "state", "view": view_for_player(self.game, pid, self)}
-            dead = []
-            for sock in list(socks):
+    @staticmethod
+    def _class_of(key) -> int:
+        return URGENT if key == STORYTELLER else BULK if key == ROOM else PRIVATE
+
+    def _enqueue(self, key, socks: list, msg: dict | None = None) -> None:
+        if not socks:
+            return
+        if msg is None:
+            job = self._state_jobs.get(key)
+            if job is not None:
+                # still going out: start it over, so sockets it already passed get the newer view too
+                job.socks, job.pos = socks, 0
+                return
+        job = Fanout(key, socks, msg, time.perf_counter())
+        if msg is None:
+            self._state_jobs[key] = job
+        self._outbox[self._class_of(key)].append(job)
+
+    def _pump(self) -> None:
+        """Send queued frames, most urgent class first; past one round's budget, continue next loop iteration."""
+        if self._pumping:
+            return  # a send re-entered us (e.g. a batching socket flushing the room); the running round continues
+        self._pumping = True
+        try:
+            while True:
+                for cls, queue in enumerate(self._outbox):
+                    if queue:
+                        metrics.observe(f"outbox.wait_ms.{CLASS_NAMES[cls]}",
+                                        (time.perf_counter() - queue[0].queued_at) * 1000)
+                    budget = WEIGHTS[cls] * QUANTUM
+                    while queue and budget:
+                        budget -= self._send_some(queue[0], budget)
+                        if queue[0].pos >= len(queue[0].socks):
+                            job = queue.popleft()
+                            if self._state_jobs.get(job.key) is job:
+                                del self._state_jobs[job.key]
+                if not any(self._outbox):
+                    return
                 try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    continue  # no loop to yield to: drain it all now
+                if not self._pump_scheduled:
+                    self._pump_scheduled = True
+                    loop.call_soon(self._next_round)
+                return
+        finally:
+            self._pumping = False
+
+    def _next_round(self) -> None:
+        self._pump_scheduled = False
+        self._pump()
+
+    def _send_some(self, job: "Fanout", budget: int) -> int:
+        socks, start = job.socks, job.pos
+        end = min(len(socks), start + budget)
+        key, msg = job.key, job.msg
+        for sock in socks[start:end]:
+            try:
+                if msg is None:
+                    self._send_view(sock, key)
+                else:
                     sock.send(msg)
+            except (tornado.websocket.WebSocketClosedError, tornado.iostream.StreamClosedError):
+                self._drop(sock)  # gone already; its on_close may not have run yet
+            except Exception:
+                # a bug building or sending this frame: don't leave the client connected and
+                # silently without updates; closing it makes it reconnect and resync
+                metrics.inc("room.send_errors")
+                log.exception("room %s: send to %r failed", self.info.gid, key)
+                self._drop(sock)
+                try:
+                    sock.close(1011, "send_failed")
                 except Exception:
-                    dead.append(sock)
-            for d in dead:
-                socks.discard(d)
+                    pass
+        if job.socks is socks:  # unless a send restarted it
+            job.pos = end
+        return end - start
+
+    def _drop(self, sock) -> None:
+        """Forget a socket whose send failed."""
+        if sock is self.storytellerSocket:
+            self.storytellerSocket = None
+        self.room_viewers.discard(sock)
+        for pid, socks in list(self.player_sockets.items()):
+            socks.discard(sock)
             if not socks:
+                # the view and its history stay: the player may be back with resume()
                 del self.player_sockets[pid]
 
-        # storyteller
+    def touch(self, *scopes) -> None:
+        """Mark the audiences whose view may have changed; their views are rebuilt on the next broadcast."""
+        self.changes += 1
+        for scope in scopes:
+            if scope == PUBLIC:
+                self._shared = None
+            if scope == PUBLIC or scope == GAME:
+                for key, entry in self._views.items():
+                    if scope == PUBLIC or key != ROOM:
+                        entry.fresh = False
+                if scope == GAME:
+                    self._private_dirty.update(k for k in self._views if k != ROOM and k != STORYTELLER)
+            else:
+                self._stale(scope)
+                if scope != ROOM:  # the storyteller sees every player's block too
+                    self._stale(STORYTELLER)
+                    if scope != STORYTELLER:
+                        self._private_dirty.add(scope)
+
+    def _stale(self, key) -> None:
+        entry = self._views.get(key)
+        if entry:
+            entry.fresh = False
+
+    def _view(self, key) -> AudienceView:
+        entry = self._views.get(key)
+        if entry and entry.fresh:
+            return entry
+        if self._shared is None:
+            self._shared = shared_view(self)
+        if key == ROOM:
+            view = view_for_room(self, self._shared)
+        elif key == STORYTELLER:
+            view = view_for_storyteller(self.game, self, self._shared)
+        else:
+            view = view_for_player(self.game, key, self, self._shared)
+        if entry and entry.view == view:
+            entry.fresh = True
+        else:
+            self.version += 1
+            if entry:
+                entry._patches.clear()
+                self._history[key].append(entry)
+            entry = self._views[key] = AudienceView(self.version, view)
+        return entry
+
+    def _past(self, key, version: int) -> AudienceView | None:
+        for entry in reversed(self._history.get(key, ())):
+            if entry.version == version:
+                return entry
+        return None
+
+    def _send_view(self, sock, key) -> None:
+        """Send the audience's current view unless the socket already holds that version."""
+        entry = self._view(key)
+        if getattr(sock, "state_version", 0) >= entry.version:
+            return
+        if getattr(sock, "congested", False):
+            # superseded: the socket gets whatever is newest once it drains (catch_up)
+            sock.dropped += 1
+            self.superseded += 1
+            metrics.inc("frames.superseded")
+            return
+        codec = getattr(sock, "codec", JSON)
+        base = self._past(key, getattr(sock, "state_version", 0))
+        sock.send_raw(entry.frame_for(self.info.gid, base, codec))
+        sock.state_version = entry.version
+
+    def catch_up(self, sock) -> None:
+        """Bring a socket that fell behind (e.g. after congestion) up to its audience's newest state."""
+        if sock.audience is not None:
+            self._send_view(sock, sock.audience)
+
+    def sockets(self):
+        for socks in self.player_sockets.values():
+            yield from socks
+        if self.storytellerSocket:
+            yield self.storytellerSocket
+        yield from self.room_viewers
+
+    def close(self, code: int = 1001, reason: str = "room_closed") -> int:
+        """Cancel prompts awaiting an answer and close every socket with `code`; returns how many."""
+        self.bus.cancel_all()
+        self.storyteller_back()  # nothing left to orphan
+        if self._deferred is not None:
+            self._deferred.cancel()
+            self._deferred = None
+        socks = list(self.sockets())
+        for sock in socks:
+            try:
+                sock.close(code, reason)
+            except Exception:
+                pass
+        self.room_viewers.clear()
+        self.player_sockets.clear()
+        self.storytellerSocket = None
+        return len(socks)
+
+    def outbound_stats(self) -> Dict[str, int]:
+        socks = list(self.sockets())
+        return {
+            "queued_commands": len(self._commands),
+            "outbox": {CLASS_NAMES[c]: sum(len(j.socks) - j.pos for j in q) for c, q in enumerate(self._outbox)},
+            "sockets": len(socks),
+            "congested": sum(1 for s in socks if getattr(s, "congested", False)),
+            "queued_frames": sum(len(getattr(s, "queue", ())) for s in socks),
+            "buffered_bytes": sum(getattr(s, "buffered", 0) for s in socks),
+            "superseded": self.superseded,
+        }
+
+    def resync(self, sock, key) -> None:
+        """The client lost track (or failed a patch): forget what it holds and send a full state."""
+        sock.state_version = 0
+        self._send_view(sock, key)
+
+    def resume(self, sock, since: int | None = None) -> None:
+        """
+        Bring a (re)connecting socket up to date without rebuilding or sending anyone else's view.
+
+        `since` is the last version (state or event seq) the client saw. If the audience's
+        ring still reaches back to it, the socket gets one diff from the view it holds and
+        the events it missed; otherwise (or with no `since`) a full state.
+        """
+        key = sock.audience
+        entry = self._view(key)
+        held = 0
+        if since is not None and since <= self.version:
+            if since >= entry.version:
+                held = entry.version
+            else:
+                # the newest view at or before `since` is the one the client holds
+                held = next((e.version for e in reversed(self._history.get(key, ())) if e.version <= since), 0)
+        metrics.inc("resume.replayed" if held else "resume.snapshot")
+        sock.state_version = held
+        self._send_view(sock, key)
+        events = self._events.get(key)
+        if held and events:
+            if len(events) == events.maxlen and events[0][0] > since:
+                metrics.inc("resume.events_lost")  # some may have fallen off the ring; the state above covers them
+            for seq, msg in events:
+                if seq > since:
+                    sock.send(msg)
+
+    def broadcast(self, *scopes):
+        """
+        Mark the audiences touched by `scopes` dirty (everything when none are given) and
+        schedule one flush for the next loop iteration, so a burst of changes in a tick
+        goes out as a single broadcast. Without a running loop it flushes straight away.
+        """
+        self.touch(*(scopes or (PUBLIC,)))
+        metrics.inc("broadcast.requested")
+        if self._flush_pending:
+            metrics.inc("broadcast.coalesced")
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_pending = True
+        loop.call_soon(self.flush_now)
+
+    def flush_now(self):
+        """Run a scheduled flush early; the queued callback then finds nothing to do."""
+        if self._flush_pending:
+            self.flush()
+
+    def flush(self):
+        """
+        Queue dirty views for every socket and start sending them, by class (see _pump).
+        Views are only rebuilt for dirty audiences, when their first socket's turn comes,
+        and only sent to sockets behind on them. While the loop lags, room viewers (and
+        players whose change is only public) may be held back; see _hold.
+        """
+        self._flush_pending = False
+        self._shared = None
+        metrics.inc("broadcast.flushed")
+        t = throttle.current()
+        viewer_gap = t.viewer_interval() if t else 0.0
+        player_gap = t.player_interval() if t else 0.0
+
+        for pid, socks in self.player_sockets.items():
+            if player_gap and pid not in self._private_dirty and self._hold(pid, player_gap):
+                continue
+            self._enqueue(pid, list(socks))
+        self._private_dirty.clear()
         if self.storytellerSocket:
+            self._enqueue(STORYTELLER, [self.storytellerSocket])
+        if not (viewer_gap and self._hold(ROOM, viewer_gap)):
+            self._enqueue(ROOM, list(self.room_viewers))
+        self._pump()
+
+    def _hold(self, key, gap: float) -> bool:
+        """
+        Whether an audience's changed view has to wait: it got a state less than `gap`
+        seconds ago. If so a flush is scheduled for when it may have the next one, which
+        sends whatever is newest by then.
+        """
+        entry = self._views.get(key)
+        if entry is None or entry.fresh:
+            return False  # nothing new to hold back
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        wait = self._sent_at.get(key, now - gap) + gap - now
+        if wait <= 0:
+            self._sent_at[key] = now
+            return False
+        metrics.inc("throttle.held")
+        if self._deferred is None or self._deferred.when() > now + wait:
+            if self._deferred is not None:
+                self._deferred.cancel()
+            self._deferred = loop.call_later(wait, self._flush_deferred)
+        return True
+
+    def _flush_deferred(self) -> None:
+        self._deferred = None
+        self.flush()
+
+    # ---------------------------
+    # Command queue
+    # ---------------------------
+    def submit(self, command, *args, **kwargs) -> asyncio.Future:
+        """
+        Queue a room mutation (a bound method such as self.sit) and return a future for its
+        result. Commands run in submission order on the room's worker task; everything
+        queued by the time it runs is applied as one batch followed by a single flush.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        if self.frozen:
+            fut.set_exception(RoomMoving(self.info.gid))
+            return fut
+        self._commands.append((command, args, kwargs, fut, loop.time()))
+        metrics.inc("room.commands")
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run_commands())
+        return fut
+
+    async def _run_commands(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._commands:
+            batch, self._commands = self._commands, deque()
+            started = loop.time()
+            j = journal.current()
+            done = []
+            for command, args, kwargs, fut, queued_at in batch:
+                metrics.observe("room.queue_ms", (started - queued_at) * 1000)
+                if fut.done():  # the caller stopped waiting
+                    continue
+                try:
+                    result = command(*args, **kwargs)
+                except Exception as ex:
+                    fut.set_exception(ex)
+                else:
+                    done.append((fut, result))
+                    if j:
+                        self._journal_command(j, command, args, kwargs)
+            metrics.observe("room.batch_size", len(batch))
+            error = None
             try:
-                self.storytellerSocket.send({"type": "state", "view": view_for_storyteller(self.game, self)})
-            except Exception as ex:
-                print(ex)
-                self.storytellerSocket = None
-
-        # room viewers
-        if self.room_viewers:
-            room_view = {"type": "state", "view": view_for_room(self)}
-            gone = []
-            for v in list(self.room_viewers):
                 try:
-                    v.send(room_view)
+                    self.flush_now()
                 except Exception:
-                    gone.append(v)
-            for g in gone:
-                self.room_viewers.discard(g)
+                    # the commands are applied; a view that fails to build mustn't fail them
+                    metrics.inc("room.flush_errors")
+                    log.exception("room %s: flush after commands failed", self.info.gid)
+                if j:
+                    # acknowledged once on disk, with whatever else went into the same group commit
+                    self._snapshot_if_due(j)
+                    await j.commit()
+            except Exception as ex:  # the journal couldn't write: applied, but not durable
+                error = ex
+            finally:
+                for fut, result in done:
+                    if fut.done():
+                        continue
+                    if error is None:
+                        fut.set_result(result)
+                    else:
+                        fut.set_exception(error)
+
+    def _journal_command(self, j: journal.Journal, command, args, kwargs) -> None:
+        name = getattr(command, "__name__", None)
+        if getattr(command, "__self__", None) is self and name in journal.REPLAYABLE:
+            j.command(self.info.gid, name, args, kwargs)
+            self._since_snapshot += 1
+            if self._since_snapshot >= journal.SNAPSHOT_EVERY:
+                self._snapshot_due = True
+        else:
+            self._snapshot_due = True
+
+    def _snapshot_if_due(self, j: journal.Journal) -> None:
+        if self._snapshot_due and self._between_prompts():
+            j.room(self)
+            self._snapshot_due = False
+            self._since_snapshot = 0
+
+    def step(self) -> tuple[str, int]:
+        """Advance the game one phase; returns the new (phase name, night)."""
+        if self._resolving_night or self.bus.pending():
+            # the rest of the wake list would run in the next phase
+            raise ValueError("night_in_progress")
+        self.game.advance()
+        # Don't broadcast until the game has begun
+        # This might change later as we get more into the game
+        if self.game.phase != Phase.SETUP:
+            self.broadcast(GAME)
+        return self.game.phase.name, self.game.night
+
+    def apply_setup(self, task: Dict) -> bool:
+        """The storyteller's answer to a role's setup task; ignored unless the owner still has that role."""
+        role = getattr(self.player_by_id(task["owner_id"]), "role", None)
+        if not role or getattr(role, "id", None) != task["role"]:
+            return False
+        role.apply_setup(task=task, selection=task["selection"], game=self.game)
+        return True
 
     # ---------------------------
     # Prompt responses (for choose_one/two, etc.)
     # ---------------------------
     def respond(self, cid: int, answer):
         self.bus.fulfill(cid, answer)
-        self.broadcast()
+        self.broadcast(GAME)
+
+    def storyteller_gone(self) -> None:
+        """
+        The storyteller's socket closed. Unless a storyteller reconnects (storyteller_back)
+        within ORPHAN_GRACE, settle the prompts nobody is left to answer.
+        """
+        if self._orphaning is not None:
+            return
+        try:
+            self._orphaning = asyncio.get_running_loop().call_later(ORPHAN_GRACE, self._orphan_prompts)
+        except RuntimeError:
+            self.bus.orphan_all()  # no loop to wait on
+
+    def storyteller_back(self) -> None:
+        if self._orphaning is not None:
+            self._orphaning.cancel()
+            self._orphaning = None
+
+    def _orphan_prompts(self) -> None:
+        self._orphaning = None
+        if self.storytellerSocket is None:
+            self.bus.orphan_all()
+
+    async def resolve_night(self) -> bool:
+        """Run the night's wake list; each storyteller prompt is awaited on the bus."""
+        if not self.game or self.game.phase != Phase.NIGHT or self._resolving_night or self.frozen:
+            return False
+        self._resolving_night = True
+        self._snapshot_due = True
+        try:
+            await self.game.resolve_night()
+        finally:
+            self._resolving_night = False
+        self.broadcast(GAME)
+        j = journal.current()
+        if j:
+            self._snapshot_if_due(j)
+        return True
 
     # ---------------------------
     # Lookups
@@ -226,7 +801,7 @@ class GameRoom:
                 and not self.is_player(pid=spectator_id):
             spectator = Spectator(id=spectator_id, name=spectator_name)
             self.spectators.append(spectator)
-            self.broadcast()
+            self.broadcast(PUBLIC)
 
         return {"id": spectator_id, "name": spectator_name}
 
@@ -251,7 +826,7 @@ class GameRoom:
                 seat = self.seats[seat_no - 1]
                 if seat["occupant"] is not None and getattr(seat["occupant"], "id", None) == player.id:
                     seat["occupant"] = None
-            player.seat = None
+            self._unseat(player)
 
         spec = Spectator(id=player.id, name=player.name)
         self.spectators.append(spec)
@@ -261,9 +836,16 @@ class GameRoom:
 
         # do i need to do this if i am broadcasting
         # self.send_to_storyteller(player_left_message(self.info.gid, player.id, player.name, seat_no))
-        self.broadcast()
+        self.broadcast(PUBLIC)
         return True, None
 
+    def _unseat(self, player) -> None:
+        """Clear a player's seat; once the game tracks them, through it, so its seat index stays right."""
+        if self.game and self.game.has_player(player.id):
+            self.game.seat_player(player.id, None)
+        else:
+            player.seat = None
+
     def sit(self, sid: int, seat_no: int) -> tuple[bool, str | None]:
         if not (1 <= seat_no <= len(self.seats)):
             return False, "invalid_seat"
@@ -286,7 +868,7 @@ class GameRoom:
         self.players.append(player)
 
         #self.send_to_storyteller(player_taken_seat(self.info.gid, spectator.id, spectator.name, seat_no))
-        self.broadcast()
+        self.broadcast(PUBLIC)
         return True, None
 
     def vacate(self, pid: int, seat_no: int) -> tuple[bool, str | None]:
@@ -307,8 +889,7 @@ class GameRoom:
             player = occ
 
         seat["occupant"] = None
-        if hasattr(player, "seat"):
-            player.seat = None
+        self._unseat(player)
 
         spec = Spectator(id=player.id, name=player.name)
         self.spectators.append(spec)
@@ -318,7 +899,7 @@ class GameRoom:
 
         msg = player_vacated_seat(self.info.gid, player.id, player.name, seat_no)
         self.send_to_storyteller(msg)
-        self.broadcast()
+        self.broadcast(PUBLIC)
         return True, None
 
     # ---------------------------
@@ -328,6 +909,9 @@ class GameRoom:
         """Single entry point for all Game -> Room domain events."""
         t = ev.type
         d = ev.data
+        j = journal.current()
+        if j:
+            j.event(self.info.gid, t, d)
 
         # Night flow to ST
         if t == "NightPrepared":
@@ -348,11 +932,16 @@ class GameRoom:
             )
             self._next_task_id += 1
             self.setup_tasks.append(task)
-            self.send_to_storyteller({"type": "state", "view": view_for_storyteller(self.game, self)})
+            self.broadcast(STORYTELLER)
             # Do I need this one below?
             self._notify_st({"type": "event", "event": "setup_tasks", "tasks": [self._public_task(task)]})
             return
 
+        if t == "GameOver":
+            self.info.status = "finished"
+            self.broadcast(PUBLIC)
+            return
+
         # (Add other event types here as needed...)
 
     # ---------------------------
@@ -376,7 +965,7 @@ class GameRoom:
 
         t.status = TaskStatus.DONE
         self._notify_st({"type": "event", "event": "task_done", "id": t.id})
-        self.broadcast()
+        self.broadcast(GAME)
 
         if not any(x.status == TaskStatus.PENDING for x in self.setup_tasks) and self.game.phase == Phase.SETUP:
             self._notify_st({"type": "event", "event": "setup_complete"})
@@ -395,4 +984,59 @@ class GameRoom:
         }
 
 
-rooms: Dict[str, GameRoom] = {}
+class RoomTable(dict):
+    """
+    gid -> GameRoom, for the rooms resident in this process. With a room store open
+    (botc.store) it is a cache over the store: a gid that isn't resident is hydrated
+    the first time it is looked up, and deleting a room deletes it from the store.
+    Iterating it only ever sees resident rooms.
+    """
+
+    def __missing__(self, gid: str) -> GameRoom:
+        room = self._hydrate(gid)
+        if room is None:
+            raise KeyError(gid)
+        return room
+
+    def get(self, gid: str, default=None):
+        room = super().get(gid)
+        if room is None:
+            room = self._hydrate(gid)
+        return default if room is None else room
+
+    def __contains__(self, gid) -> bool:
+        s = store.current()
+        return super().__contains__(gid) or bool(s and s.exists(gid))
+
+    def __setitem__(self, gid: str, room: GameRoom) -> None:
+        super().__setitem__(gid, room)
+        if store.current():
+            store.current().arm()
+
+    def __delitem__(self, gid: str) -> None:
+        super().__delitem__(gid)
+        if store.current():
+            store.current().forget(gid)
+
+    def close(self, gid: str, reason: str = "room_closed") -> GameRoom:
+        """Shut a room down for good (GameRoom.close) and forget it, here and in the journal."""
+        room = self[gid]
+        room.close(reason=reason)
+        del self[gid]
+        if journal.current():
+            journal.current().drop(gid)
+        return room
+
+    def evict(self, gid: str) -> None:
+        """Drop a room from memory only; it stays in the store."""
+        super().pop(gid, None)
+
+    def _hydrate(self, gid: str) -> GameRoom | None:
+        s = store.current()
+        room = s.load(gid) if s else None
+        if room is not None:
+            super().__setitem__(gid, room)
+        return room
+
+
+rooms: RoomTable = RoomTable()
@@ -0,0 +1,392 @@
+"""
+Front router for a multi-process deployment.
+
+Clients keep talking to one address. The router forwards each request to the worker
+that owns its room (botc.shards): /api/rooms/<gid>/..., /api/lobby/<gid> and every
+/ws/<gid>/... socket go to the gid's shard; creating a room (POST /api/rooms) goes to
+the workers in turn, each of which picks a gid it owns. /api/lobby and /api/metrics
+are gathered from every worker.
+
+Sockets are relayed frame by frame over one upstream connection each, with the client's
+subprotocol offer and ?since= passed through, so the worker negotiates the codec and
+resumes the client as usual. A worker refusing the upgrade (a full admission queue)
+refuses the client with the same status. The router pings clients itself; the worker's
+heartbeat sees the router's connection.
+
+Rooms can be moved between workers while they are played (botc.migration):
+POST /api/admin/rooms/<gid>/move {"to": <shard>} moves one, and
+POST /api/admin/shards/<shard>/drain moves every room off a worker (which then gets no
+new rooms) so it can be restarted. Where moved rooms live is kept in the router's
+Placement, not on disk: restart the router and moved rooms are routed by hash again.
+The admin endpoints are only served given an admin token, and only answer requests
+carrying it in X-Admin-Token.
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import itertools
+import json
+import time
+from typing import Dict, List, Set
+
+import tornado.httpclient
+import tornado.web
+import tornado.websocket
+from tornado.web import url
+
+from botc.request_handlers.base_handler import BaseHandler
+from botc.shards import shard_of
+from botc.ws import heartbeat
+
+# not passed on: they describe one hop, not the message
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "content-encoding",
+               "accept-encoding", "host", "upgrade"}
+
+
+MOVES_AT_ONCE = 8    # rooms a drain moves concurrently
+BUSY_RETRIES = 6     # times a move asks again for a room that didn't go quiet
+# what a fetch still raises with raise_error=False: a timeout, or a worker not listening
+UNREACHABLE = (tornado.httpclient.HTTPClientError, OSError)
+
+
+class Placement:
+    """Which worker serves each room: its gid's shard unless the room has been moved."""
+
+    def __init__(self, workers: List[str], token: str | None = None):
+        self.workers = workers
+        self.token = token
+        self.moved: Dict[str, int] = {}
+        self.draining: Set[int] = set()  # get no new rooms
+        self._turns = itertools.count()
+
+    def shard(self, gid: str) -> int:
+        return self.moved.get(gid, shard_of(gid, len(self.workers)))
+
+    def worker(self, gid: str) -> str:
+        return self.workers[self.shard(gid)]
+
+    def next_worker(self) -> str:
+        """Where the next new room goes: the workers in turn, skipping draining ones."""
+        for _ in range(len(self.workers)):
+            shard = next(self._turns) % len(self.workers)
+            if shard not in self.draining:
+                return self.workers[shard]
+        return self.workers[0]
+
+
+class ForwardHandler(tornado.web.RequestHandler):
+    """Relays a request to the gid's worker (or, without a gid, the next worker) and its reply back."""
+
+    def initialize(self, placement: Placement):
+        self.placement = placement
+
+    def _target(self, gid: str | None) -> str:
+        return self.placement.next_worker() if gid is None else self.placement.worker(gid)
+
+    async def _forward(self, gid: str | None = None):
+        method = self.request.method
+        request = tornado.httpclient.HTTPRequest(
+            f"http://{self._target(gid)}{self.request.uri}",
+            method=method,
+            headers={k: v for k, v in self.request.headers.get_all() if k.lower() not in HOP_HEADERS},
+            body=self.request.body if method in ("POST", "PUT", "PATCH") else None,
+            allow_nonstandard_methods=True,
+            follow_redirects=False,
+        )
+        try:
+            response = await tornado.httpclient.AsyncHTTPClient().fetch(request, raise_error=False)
+        except OSError:
+            response = None
+        if response is None or response.code == 599:
+            self.set_status(502)
+            self.finish({"error": "worker_unavailable"})
+            return
+        self.clear()
+        self.set_status(response.code, response.reason)
+        seen = set()
+        for k, v in response.headers.get_all():
+            if k.lower() in HOP_HEADERS:
+                continue
+            if k in seen:
+                self.add_header(k, v)
+            else:
+                seen.add(k)
+                self.set_header(k, v)
+        if response.body and response.code not in (204, 304):
+            self.write(response.body)
+        self.finish()
+
+    get = post = put = delete = patch = options = _forward
+
+
+class GatherHandler(BaseHandler):
+    """GET on every worker at once, merged into one reply."""
+
+    def initialize(self, placement: Placement):
+        self.workers = placement.workers
+
+    async def _gather(self) -> List[dict]:
+        client = tornado.httpclient.AsyncHTTPClient()
+        responses = await asyncio.gather(
+            *(client.fetch(f"http://{w}{self.request.uri}", raise_error=False) for w in self.workers))
+        return [json.loads(r.body) if r.code == 200 else {"error": r.code} for r in responses]
+
+
+class LobbyHandler(GatherHandler):
+    async def get(self):
+        replies = await self._gather()
+        lobby = [room for reply in replies for room in reply.get("lobby", ())]
+        throttles = [reply.get("throttle", {"level": 0}) for reply in replies]
+        self.write({
+            "lobby": lobby,
+            "throttle": max(throttles, key=lambda t: t.get("level", 0)),  # the most throttled shard
+            "shards": [{"shard": i, "rooms": len(reply.get("lobby", ())), "throttle": t}
+                       for i, (reply, t) in enumerate(zip(replies, throttles))],
+        })
+
+
+class MetricsHandler(GatherHandler):
+    async def get(self):
+        self.write({"shards": await self._gather()})
+
+
+class ForwardSocket(tornado.websocket.WebSocketHandler):
+    """A client socket relayed to the same path on the gid's worker."""
+
+    def initialize(self, placement: Placement):
+        self.placement = placement
+        self.upstream: tornado.websocket.WebSocketClientConnection | None = None
+        self._early: List[str | bytes] = []  # what the worker sent before our own handshake finished
+
+    def check_origin(self, origin):
+        return True  # dev only
+
+    async def get(self, gid: str, *args):
+        offer = self.request.headers.get("Sec-WebSocket-Protocol")
+        worker = self.placement.worker(gid)
+        try:
+            self.upstream = await tornado.websocket.websocket_connect(
+                f"ws://{worker}{self.request.uri}",
+                subprotocols=[p.strip() for p in offer.split(",")] if offer else None,
+                on_message_callback=self._from_worker,
+            )
+        except tornado.httpclient.HTTPClientError as e:
+            self.set_status(e.code)
+            retry = e.response.headers.get("Retry-After") if e.response is not None else None
+            if retry:
+                self.set_header("Retry-After", retry)
+            self.finish()
+            return
+        except OSError:
+            self.set_status(502)
+            self.finish()
+            return
+        await super().get(gid, *args)
+        if self.ws_connection is None:  # the client's handshake failed
+            self.upstream.close()
+
+    def select_subprotocol(self, subprotocols):
+        return self.upstream.selected_subprotocol
+
+    def open(self, *args):
+        early, self._early = self._early, []
+        for msg in early:
+            self._to_client(msg)
+
+    def _from_worker(self, msg):
+        if msg is None:
+            upstream = self.upstream
+            self.close(upstream.close_code if upstream else None, upstream.close_reason if upstream else None)
+        elif self.ws_connection is None:
+            self._early.append(msg)
+        else:
+            self._to_client(msg)
+
+    def _to_client(self, msg):
+        try:
+            self.write_message(msg, binary=isinstance(msg, bytes))
+        except tornado.websocket.WebSocketClosedError:
+            pass  # on_close closes upstream
+
+    def on_message(self, message):
+        self.upstream.write_message(message, binary=isinstance(message, bytes))
+
+    def on_close(self):
+        if self.upstream is not None:
+            self.upstream.close(self.close_code, self.close_reason)
+
+
+def _code(e: Exception) -> int:
+    return getattr(e, "code", 599)  # Tornado's code for a request that got no response
+
+
+async def move(placement: Placement, gid: str, to: int) -> dict:
+    """
+    Move one room to shard `to` (see botc.migration). Returns what happened, with how long
+    the room took no commands for ("frozen_ms"). A worker that can't be reached fails the
+    move like one that refuses it: the source is thawed and keeps the room.
+    """
+    client = tornado.httpclient.AsyncHTTPClient()
+    source = placement.shard(gid)
+    result = {"gid": gid, "from": source, "to": to, "ok": False}
+    if source == to:
+        return {**result, "ok": True, "frozen_ms": 0.0}
+
+    def call(shard: int, action: str, body: bytes = b"", query: str = ""):
+        return client.fetch(
+            f"http://{placement.workers[shard]}/internal/rooms/{gid}/{action}{query}", method="POST", body=body,
+            headers={"X-Cluster-Token": placement.token or ""}, raise_error=False, request_timeout=60)
+
+    async def thaw():
+        try:
+            await call(source, "thaw")
+        except UNREACHABLE:
+            pass  # nothing more to try from here: the room stays frozen until its worker is back
+
+    try:
+        for _ in range(BUSY_RETRIES):
+            exported = await call(source, "export")
+            if exported.code != 409:
+                break
+    except UNREACHABLE as e:
+        await thaw()  # the export may have frozen the room before its answer was lost
+        return {**result, "error": f"export_failed_{_code(e)}"}
+    if exported.code != 200:
+        return {**result, "error": "room_busy" if exported.code == 409 else f"export_failed_{exported.code}"}
+    frozen_at = time.perf_counter()
+    try:
+        imported = await call(to, "import", exported.body)
+    except UNREACHABLE as e:
+        await thaw()
+        return {**result, "error": f"import_failed_{_code(e)}"}
+    if imported.code != 200:
+        await call(source, "thaw")
+        return {**result, "error": f"import_failed_{imported.code}"}
+    before = placement.moved.get(gid)
+    if to == shard_of(gid, len(placement.workers)):
+        placement.moved.pop(gid, None)
+    else:
+        placement.moved[gid] = to
+    try:
+        released = await call(source, "release")
+    except UNREACHABLE as e:
+        # route the room back to its source and let it carry on there
+        if before is None:
+            placement.moved.pop(gid, None)
+        else:
+            placement.moved[gid] = before
+        await thaw()
+        return {**result, "error": f"release_failed_{_code(e)}"}
+    sockets = json.loads(released.body).get("sockets", 0) if released.code == 200 else 0
+    return {**result, "ok": True, "sockets": sockets, "bytes": len(exported.body),
+            "frozen_ms": round((time.perf_counter() - frozen_at) * 1000, 2)}
+
+
+class AdminHandler(BaseHandler):
+    def initialize(self, placement: Placement, admin_token: str):
+        self.placement = placement
+        self.admin_token = admin_token
+
+    def prepare(self):
+        if not hmac.compare_digest(self.request.headers.get("X-Admin-Token", ""), self.admin_token):
+            self.set_status(403)
+            self.finish({"error": "forbidden"})
+
+    def _shard(self, raw) -> int | None:
+        try:
+            shard = int(raw)
+        except (TypeError, ValueError):
+            return None
+        return shard if 0 <= shard < len(self.placement.workers) else None
+
+
+class MoveRoomHandler(AdminHandler):
+    async def post(self, gid: str):
+        body = json.loads(self.request.body or b"{}")
+        to = self._shard(body.get("to"))
+        if to is None:
+            self.set_status(400)
+            self.write({"error": "bad_shard"})
+            return
+        result = await move(self.placement, gid, to)
+        if not result["ok"]:
+            self.set_status(409)
+        self.write(result)
+
+
+class DrainHandler(AdminHandler):
+    async def post(self, raw_shard: str):
+        shard = self._shard(raw_shard)
+        others = [i for i in range(len(self.placement.workers)) if i != shard and i not in self.placement.draining]
+        if shard is None or not others:
+            self.set_status(400)
+            self.write({"error": "bad_shard" if shard is None else "nowhere_to_move"})
+            return
+        self.placement.draining.add(shard)
+        client = tornado.httpclient.AsyncHTTPClient()
+        try:
+            lobbies = await asyncio.gather(*(client.fetch(f"http://{self.placement.workers[i]}/api/lobby")
+                                             for i in [shard] + others))
+        except UNREACHABLE as e:
+            self.placement.draining.discard(shard)
+            self.set_status(502)
+            self.write({"error": f"lobby_failed_{_code(e)}"})
+            return
+        gids = [room["info"]["gid"] for room in json.loads(lobbies[0].body)["lobby"]]
+        load = {i: len(json.loads(r.body)["lobby"]) for i, r in zip(others, lobbies[1:])}
+        targets = []
+        for gid in gids:  # each to the least loaded of the rest
+            to = min(others, key=load.__getitem__)
+            load[to] += 1
+            targets.append(to)
+        limit = asyncio.Semaphore(MOVES_AT_ONCE)
+
+        async def one(gid, to):
+            async with limit:
+                try:
+                    return await move(self.placement, gid, to)
+                except Exception as e:  # one room's failure is reported, not the whole drain's
+                    return {"gid": gid, "from": shard, "to": to, "ok": False, "error": repr(e)}
+
+        results = await asyncio.gather(*(one(g, t) for g, t in zip(gids, targets)))
+        self.write({
+            "shard": shard,
+            "moved": sum(r["ok"] for r in results),
+            "failed": [r for r in results if not r["ok"]],
+            "max_frozen_ms": max((r["frozen_ms"] for r in results if r["ok"]), default=0.0),
+        })
+
+
+class UndrainHandler(AdminHandler):
+    def post(self, raw_shard: str):
+        self.placement.draining.discard(self._shard(raw_shard))
+        self.write({"ok": True})
+
+
+def make_router(workers: List[str], debug: bool = False, token: str | None = None,
+                admin_token: str | None = None) -> tornado.web.Application:
+    """
+    The router app in front of workers listening at `workers` ("host:port", in shard
+    order); `token` is the cluster token the workers were started with, for room moves.
+    The admin endpoints are served only with an admin_token (and a cluster token).
+    """
+    placement = {"placement": Placement(workers, token)}
+    admin = {**placement, "admin_token": admin_token}
+    admin_routes = [
+        url(r"/api/admin/rooms/([^/]+)/move", MoveRoomHandler, admin, name="admin-move"),
+        url(r"/api/admin/shards/([^/]+)/drain", DrainHandler, admin, name="admin-drain"),
+        url(r"/api/admin/shards/([^/]+)/undrain", UndrainHandler, admin, name="admin-undrain"),
+    ] if admin_token and token else []
+    return tornado.web.Application(
+        [
+            url(r"/api/lobby", LobbyHandler, placement, name="lobby"),
+            url(r"/api/metrics", MetricsHandler, placement, name="metrics"),
+            url(r"/api/rooms", ForwardHandler, placement, name="lobby-rooms"),
+            url(r"/api/(?:rooms|lobby)/([^/]+).*", ForwardHandler, placement, name="room"),
+            *admin_routes,
+            url(r"/ws/([^/]+)/.*", ForwardSocket, placement, name="socket"),
+        ],
+        debug=debug,
+        websocket_ping_interval=heartbeat.INTERVAL,  # pong due within the interval
+    )
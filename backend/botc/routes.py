@@ -5,6 +5,8 @@ from botc.request_handlers.join_room_handler import JoinRoomHandler
 from botc.request_handlers.leave_room_handler import LeaveRoomHandler
 from botc.request_handlers.lobby_handler import LobbyHandler
 from botc.request_handlers.lobby_room_handler import LobbyRoomHandler
+from botc.request_handlers.metrics_handler import MetricsHandler
+from botc.request_handlers.migration_handler import MigrationHandler
 from botc.request_handlers.seats_handler import SeatsHandler
 from botc.request_handlers.sit_handler import SitHandler
 from botc.request_handlers.start_game_handler import StartGameHandler
@@ -32,12 +34,21 @@ def http_routes():
         url(r"/api/lobby", LobbyHandler, name="lobby"),
         url(r"/api/lobby/([^/]+)", LobbyRoomHandler, name="lobby-room"),
         url(r"/api/rooms", RoomsHandler, name="lobby-rooms"),
+        url(r"/api/metrics", MetricsHandler, name="metrics"),
 
         # Catch-all room details LAST
         url(r"/api/rooms/([^/]+)", RoomHandler, name="room-details"),
     ]
 
 
+def internal_routes(token: str):
+    """Worker-to-router endpoints of a multi-process deployment (botc.server --workers)."""
+    return [
+        url(r"/internal/rooms/([^/]+)/(export|import|thaw|release)", MigrationHandler, {"token": token},
+            name="room-migration"),
+    ]
+
+
 def ws_routes():
     return [
         (r"/ws/(.+)/st",     StorytellerSocket, {"rooms": rooms}),
@@ -1,21 +1,71 @@
 from __future__ import annotations
-from botc.model import Game, Team, RoleType
+
+from typing import Callable, Dict, List, Optional
+
+from botc.model import Game, Team, DomainEvent
+
+# Triggers fired by Game's mutation API. Win conditions are only evaluated when
+# one of these happens, never by polling.
+DEATH = "death"
+EXECUTION = "execution"
+ROLE_CHANGE = "role_change"
+DAY_END = "day_end"
+
+# condition(game, ctx) -> (winner, reason) once the game is decided, else None
+Condition = Callable[[Game, dict], Optional[tuple]]
+
+
+def forced_winner(g: Game, ctx: dict):
+    if g.force_winner:
+        return g.force_winner, f"{g.force_winner.title()} wins (forced)"
+    return None
+
+
+def demon_dead(g: Game, ctx: dict):
+    if g.demons_alive() == 0:
+        return "GOOD", "Good wins"
+    return None
+
+
+def evil_parity(g: Game, ctx: dict):
+    if g.alive_count(Team.EVIL) >= g.alive_count(Team.GOOD):
+        return "EVIL", "Evil wins"
+    return None
 
 
 class Rules:
-    def check_end(self, g: Game) -> bool:
+    def __init__(self):
+        # trigger -> conditions, checked in order; the first decisive one wins.
+        # Role-specific endings (Saint executed, Mayor's final three, ...) plug in via on().
+        self.triggers: Dict[str, List[Condition]] = {
+            DEATH: [forced_winner, demon_dead, evil_parity],
+            EXECUTION: [forced_winner, demon_dead, evil_parity],
+            ROLE_CHANGE: [demon_dead, evil_parity],
+            DAY_END: [forced_winner],
+        }
 
-        if getattr(g, "force_winner", None):
-            g.log.append(f"{g.force_winner.title()} wins (forced)")
-            return True
+    def on(self, trigger: str, condition: Condition) -> None:
+        self.triggers.setdefault(trigger, []).append(condition)
 
-        demon_alive = any(getattr(p.role, "type", None) == RoleType.DEMON and p.alive for p in g.players)
-        good_alive = sum(1 for p in g.players if getattr(p.role, "team", None) == Team.GOOD and p.alive)
-        evil_alive = sum(1 for p in g.players if getattr(p.role, "team", None) == Team.EVIL and p.alive)
-        if not demon_alive:
-            g.log.append("Good wins")
-            return True
-        if evil_alive >= good_alive:
-            g.log.append("Evil wins")
+    def notify(self, g: Game, trigger: str, **ctx) -> bool:
+        """Evaluate the conditions hooked to trigger; end the game on the first hit."""
+        if g.winner is not None:
             return True
+        for condition in self.triggers.get(trigger, ()):
+            decided = condition(g, ctx)
+            if decided:
+                self._decide(g, *decided)
+                return True
         return False
+
+    def check_end(self, g: Game) -> bool:
+        if g.winner is None and g.force_winner:
+            # force_winner set outside of any trigger (e.g. by a storyteller)
+            self._decide(g, *forced_winner(g, {}))
+        return g.winner is not None
+
+    @staticmethod
+    def _decide(g: Game, winner: str, reason: str) -> None:
+        g.winner = winner
+        g.log.append(reason)
+        g._emit(DomainEvent("GameOver", {"winner": winner, "reason": reason}))
@@ -1,3 +1,4 @@
+import random
 from dataclasses import dataclass
 from typing import List, Type, Dict, Callable
 
@@ -14,6 +15,28 @@ class Script:
     def night_order(self, night: int) -> list[str]:
         return self.first_night if night == 1 else self.other_nights
 
+    def deal(self, player_count: int, rng: random.Random | None = None) -> list[str]:
+        """Draw role ids for player_count players following role_counts (unshuffled, grouped by type)."""
+        rng = rng or random
+        counts = self.role_counts.get(player_count)
+        if not counts:
+            raise ValueError(f"Unsupported player count: {player_count}")
+
+        # Safety checks
+        for k in ("townsfolk", "outsiders", "minions", "demons"):
+            need = counts.get(k, 0)
+            have = len(self.role_groups[k])
+            if need > have:
+                raise ValueError(f"Not enough roles in group '{k}': need {need}, have {have}")
+
+        role_selections = []
+        for k in ("townsfolk", "outsiders", "minions", "demons"):
+            role_selections += rng.sample(self.role_groups[k], counts[k])
+
+        if len(role_selections) != player_count:
+            raise AssertionError("Role deck size does not match player count")
+        return role_selections
+
 
 # registry: role_id -> factory function (to avoid importing every class everywhere)
 ROLE_REGISTRY: Dict[str, Callable[[], object]] = {}
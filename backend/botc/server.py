@@ -1,21 +1,139 @@
 from __future__ import annotations
 
+import argparse
+import gc
+import multiprocessing
+import os
+import secrets
+from typing import Dict, List
+
+import tornado.httpserver
 import tornado.ioloop
+import tornado.netutil
 import tornado.web
 import tornado.websocket
 
-from botc.routes import http_routes, ws_routes
+from botc import journal, shards, store, sweeper
+from botc.routes import http_routes, internal_routes, ws_routes
 
 
-def make_app(debug=True):
+def make_app(debug=True, cluster_token: str | None = None):
+    """The worker app; with a cluster_token it also serves the router's internal endpoints."""
     return tornado.web.Application(
-        http_routes() + ws_routes(),
+        http_routes() + ws_routes() + (internal_routes(cluster_token) if cluster_token else []),
         debug=debug,
     )
 
 
-if __name__ == "__main__":
-    app = make_app()
-    app.listen(8765)
-    print("Server on http://localhost:8765")
+def tune_gc():
+    """
+    Every open socket keeps a few hundred objects alive, so with thousands connected a
+    full collection walks them all and stalls the loop for ~100ms, several times over
+    during a reconnect storm. Move everything loaded at startup out of the collector's
+    sight and collect less eagerly; the server allocates few reference cycles anyway.
+    """
+    gc.collect()
+    gc.freeze()
+    gc.set_threshold(50_000, 50, 1000)
+
+
+def open_journal(path: str) -> None:
+    """Bring back the rooms journaled at `path` and journal from here on (botc.journal)."""
+    from botc.rooms import rooms
+    restored = journal.open_journal(path)
+    rooms.update(restored)
+    print(f"Journal {path}: {len(restored)} rooms restored")
+
+
+def open_store(path: str) -> None:
+    """Keep rooms in the SQLite store at `path`, resident only while in use (botc.store)."""
+    from botc.rooms import rooms
+    s = store.open_store(path, rooms)
+    tornado.ioloop.IOLoop.current().add_callback(s.arm)  # for rooms the journal brought back
+
+
+def run_worker(sockets, shard: int, count: int, token: str | None = None,
+               journal_path: str | None = None, store_path: str | None = None,
+               max_rooms: int | None = None, ttl: Dict[str, float] | None = None) -> None:
+    """One shard's worker, serving on sockets bound (and inherited) from the parent."""
+    shards.configure(shard, count)
+    sweeper.configure(max_rooms, ttl)
+    if store_path:
+        open_store(f"{store_path}.{shard}")
+    if journal_path:
+        open_journal(f"{journal_path}.{shard}")
+    tune_gc()
+    server = tornado.httpserver.HTTPServer(make_app(debug=False, cluster_token=token))
+    server.add_sockets(sockets)
+    tornado.ioloop.IOLoop.current().add_callback(sweeper.sweeper)
     tornado.ioloop.IOLoop.current().start()
+
+
+def start_workers(count: int, port: int = 0, token: str | None = None, journal_path: str | None = None,
+                  store_path: str | None = None, max_rooms: int | None = None,
+                  ttl: Dict[str, float] | None = None) -> tuple[List[multiprocessing.Process], List[str]]:
+    """
+    Start `count` worker processes on 127.0.0.1, on port+1.. (or free ports for port 0),
+    and return them with their "host:port" addresses in shard order. Each listening socket
+    is bound here before the worker starts, so connections queue until it is up. Workers
+    given a token accept room moves from a router holding the same one; given a
+    journal_path, each journals to journal_path.<shard>, and likewise keeps its rooms in
+    store_path.<shard>. max_rooms and ttl apply to each worker (botc.sweeper).
+    """
+    procs, addresses = [], []
+    for shard in range(count):
+        sockets = tornado.netutil.bind_sockets(port + 1 + shard if port else 0, "127.0.0.1")
+        addresses.append(f"127.0.0.1:{sockets[0].getsockname()[1]}")
+        proc = multiprocessing.Process(target=run_worker, name=f"botc-shard-{shard}", daemon=True,
+                                       args=(sockets, shard, count, token, journal_path, store_path,
+                                             max_rooms, ttl))
+        proc.start()
+        for s in sockets:
+            s.close()  # the worker has its own copy
+        procs.append(proc)
+    return procs, addresses
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="BOTC server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, each owning a shard of the rooms, behind a router on --port")
+    parser.add_argument("--journal", metavar="PATH",
+                        help="journal rooms to PATH (PATH.<shard> per worker) and restore them on start")
+    parser.add_argument("--store", metavar="PATH",
+                        help="keep rooms in the SQLite database PATH (PATH.<shard> per worker), "
+                             "in memory only while in use")
+    parser.add_argument("--admin-token", default=os.environ.get("BOTC_ADMIN_TOKEN"),
+                        help="serve the router's admin endpoints (room moves, drains) to requests "
+                             "with this X-Admin-Token (default $BOTC_ADMIN_TOKEN; off when unset)")
+    parser.add_argument("--max-rooms", type=int,
+                        help=f"refuse new rooms past this many per process (default {sweeper.MAX_ROOMS})")
+    parser.add_argument("--ttl", metavar="STATUS=SECONDS", action="append", default=[],
+                        help="close rooms in STATUS (open, In-play, finished) idle this long; repeatable")
+    args = parser.parse_args(argv)
+    ttl = {status: float(seconds) for status, seconds in (t.split("=", 1) for t in args.ttl)}
+
+    if args.workers <= 1:
+        sweeper.configure(args.max_rooms, ttl)
+        if args.store:
+            open_store(args.store)
+        if args.journal:
+            open_journal(args.journal)
+        tune_gc()
+        app = make_app()
+        app.listen(args.port)
+        tornado.ioloop.IOLoop.current().add_callback(sweeper.sweeper)
+        print(f"Server on http://localhost:{args.port}")
+    else:
+        from botc.router import make_router
+        token = secrets.token_hex(16)
+        _, addresses = start_workers(args.workers, args.port, token, args.journal, args.store,
+                                     args.max_rooms, ttl)
+        make_router(addresses, token=token, admin_token=args.admin_token).listen(args.port)
+        print(f"Router on http://localhost:{args.port}, {args.workers} workers on {', '.join(addresses)}")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Which process owns which room.
+
+In a multi-process deployment (python -m botc.server --workers N) each worker process
+owns the rooms whose gid hashes to its shard, and the front router (botc.router) sends
+every request and socket for a gid to that worker. A worker only ever creates gids it
+owns (new_gid). A single-process server is shard 0 of 1 and owns everything.
+"""
+from __future__ import annotations
+
+import uuid
+import zlib
+
+SHARD = 0    # this process's shard
+SHARDS = 1   # how many there are
+
+
+def configure(shard: int, shards: int) -> None:
+    global SHARD, SHARDS
+    if not 0 <= shard < shards:
+        raise ValueError(f"shard {shard} out of range for {shards} shards")
+    SHARD, SHARDS = shard, shards
+
+
+def shard_of(gid: str, shards: int | None = None) -> int:
+    # crc32, not hash(): it has to agree across processes
+    return zlib.crc32(gid.encode()) % (shards or SHARDS)
+
+
+def new_gid() -> str:
+    """A fresh room id owned by this process."""
+    while True:
+        gid = uuid.uuid4().hex[:8]
+        if shard_of(gid) == SHARD:
+            return gid
@@ -0,0 +1,200 @@
+"""
+Headless Monte Carlo runner for complete games.
+
+Plays games end to end on new_game / AutoPrompt / Game.advance() with no sockets
+and no stdin. Every game gets its own seeded RNG, so a (player_count, seed) pair
+always replays the same game. Games are spread over a ProcessPoolExecutor and
+come back as compact GameRecords, which summarize() folds into win rates.
+
+    python -m botc.simulate --games 10000 --players 5-15
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from botc.cli import new_game
+from botc.model import Game, Phase, Team
+from botc.scripts import Script, trouble_brewing_script
+
+MAX_NIGHTS = 20
+MAX_NOMINATIONS = 3
+NOMINATE_CHANCE = 0.8
+GOOD_VOTE_CHANCE = 0.5
+EVIL_VOTE_FOR_GOOD_CHANCE = 0.8
+EVIL_VOTE_FOR_EVIL_CHANCE = 0.1
+SLAY_CHANCE = 0.3
+CHUNK_SIZE = 64
+
+
+@dataclass
+class GameRecord:
+    players: int
+    seed: int
+    roles: Tuple[str, ...]  # role ids in seat order
+    winner: str | None  # "GOOD", "EVIL", or None when MAX_NIGHTS ran out
+    nights: int
+    deaths: Tuple[str, ...]  # role ids of every player dead at the end
+
+
+def play_game(player_count: int, seed: int, script: Script | None = None) -> GameRecord:
+    """Play one complete game headlessly."""
+    rng = random.Random(seed)
+    script = script or trouble_brewing_script()
+    role_names = script.deal(player_count, rng)
+    rng.shuffle(role_names)
+    names = [f"P{i + 1}" for i in range(player_count)]
+    g = new_game(names, script, role_names, rng=rng)
+    roles = tuple(getattr(p.role, "id", None) for p in g.players)
+
+    g.advance()  # SETUP -> NIGHT
+    while g.winner is None and g.night <= MAX_NIGHTS:
+        _run_night(g)
+        g.advance()  # NIGHT -> DAY, dawn deaths resolve here
+        if g.winner is not None:
+            break
+        _run_day(g, rng)
+        g.advance()  # DAY -> VOTING
+        g.advance()  # VOTING -> EXECUTION
+        g.advance()  # EXECUTION -> FINAL_CHECK, the block is executed here
+        if g.rules.check_end(g):
+            break
+        g.advance()  # FINAL_CHECK -> NIGHT
+
+    return GameRecord(
+        players=player_count,
+        seed=seed,
+        roles=roles,
+        winner=g.winner,
+        nights=g.night,
+        deaths=tuple(getattr(p.role, "id", None) for p in g.players if not p.alive),
+    )
+
+
+def _run_night(g: Game) -> None:
+    for entry in g.wake_list:
+        p = g.player(entry["owner"])
+        # roles can change hands mid-night (Scarlet Woman), so check the current holder
+        if p.alive and getattr(p.role, "id", None) == entry["role"]:
+            p.role.on_night(g)
+
+
+def _run_day(g: Game, rng: random.Random) -> None:
+    slayer = g.player_by_role("Slayer")
+    if slayer and slayer.alive and rng.random() < SLAY_CHANCE:
+        others = g.alive_others(slayer.id)
+        if others:
+            slayer.role.slay(g, rng.choice(others).id)
+            if g.winner is not None:
+                return
+
+    for _ in range(MAX_NOMINATIONS):
+        alive = g.alive_players()
+        if len(alive) < 2 or rng.random() > NOMINATE_CHANCE:
+            return
+        nominator, target = rng.sample(alive, 2)
+        g.start_nomination(nominator.id, target.id)
+        if g.current_nomination.closed:  # Virgin fired
+            return
+        target_evil = getattr(target.role, "team", None) == Team.EVIL
+        for voter in g.players:
+            if not (voter.alive or voter.ghost_vote_available):
+                continue
+            if getattr(voter.role, "team", None) == Team.EVIL:
+                chance = EVIL_VOTE_FOR_EVIL_CHANCE if target_evil else EVIL_VOTE_FOR_GOOD_CHANCE
+            else:
+                chance = GOOD_VOTE_CHANCE
+            g.cast_vote(voter.id, rng.random() < chance)
+        g.close_nomination()
+
+
+def _play_chunk(jobs: Sequence[Tuple[int, int]]) -> List[GameRecord]:
+    return [play_game(n, seed) for n, seed in jobs]
+
+
+def simulate(games: int, player_counts: Iterable[int], seed: int = 0,
+             workers: int | None = None) -> Iterator[GameRecord]:
+    """
+    Play `games` games per player count and yield records as they finish.
+    workers=1 plays inline; otherwise games are spread across a process pool.
+    """
+    jobs = [(n, seed + i) for n in player_counts for i in range(games)]
+    chunks = [jobs[i:i + CHUNK_SIZE] for i in range(0, len(jobs), CHUNK_SIZE)]
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _play_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for fut in as_completed([pool.submit(_play_chunk, chunk) for chunk in chunks]):
+            yield from fut.result()
+
+
+def summarize(records: Iterable[GameRecord]) -> Dict[str, Dict]:
+    """Win rates per player count and per role in play, plus death rates per role."""
+    by_count: Dict[int, Counter] = defaultdict(Counter)
+    by_role: Dict[str, Counter] = defaultdict(Counter)
+    for r in records:
+        outcome = r.winner or "UNFINISHED"
+        by_count[r.players][outcome] += 1
+        by_count[r.players]["games"] += 1
+        by_count[r.players]["nights"] += r.nights
+        for role in r.roles:
+            by_role[role][outcome] += 1
+            by_role[role]["games"] += 1
+        for role in r.deaths:
+            by_role[role]["deaths"] += 1
+
+    def rates(c: Counter) -> Dict:
+        n = c["games"]
+        return {
+            "games": n,
+            "good": c["GOOD"] / n,
+            "evil": c["EVIL"] / n,
+            "unfinished": c["UNFINISHED"] / n,
+        }
+
+    return {
+        "players": {
+            k: {**rates(c), "avg_nights": c["nights"] / c["games"]} for k, c in sorted(by_count.items())
+        },
+        "roles": {
+            k: {**rates(c), "death_rate": c["deaths"] / c["games"]} for k, c in sorted(by_role.items())
+        },
+    }
+
+
+def _parse_counts(spec: str) -> List[int]:
+    if "-" in spec:
+        lo, hi = spec.split("-", 1)
+        return list(range(int(lo), int(hi) + 1))
+    return [int(x) for x in spec.split(",")]
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Headless Trouble Brewing simulator")
+    ap.add_argument("--games", type=int, default=1000, help="games per player count")
+    ap.add_argument("--players", default="5-15", help="e.g. 5-15 or 5,7,10")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    args = ap.parse_args(argv)
+
+    stats = summarize(simulate(args.games, _parse_counts(args.players), args.seed, args.workers))
+
+    print(f"{'players':>7}  {'games':>6}  {'good':>6}  {'evil':>6}  {'nights':>6}")
+    for n, s in stats["players"].items():
+        print(f"{n:>7}  {s['games']:>6}  {s['good']:>6.1%}  {s['evil']:>6.1%}  {s['avg_nights']:>6.2f}")
+    print()
+    print(f"{'role':>15}  {'games':>6}  {'good':>6}  {'evil':>6}  {'died':>6}")
+    for role, s in stats["roles"].items():
+        print(f"{role:>15}  {s['games']:>6}  {s['good']:>6.1%}  {s['evil']:>6.1%}  {s['death_rate']:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import tornado.ioloop
+import tornado.websocket
+
+from botc import metrics
+from botc.codec import JSON, negotiate
+from botc.messages import encode
+from botc.migration import MOVED
+from botc.rooms import GameRoom, RoomMoving
+from botc.ws import deflate
+from botc.ws.admission import admission
+from botc.ws.heartbeat import heartbeat
+from botc.ws.throttle import throttle
+
+
+class BaseSocket(tornado.websocket.WebSocketHandler):
+    """
+    Outbound path shared by every room socket.
+
+    Bytes handed to Tornado but not yet written out are tracked per socket. Past
+    HIGH_WATER the socket is congested: the room stops sending it state (each newer
+    state supersedes the last, see GameRoom._send_view) and other frames wait in a
+    bounded queue. Once back under LOW_WATER the queue drains and the room catches
+    the socket up to the newest state in one frame. A socket that stays congested
+    for STALL_TIMEOUT seconds, or overflows its queue, is disconnected.
+
+    Frames are encoded with the codec picked from the client's Sec-WebSocket-Protocol
+    offer (botc.json or botc.pack, see botc.codec); clients offering neither get JSON.
+
+    The upgrade handshake first waits its turn at the server-wide admission gate
+    (botc.ws.admission), so a reconnect storm is let in at a steady rate instead of
+    all at once. ADMIT_FIRST classes wait at the front of the queue.
+
+    Once admitted the socket joins the server-wide heartbeat (botc.ws.heartbeat); one
+    that stops answering pings is reaped: leave_room() unhooks it from its room at once and
+    the connection is closed. Subclasses put their room cleanup in leave_room(), which may
+    run twice (on reaping, then on the close that follows). The first socket also starts
+    the loop-lag throttle (botc.ws.throttle) that rooms consult before sending state.
+
+    Clients reconnecting with ?since=<last version seen> are resumed from there
+    (GameRoom.resume) instead of being sent a full state.
+
+    Clients connecting with ?batch=1 get every frame queued during one loop iteration
+    as a single JSON array frame instead (one write, one mask, one syscall).
+
+    COMPRESSION turns on permessage-deflate for a socket class (None leaves it off):
+    compression_level / mem_level go to zlib, frames shorter than min_size are sent
+    uncompressed, and shared=True compresses each frame on its own (no context takeover)
+    so it is compressed once for every socket of the class (see botc.ws.deflate).
+    """
+    HIGH_WATER = 256 * 1024
+    LOW_WATER = 64 * 1024
+    MAX_QUEUED = 256
+    STALL_TIMEOUT = 30.0
+    COMPRESSION: Optional[Dict] = None
+    ADMIT_FIRST = False
+
+    def initialize(self, rooms: Dict[str, GameRoom]):
+        self.rooms = rooms
+        self.room: Optional[GameRoom] = None
+        self.audience = None  # GameRoom view key this socket follows
+        self.state_version = 0  # last room version this socket was sent
+        self.buffered = 0
+        self.queue: Deque[str] = deque()
+        self.congested_since: Optional[float] = None
+        self.dropped = 0
+        request = getattr(self, "request", None)
+        self.batching = request is not None and self.get_query_argument("batch", "0") == "1"
+        since = self.get_query_argument("since", "") if request is not None else ""
+        self.since = int(since) if since.isdigit() else None  # last version the client saw, for resume
+        self._batch: List[str | bytes] = []
+        self.codec = JSON
+        self._deflater: Optional[deflate.FrameDeflater] = None
+        self._deflate_checked = False
+        self._admit: Optional[asyncio.Future] = None  # our place at the admission gate
+        self._abandoned = False  # the client went away before it was admitted
+
+    def get_compression_options(self):
+        opts = self.COMPRESSION
+        if opts is None:
+            return None
+        return {k: opts[k] for k in ("compression_level", "mem_level") if k in opts}
+
+    def select_subprotocol(self, subprotocols):
+        codec = negotiate(subprotocols)
+        if codec is None:
+            return None
+        self.codec = codec
+        return codec.name
+
+    def check_origin(self, origin):
+        return True  # dev only
+
+    async def get(self, *args, **kwargs):
+        # the upgrade (and open()) only happens once admitted; a full queue gets a plain 503
+        self._admit = admission().acquire(self.ADMIT_FIRST)
+        if not await self._admit:
+            if self._abandoned:
+                return  # nobody left to answer
+            self.set_status(503)
+            self.set_header("Retry-After", "1")
+            self.finish()
+            return
+        heartbeat().add(self)
+        throttle()
+        await super().get(*args, **kwargs)
+
+    async def on_message(self, message):
+        try:
+            msg = self.decode(message)
+            if not isinstance(msg, dict):
+                raise TypeError(f"expected an object, got {type(msg).__name__}")
+            await self.handle(msg)
+        except RoomMoving:
+            # the room is frozen for a move: the client retries once it has reconnected
+            self.send({"type": "error", "error": "room_moving"})
+            self.close(MOVED, "room_moving")
+        except (IndexError, KeyError, TypeError, ValueError) as ex:  # a malformed message or a refused command
+            metrics.inc("sockets.bad_messages")
+            self.send({"type": "error", "error": "bad_message", "detail": str(ex)})
+
+    async def handle(self, msg: dict):
+        """Act on a decoded client message."""
+
+    def on_pong(self, data):
+        heartbeat().pong(self, data)
+
+    def on_close(self):
+        if self._admit is not None and not self._admit.done():
+            self._abandoned = True
+            admission().cancel(self._admit)
+        heartbeat().forget(self)
+        self.leave_room()
+
+    def leave_room(self):
+        """Remove this socket from its room."""
+
+    def reap(self, reason):
+        metrics.inc("sockets.reaped")
+        metrics.inc(f"sockets.{reason}")
+        self.leave_room()
+        self.close(1001, reason)
+
+    @property
+    def congested(self) -> bool:
+        return self.congested_since is not None
+
+    def send(self, obj):
+        self.send_raw(encode(obj, self.codec))
+
+    def decode(self, message):
+        return self.codec.decode(message)
+
+    def send_raw(self, data):
+        """Send an already-encoded frame, shared with other sockets."""
+        if self.batching:
+            if not self._batch:
+                tornado.ioloop.IOLoop.current().add_callback(self._send_batch)
+            self._batch.append(data)
+            return
+        self._send_frame(data)
+
+    def _send_batch(self):
+        if self.room is not None:
+            # fold in the room's pending state broadcast rather than leaving it for the next frame
+            self.room.flush_now()
+        frames, self._batch = self._batch, []
+        try:
+            if len(frames) > 1:
+                metrics.inc("frames.batched", len(frames))
+                self._send_frame(self.codec.join(frames))
+            elif frames:
+                self._send_frame(frames[0])
+        except tornado.websocket.WebSocketClosedError:
+            pass  # closed since the frames were queued; on_close has already unhooked us
+
+    def _send_frame(self, data):
+        if not self.congested:
+            self._write(data)
+        elif len(self.queue) < self.MAX_QUEUED:
+            self.queue.append(data)
+        else:
+            self._give_up("outbound_queue_full")
+
+    def _compressor(self) -> Optional[deflate.FrameDeflater]:
+        # installed on first write: the connection only has its compressor once the handshake is done
+        if not self._deflate_checked and self.ws_connection is not None:
+            self._deflate_checked = True
+            inner = getattr(self.ws_connection, "_compressor", None)
+            if inner is not None:
+                opts = self.COMPRESSION
+                self._deflater = deflate.FrameDeflater(
+                    inner, opts.get("min_size", 0), opts.get("shared", False), deflate.stats_for(type(self).__name__))
+                self.ws_connection._compressor = self._deflater
+        return self._deflater
+
+    def _write(self, data):
+        deflater = self._compressor()
+        if deflater is not None and len(data) < deflater.min_size:
+            # detach the compressor for this one frame: no RSV1 bit, sent as-is
+            deflater.stats.skipped += 1
+            self.ws_connection._compressor = None
+            try:
+                fut = self.write_message(data, binary=isinstance(data, bytes))
+            finally:
+                self.ws_connection._compressor = deflater
+        else:
+            fut = self.write_message(data, binary=isinstance(data, bytes))
+        size = len(data)
+        self.buffered += size
+        fut.add_done_callback(lambda f: self._written(f, size))
+        if self.buffered > self.HIGH_WATER and not self.congested:
+            self.congested_since = time.monotonic()
+            metrics.inc("sockets.congested")
+            tornado.ioloop.IOLoop.current().call_later(
+                self.STALL_TIMEOUT, self._check_stalled, self.congested_since)
+
+    def _written(self, fut, size):
+        if not fut.cancelled():
+            fut.exception()  # a closed stream is handled by on_close; don't log it again
+        self.buffered -= size
+        if not self.congested or self.buffered > self.LOW_WATER:
+            return
+        self.congested_since = None
+        while self.queue and not self.congested:
+            self._write(self.queue.popleft())
+        if not self.congested and self.room is not None:
+            self.room.catch_up(self)
+
+    def _check_stalled(self, since):
+        if self.congested_since == since:
+            self._give_up("send_stalled")
+
+    def _give_up(self, reason):
+        metrics.inc(f"sockets.{reason}")
+        self.queue.clear()
+        self.close(1013, reason)
@@ -1,44 +1,33 @@
-import json
-import tornado
-from typing import Dict, Optional
+from botc.rooms import ROOM
+from botc.socket_handlers.base_socket import BaseSocket
 
-from botc.rooms import GameRoom
-from botc.view import view_for_room
 
-
-class RoomViewerSocket(tornado.websocket.WebSocketHandler):
+class RoomViewerSocket(BaseSocket):
     """Anonymous room view: receives seat map & status updates, no actions."""
-    def initialize(self, rooms: Dict[str, GameRoom]):
-        self.rooms = rooms
-        self.room: Optional[GameRoom] = None
-
-    def check_origin(self, origin):
-        return True
+    # the big audience: every viewer gets the same frames, so compress them once
+    COMPRESSION = {"compression_level": 6, "mem_level": 8, "min_size": 512, "shared": True}
 
     def open(self, gid: str):
         room = self.rooms.get(gid)
         if not room:
-            self.write_message(json.dumps({"type": "error", "error": "room_not_found"}))
+            self.send({"type": "error", "error": "room_not_found"})
             self.close()
             return
         self.room = room
+        self.audience = ROOM
         room.add_room_viewer(self)
-        # send initial state
-        initial = view_for_room(room)
-        self.send({"type": "state", "view": initial})
+        # send initial state, or what was missed since the last connection
+        room.resume(self, self.since)
 
     def on_message(self, message):
         # Read-only; ignore
         try:
-            msg = json.loads(message)
+            msg = self.decode(message)
         except Exception:
             return
-        if msg.get("type") in ("get_state", "ping"):
-            self.send({"type": "state", "view": view_for_room(self.room)})
+        if msg.get("type") in ("get_state", "ping", "resync"):
+            self.room.resync(self, ROOM)
 
-    def on_close(self):
+    def leave_room(self):
         if self.room:
-            self.room.remove_room_viewer(self)
-
-    def send(self, obj):
-        self.write_message(json.dumps(obj))
\ No newline at end of file
+            self.room.remove_room_viewer(self)
\ No newline at end of file
@@ -1,71 +1,47 @@
-import json
-from typing import Dict, Optional
-import tornado
+import tornado.ioloop
 
-from botc.rooms import GameRoom
-from botc.view import view_for_storyteller
+from botc.rooms import STORYTELLER
+from botc.socket_handlers.base_socket import BaseSocket
 
 
-class StorytellerSocket(tornado.websocket.WebSocketHandler):
-    def initialize(self, rooms: Dict[str, GameRoom]):
-        self.rooms = rooms
-        self.room: Optional[GameRoom] = None
-
-    def check_origin(self, origin):
-        return True
+class StorytellerSocket(BaseSocket):
+    # one connection per room: keep context takeover, it compresses successive views better
+    COMPRESSION = {"compression_level": 6, "mem_level": 8, "min_size": 256, "shared": False}
+    ADMIT_FIRST = True  # the room can't play without them
 
     def open(self, gid: str):
         room = self.rooms.get(gid)
         if not room:
-            self.write_message(json.dumps({"type": "error", "error": "room_not_found"}))
+            self.send({"type": "error", "error": "room_not_found"})
             self.close()
             return
         self.room = room
+        self.audience = STORYTELLER
         room.storytellerSocket = self
-        self.send({
-            "type": "state",
-            "view": view_for_storyteller(None, room)
-        })
-
-        room.broadcast()
+        room.storyteller_back()
+        room.resume(self, self.since)
 
-    def on_message(self, message):
-        msg = json.loads(message)
+    async def handle(self, msg: dict):
         if msg.get("type") == "respond":
             cid = int(msg["cid"])
             answer = msg.get("answer")
-            self.room.respond(cid, answer)
+            await self.room.submit(self.room.respond, cid, answer)
+        elif msg.get("type") == "resync":
+            self.room.resync(self, STORYTELLER)
         elif msg.get("type") == "action":
             # (optional) storyteller controls like step-phase, nominate, execute, etc.
-            # For now, we just no-op and rebroadcast.
-            pass
+            if msg.get("action") == "resolve_night":
+                # runs as its own task; prompts it raises are answered via "respond"
+                tornado.ioloop.IOLoop.current().spawn_callback(self.room.resolve_night)
         if msg.get("type") == "command":
-            player_id = msg["task"]["owner_id"]
-            player = self.room.player_by_id(player_id)
-            role = player.role
-            if role and getattr(role, "id", None) == msg["task"]["role"]:
-                role.apply_setup(
-                    task=msg["task"],
-                    selection=msg["task"]["selection"],
-                    game=self.room.game)
+            await self.room.submit(self.room.apply_setup, msg["task"])
 
-        """
-        if msg.get("type") == "perform_task":
-            cid = msg.get("cid")
-            try:
-                ok = self.room.perform_setup_task(task_id=int(msg["id"]), answer=msg.get("answer", {}))
-            except ValueError as e:
-                return self.send(json.dumps({"type": "error", "error": str(e), "cid": cid}))
-            if not ok:
-                return self.send(json.dumps({"type": "error", "error": "invalid_task", "cid": cid}))
-            return
-        """
         #Surely just broadcast to story teller.
         #self.room.broadcast()
 
-    def on_close(self):
+    def leave_room(self):
         if self.room and self.room.storytellerSocket is self:
             self.room.storytellerSocket = None
-
-    def send(self, obj):
-        self.write_message(json.dumps(obj))
\ No newline at end of file
+            # a refresh or a dropped connection is back in a moment; a storyteller who
+            # really left has their prompts settled once the grace period is over
+            self.room.storyteller_gone()
\ No newline at end of file
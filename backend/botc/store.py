@@ -0,0 +1,271 @@
+"""
+SQLite room store: rooms live on disk, and in memory only while they are in use.
+
+python -m botc.server --store PATH keeps every room in a SQLite database (a worker of a
+multi-process deployment gets PATH.<shard>), in two tables:
+
+  rooms   gid, info, seats, spectators, players: the lobby entry (view_for_room), as JSON;
+          status and saved (wall clock), for the sweeper (botc.sweeper)
+  games   gid, snapshot: the whole room, Game included, pickled as for a move (botc.migration)
+
+The rooms table (botc.rooms.rooms) is then a cache over it. A gid that isn't resident is
+hydrated from its snapshot the first time something asks for it; a room left with no
+sockets and no change for IDLE seconds is evicted back to disk. The lobby reads the
+rooms table alone, so listing rooms loads no games.
+
+Writes are write-behind. A timer on the loop looks at the resident rooms every INTERVAL
+seconds and snapshots the ones that changed (GameRoom.changes) since their last save,
+once they are quiet (no prompt or night in flight), then hands them to a writer thread,
+which commits whatever has piled up in one transaction. Until a write lands, load() and
+lobby() read it from the pending set, so an evicted room is never lost between the two.
+A crash loses at most the last INTERVAL of changes; run with --journal as well for more.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from botc import metrics
+from botc.view import view_for_room
+
+INTERVAL = 1.0    # seconds between write-behind passes
+IDLE = 600.0      # seconds without sockets or changes before a room is evicted
+RETRY = 0.5       # seconds before a failed write is retried, doubling up to RETRY_MAX
+RETRY_MAX = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    gid TEXT PRIMARY KEY, info TEXT NOT NULL, seats TEXT NOT NULL,
+    spectators TEXT NOT NULL, players INTEGER NOT NULL, status TEXT NOT NULL, saved REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS games (gid TEXT PRIMARY KEY, snapshot BLOB NOT NULL);
+"""
+
+# a room on its way to disk: its lobby entry, snapshot and when it was taken, or None
+# for a deleted room
+Pending = Tuple[dict, bytes, float] | None
+
+
+class RoomStore:
+    def __init__(self, path: str, resident, interval: float = INTERVAL, idle: float = IDLE):
+        self.path = path
+        self.resident = resident  # the RoomTable this store backs
+        self.interval = interval
+        self.idle = idle
+        self._db = self._connect()  # reads, on the loop thread; the writer has its own
+        self._pending: Dict[str, Pending] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        # per resident room, its GameRoom.changes when last handed to the writer, and
+        # (changes, loop time) when it was last seen changed or with sockets
+        self._saved: Dict[str, int] = {}
+        self._active: Dict[str, Tuple[int, float]] = {}
+        self._handle: asyncio.TimerHandle | None = None
+        self._writer = threading.Thread(target=self._write_behind, name="botc-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    def load(self, gid: str):
+        """The room's latest snapshot, unpickled; None if there is no such room."""
+        with self._lock:
+            waiting = gid in self._pending
+            pending = self._pending.get(gid)
+        if waiting:
+            data = pending[1] if pending else None
+        else:
+            row = self._db.execute("SELECT snapshot FROM games WHERE gid = ?", (gid,)).fetchone()
+            data = row and row[0]
+        if not data:
+            return None
+        room = pickle.loads(data)
+        self._saved[gid] = room.changes
+        metrics.inc("store.hydrated")
+        self.arm()
+        return room
+
+    def exists(self, gid: str) -> bool:
+        with self._lock:
+            if gid in self._pending:
+                return self._pending[gid] is not None
+        return self._db.execute("SELECT 1 FROM rooms WHERE gid = ?", (gid,)).fetchone() is not None
+
+    def lobby(self) -> List[dict]:
+        """Every room's lobby entry: resident rooms as they are now, the rest as last saved."""
+        entries = {gid: {"info": json.loads(info), "seats": json.loads(seats),
+                         "spectators": json.loads(spectators), "players": players}
+                   for gid, info, seats, spectators, players in
+                   self._db.execute("SELECT gid, info, seats, spectators, players FROM rooms ORDER BY rowid")}
+        with self._lock:
+            pending = dict(self._pending)
+        for gid, item in pending.items():
+            if item is None:
+                entries.pop(gid, None)
+            else:
+                entries[gid] = item[0]
+        for gid, room in self.resident.items():
+            entries[gid] = view_for_room(room)
+        return list(entries.values())
+
+    def index(self) -> Dict[str, Tuple[str, float]]:
+        """gid -> (status, when last saved) for every room in the store, resident or not."""
+        rooms = {gid: (status, saved)
+                 for gid, status, saved in self._db.execute("SELECT gid, status, saved FROM rooms")}
+        with self._lock:
+            pending = dict(self._pending)
+        for gid, item in pending.items():
+            if item is None:
+                rooms.pop(gid, None)
+            else:
+                rooms[gid] = (item[0]["info"]["status"], item[2])
+        return rooms
+
+    def count(self) -> int:
+        """How many rooms the store holds, counting resident ones not handed to the writer yet."""
+        with self._lock:
+            pending = dict(self._pending)
+        marks = ", ".join("?" * len(pending))
+        stored = self._db.execute(f"SELECT COUNT(*) FROM rooms WHERE gid NOT IN ({marks})",
+                                  list(pending)).fetchone()[0]
+        stored += sum(item is not None for item in pending.values())
+        unsaved = [gid for gid in self.resident.keys() if gid not in self._saved and gid not in pending]
+        return stored + sum(self._db.execute("SELECT 1 FROM rooms WHERE gid = ?", (gid,)).fetchone() is None
+                            for gid in unsaved)
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def save(self, room) -> None:
+        gid = room.info.gid
+        self._put(gid, (view_for_room(room), pickle.dumps(room, protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+        self._saved[gid] = room.changes
+        metrics.inc("store.snapshots")
+
+    def forget(self, gid: str) -> None:
+        """The room is gone from this process (deleted, or moved to another worker)."""
+        self._saved.pop(gid, None)
+        self._active.pop(gid, None)
+        self._put(gid, None)
+
+    def _put(self, gid: str, item: Pending) -> None:
+        with self._lock:
+            self._pending[gid] = item
+        self._wake.set()
+
+    def _write_behind(self) -> None:
+        db = self._connect()
+        backoff = RETRY
+        while not self._closing or self._pending:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                batch = dict(self._pending)
+            if not batch:
+                continue
+            try:
+                with db:
+                    self._write_batch(db, batch)
+            except sqlite3.Error:
+                metrics.inc("store.errors")
+                if self._closing:
+                    break
+                # the batch stays pending: try again after a pause, whether or not more arrives
+                self._wake.wait(backoff)
+                self._wake.set()
+                backoff = min(backoff * 2, RETRY_MAX)
+                continue
+            backoff = RETRY
+            with self._lock:
+                for gid, item in batch.items():
+                    if gid in self._pending and self._pending[gid] is item:  # not replaced meanwhile
+                        del self._pending[gid]
+            metrics.inc("store.commits")
+            metrics.observe("store.batch_size", len(batch))
+        db.close()
+
+    @staticmethod
+    def _write_batch(db: sqlite3.Connection, batch: Dict[str, Pending]) -> None:
+        for gid, item in batch.items():
+            if item is None:
+                db.execute("DELETE FROM rooms WHERE gid = ?", (gid,))
+                db.execute("DELETE FROM games WHERE gid = ?", (gid,))
+                continue
+            entry, data, saved = item
+            db.execute("INSERT INTO rooms (gid, info, seats, spectators, players, status, saved) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                       "ON CONFLICT(gid) DO UPDATE SET info = excluded.info, seats = excluded.seats, "
+                       "spectators = excluded.spectators, players = excluded.players, "
+                       "status = excluded.status, saved = excluded.saved",
+                       (gid, json.dumps(entry["info"]), json.dumps(entry["seats"]),
+                        json.dumps(entry["spectators"]), entry["players"], entry["info"]["status"], saved))
+            db.execute("INSERT OR REPLACE INTO games (gid, snapshot) VALUES (?, ?)", (gid, data))
+
+    # ---------------------------
+    # Write-behind pass and eviction
+    # ---------------------------
+    def arm(self) -> None:
+        """Make sure the write-behind timer runs (a no-op outside a running loop)."""
+        if self._handle is None and not self._closing:
+            try:
+                self._handle = asyncio.get_running_loop().call_later(self.interval, self.tick)
+            except RuntimeError:
+                pass
+
+    def tick(self) -> None:
+        self._handle = None
+        now = asyncio.get_running_loop().time()
+        for gid, room in list(self.resident.items()):
+            connected = next(room.sockets(), None) is not None
+            seen = self._active.get(gid)
+            if seen is None or seen[0] != room.changes or connected:
+                seen = self._active[gid] = (room.changes, now)
+            if not room.quiet() or room.frozen:
+                continue
+            if self._saved.get(gid) != room.changes:
+                self.save(room)
+            elif not connected and now - seen[1] >= self.idle:
+                self.resident.evict(gid)
+                del self._saved[gid], self._active[gid]
+                metrics.inc("store.evicted")
+        metrics.set_gauge("store.resident", len(self.resident))
+        if self.resident:
+            self.arm()
+
+    def close(self) -> None:
+        """Save what changed, wait for the writer to finish, and close the database."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for room in list(self.resident.values()):
+            if self._saved.get(room.info.gid) != room.changes:
+                self.save(room)
+        self._closing = True
+        self._wake.set()
+        self._writer.join()
+        self._db.close()
+
+
+_store: RoomStore | None = None
+
+
+def open_store(path: str, resident, **kwargs) -> RoomStore:
+    """Make `path` this process's room store, backing the `resident` RoomTable."""
+    global _store
+    _store = RoomStore(path, resident, **kwargs)
+    return _store
+
+
+def current() -> RoomStore | None:
+    return _store
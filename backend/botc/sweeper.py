@@ -0,0 +1,127 @@
+"""
+Room sweeper and capacity governor.
+
+Nothing but an explicit DELETE removes a room, so abandoned ones would pile up. Every
+EVERY seconds the sweeper closes the rooms that have gone TTL[status] seconds without
+activity (GameRoom.close: prompts cancelled, lingering sockets closed) and forgets them,
+in the journal and the store too. Activity is any change to the room, or, while it is
+open or in play, having a socket connected; a finished room only gets TTL["finished"]
+however many spectators are still looking at it. With a store (botc.store), rooms that
+aren't resident expire the same way, timed from when they were last saved.
+
+The governor caps the rooms one process holds (resident or stored) at MAX_ROOMS: past
+it, creating a room is refused with a 503 until the sweeper (or a DELETE) makes room.
+
+Metrics: rooms.<status> gauges, and sweeper.expired.<status> counters.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from typing import Dict, Tuple
+
+from botc import journal, metrics, store
+from botc.rooms import RoomTable, rooms
+
+EVERY = 30.0        # seconds between sweeps
+MAX_ROOMS = 5000    # per process
+# seconds without activity, per RoomInfo.status; statuses not listed get the "open" one
+TTL: Dict[str, float] = {
+    "open": 2 * 3600.0,
+    "In-play": 6 * 3600.0,
+    "finished": 15 * 60.0,
+}
+KEEP_ALIVE = frozenset({"open", "In-play"})  # statuses in which a connected socket counts as activity
+
+
+def configure(max_rooms: int | None = None, ttl: Dict[str, float] | None = None) -> None:
+    global MAX_ROOMS
+    if max_rooms is not None:
+        MAX_ROOMS = max_rooms
+    TTL.update(ttl or {})
+
+
+def ttl_for(status: str) -> float:
+    return TTL.get(status, TTL["open"])
+
+
+def room_count(table: RoomTable = rooms) -> int:
+    s = store.current()
+    return s.count() if s else len(table)
+
+
+def at_capacity(table: RoomTable = rooms) -> bool:
+    return room_count(table) >= MAX_ROOMS
+
+
+class Sweeper:
+    def __init__(self, loop: asyncio.AbstractEventLoop, table: RoomTable = rooms, every: float = EVERY):
+        self._loop = loop
+        self.table = table
+        self.every = every
+        # per resident room, (GameRoom.changes, loop time) when it was last seen active
+        self._seen: Dict[str, Tuple[int, float]] = {}
+        self._handle = loop.call_later(every, self._tick)
+
+    def _tick(self) -> None:
+        try:
+            self.sweep()
+        finally:
+            self._handle = self._loop.call_later(self.every, self._tick)
+
+    def sweep(self) -> int:
+        """Close and forget every expired room; returns how many."""
+        now = self._loop.time()
+        counts: Dict[str, int] = dict.fromkeys(TTL, 0)
+        expired = 0
+        for gid in self._seen.keys() - self.table.keys():
+            del self._seen[gid]  # deleted, moved or evicted to the store meanwhile
+        for gid, room in list(self.table.items()):
+            status = room.info.status
+            connected = status in KEEP_ALIVE and next(room.sockets(), None) is not None
+            seen = self._seen.get(gid)
+            if seen is None or seen[0] != room.changes or connected:
+                seen = self._seen[gid] = (room.changes, now)
+            if not connected and not room.frozen and now - seen[1] >= ttl_for(status):
+                self.table.close(gid, reason="room_expired")
+                del self._seen[gid]
+                self._expired(status)
+                expired += 1
+            else:
+                counts[status] = counts.get(status, 0) + 1
+
+        s = store.current()
+        if s:
+            wall = time.time()
+            for gid, (status, saved) in s.index().items():
+                if gid in self.table.keys():
+                    continue  # resident: counted above
+                if wall - saved >= ttl_for(status):
+                    s.forget(gid)
+                    if journal.current():
+                        journal.current().drop(gid)
+                    self._expired(status)
+                    expired += 1
+                else:
+                    counts[status] = counts.get(status, 0) + 1
+
+        for status, n in counts.items():
+            metrics.set_gauge(f"rooms.{status}", n)
+        return expired
+
+    @staticmethod
+    def _expired(status: str) -> None:
+        metrics.inc(f"sweeper.expired.{status}")
+
+
+_sweepers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Sweeper]" = weakref.WeakKeyDictionary()
+
+
+def sweeper() -> Sweeper:
+    """This loop's sweeper, started on first use."""
+    loop = asyncio.get_running_loop()
+    s = _sweepers.get(loop)
+    if s is None:
+        s = _sweepers[loop] = Sweeper(loop)
+    return s
@@ -37,7 +37,12 @@ def _build_seats(room, include_roles: bool = False, only_role_id=None):
     return seats_view
 
 
-def view_for_room(room):
+def shared_view(room) -> dict:
+    """
+    The part every audience sees identically. Build it once per broadcast and pass it to the
+    view_for_* helpers, which layer their per-audience bits on top without copying it.
+    Nothing may mutate it (or anything reachable from it) afterwards.
+    """
     return {
         "info": asdict(room.info),
         "seats": _build_seats(room, include_roles=False),
@@ -46,14 +51,29 @@ def view_for_room(room):
     }
 
 
-def view_for_player(game: Game, player_id: int, room) -> dict:
-    # start from scratch so we can override seats
-    base = {
-        "info": asdict(room.info),
-        "spectators": [{"id": s.id, "name": s.name} for s in room.spectators],
-        "players": len(room.players),
-        "seats": _build_seats(room, include_roles=False, only_role_id=player_id)
-    }
+def _with_own_role(seats_view, room, player_id):
+    """Shared seats with only the player's own seat swapped for a copy carrying their role."""
+    for i, s in enumerate(room.seats):
+        occ = s["occupant"]
+        if occ is not None and occ.id == player_id:
+            role_obj = getattr(occ, "role", None)
+            own = dict(seats_view[i]["occupant"])
+            own["role"] = None if role_obj is None else {"id": getattr(role_obj, "id", None)}
+            seats_view = list(seats_view)
+            seats_view[i] = {"seat": s["seat"], "occupant": own}
+            break
+    return seats_view
+
+
+def view_for_room(room, shared=None):
+    return shared if shared is not None else shared_view(room)
+
+
+def view_for_player(game: Game, player_id: int, room, shared=None) -> dict:
+    shared = shared if shared is not None else shared_view(room)
+    # shallow copy: only seats is overridden, and only the player's own entry in it
+    base = dict(shared)
+    base["seats"] = _with_own_role(shared["seats"], room, player_id)
 
     if game:
         you = next((p for p in game.players if p.id == player_id), None)
@@ -129,13 +149,11 @@ def _add_info_tokens(base_view: dict, game: Game, room) -> None:
                     print(attribute)
 
 
-def view_for_storyteller(game: Game, room=None) -> dict:
-    base = {
-        "info": asdict(room.info),
-        "seats": _build_seats(room, include_roles=True),
-        "spectators": [{"id": s.id, "name": s.name} for s in room.spectators],
-        "players": len(room.players)
-    }
+def view_for_storyteller(game: Game, room=None, shared=None) -> dict:
+    shared = shared if shared is not None else shared_view(room)
+    # own seats: every role is shown and _add_info_tokens writes into them
+    base = dict(shared)
+    base["seats"] = _build_seats(room, include_roles=True)
     if game:
         base["phase"] = game.phase.name
         base["night"] = game.night
@@ -0,0 +1,111 @@
+"""
+Server-wide admission for new socket connections.
+
+After a restart or a Wi-Fi blip every client reconnects at once. Rather than letting
+them all open (and build and send their first state) in the same few loop iterations,
+each socket's upgrade handshake waits here for a token (BaseSocket.get). Tokens refill at RATE per second up to
+BURST, so a quiet server admits straight away; in a storm the rest queue up in arrival
+order and are let through a few per loop iteration. Storytellers have a queue of their
+own, let through (in their own arrival order) ahead of everyone else, since their room
+is unplayable without them. A client that disconnects while it waits gives up its place
+(cancel), so no token is spent on a dead handshake.
+
+Past MAX_PENDING waiting connections new ones are refused with a 503 and Retry-After
+rather than queueing without bound.
+"""
+from __future__ import annotations
+
+import asyncio
+import weakref
+from collections import deque
+from typing import Deque
+
+from botc import metrics
+
+RATE = 500.0       # connections admitted per second once the burst is spent
+BURST = 20         # admitted at once when tokens have built up
+MAX_PENDING = 5000
+
+
+class Admission:
+    """Token bucket plus FIFOs of waiting opens (storytellers', everyone else's), for one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, rate: float = RATE, burst: int = BURST,
+                 max_pending: int = MAX_PENDING):
+        self._loop = loop
+        self.rate = rate
+        self.burst = burst
+        self.max_pending = max_pending
+        self._tokens = float(burst)
+        self._stamp = loop.time()
+        self._priority: Deque[asyncio.Future] = deque()
+        self._waiting: Deque[asyncio.Future] = deque()
+        self._handle: asyncio.TimerHandle | None = None
+
+    def pending(self) -> int:
+        return len(self._priority) + len(self._waiting)
+
+    def _refill(self) -> None:
+        now = self._loop.time()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, priority: bool = False) -> asyncio.Future:
+        """Future resolving to True once admitted, or False if the queue is full."""
+        fut = self._loop.create_future()
+        self._refill()
+        if not self.pending() and self._tokens >= 1:
+            self._tokens -= 1
+            metrics.inc("admission.immediate")
+            fut.set_result(True)
+            return fut
+        if self.pending() >= self.max_pending:
+            metrics.inc("admission.rejected")
+            fut.set_result(False)
+            return fut
+        metrics.inc("admission.queued")
+        (self._priority if priority else self._waiting).append(fut)
+        metrics.set_gauge("admission.pending", self.pending())
+        self._arm()
+        return fut
+
+    def cancel(self, fut: asyncio.Future) -> None:
+        """The client went away while it waited: resolve it False and give up its place."""
+        if fut.done():
+            return
+        fut.set_result(False)
+        for queue in (self._priority, self._waiting):
+            try:
+                queue.remove(fut)
+                break
+            except ValueError:
+                pass
+        metrics.inc("admission.abandoned")
+        metrics.set_gauge("admission.pending", self.pending())
+
+    def _arm(self) -> None:
+        if self._handle is None and self.pending():
+            # wait for the next whole token, but never less than a loop iteration
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            self._handle = self._loop.call_later(delay, self._drain)
+
+    def _drain(self) -> None:
+        self._handle = None
+        self._refill()
+        while self.pending() and self._tokens >= 1:
+            fut = (self._priority or self._waiting).popleft()
+            self._tokens -= 1
+            fut.set_result(True)
+        metrics.set_gauge("admission.pending", self.pending())
+        self._arm()
+
+
+_gates: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Admission]" = weakref.WeakKeyDictionary()
+
+
+def admission() -> Admission:
+    loop = asyncio.get_running_loop()
+    gate = _gates.get(loop)
+    if gate is None:
+        gate = _gates[loop] = Admission(loop, RATE, BURST, MAX_PENDING)
+    return gate
@@ -0,0 +1,108 @@
+"""
+permessage-deflate for room sockets, tuned per socket class.
+
+Tornado compresses every outgoing message on its own per-connection compressor. We
+swap that compressor for a FrameDeflater, which:
+
+  * in shared mode compresses every frame from a fresh compressor, i.e. without
+    context takeover. RFC 7692 lets a server do that unilaterally (a client keeping
+    context just never sees back-references into earlier messages), and it makes the
+    output depend only on the frame, so each distinct frame is compressed once for
+    every socket of the class through a small shared LRU;
+  * keeps per-class stats: frames, bytes in/out, CPU time, cache hits, and frames
+    left uncompressed because they were under the class's min_size.
+
+Skipping compression for small frames happens in BaseSocket._write, which writes
+them with the compressor detached (no RSV1 bit, so the client reads them as plain).
+"""
+from __future__ import annotations
+
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+CACHE_SIZE = 256  # compressed frames kept for reuse across sockets
+
+
+@dataclass
+class DeflateStats:
+    frames: int = 0
+    skipped: int = 0      # under min_size, sent uncompressed
+    cache_hits: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    cpu_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "cache_hits": self.cache_hits,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+            "cpu_ms": round(self.cpu_seconds * 1000, 3),
+        }
+
+
+_stats: Dict[str, DeflateStats] = {}
+_cache: "OrderedDict[Tuple[int, int, int, bytes], bytes]" = OrderedDict()
+
+
+def stats_for(name: str) -> DeflateStats:
+    s = _stats.get(name)
+    if s is None:
+        s = _stats[name] = DeflateStats()
+    return s
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    return {name: s.as_dict() for name, s in _stats.items()}
+
+
+def reset() -> None:
+    _stats.clear()
+    _cache.clear()
+
+
+class FrameDeflater:
+    """Drop-in for tornado's _PerMessageDeflateCompressor (only compress() is called)."""
+
+    def __init__(self, inner, min_size: int, shared: bool, stats: DeflateStats):
+        self._inner = inner
+        self.min_size = min_size
+        self.shared = shared
+        self.stats = stats
+        # the settings tornado negotiated; the window must not exceed what the client agreed to
+        self._key = (getattr(inner, "_compression_level", 6), getattr(inner, "_mem_level", 8),
+                     getattr(inner, "_max_wbits", zlib.MAX_WBITS))
+
+    def _compress_alone(self, data: bytes) -> bytes:
+        level, mem_level, wbits = self._key
+        c = zlib.compressobj(level, zlib.DEFLATED, -wbits, mem_level)
+        return (c.compress(data) + c.flush(zlib.Z_SYNC_FLUSH))[:-4]  # strip the 00 00 ff ff tail
+
+    def compress(self, data: bytes) -> bytes:
+        st = self.stats
+        st.frames += 1
+        st.bytes_in += len(data)
+        if self.shared:
+            key = self._key + (data,)
+            out = _cache.get(key)
+            if out is not None:
+                _cache.move_to_end(key)
+                st.cache_hits += 1
+                st.bytes_out += len(out)
+                return out
+        started = time.process_time()
+        out = self._compress_alone(data) if self.shared else self._inner.compress(data)
+        st.cpu_seconds += time.process_time() - started
+        st.bytes_out += len(out)
+        if self.shared:
+            _cache[key] = out
+            if len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return out
+
@@ -0,0 +1,103 @@
+"""
+Server-wide websocket heartbeat.
+
+One timer per loop drives a timing wheel: sockets are spread round-robin over
+INTERVAL / TICK slots and each tick pings the sockets of one slot, so every socket is
+pinged once per INTERVAL without a timer per socket and without pinging thousands at
+once. The ping carries the loop time it was sent at, which the pong echoes back, so
+on_pong yields the round trip.
+
+A socket not heard from (no pong) for TIMEOUT is reaped: unhooked from its room
+straight away and closed, rather than lingering half-open until a broadcast to it
+happens to fail.
+"""
+from __future__ import annotations
+
+import asyncio
+import struct
+import weakref
+from typing import List
+
+import tornado.websocket
+
+from botc import metrics
+
+INTERVAL = 20.0  # seconds between pings to the same socket
+TIMEOUT = 45.0   # reaped after this long without a pong (two pings missed)
+TICK = 1.0       # the wheel advances once a second
+
+
+class Heartbeat:
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float = INTERVAL,
+                 timeout: float = TIMEOUT, tick: float = TICK):
+        self._loop = loop
+        self.timeout = timeout
+        self.tick = tick
+        # weak: a socket whose handshake never completed has no on_close to remove it
+        self._slots: List[weakref.WeakSet] = [weakref.WeakSet() for _ in range(max(1, round(interval / tick)))]
+        self._next = 0
+        self._cursor = 0
+        self._handle: asyncio.TimerHandle | None = None
+
+    def __len__(self):
+        return sum(len(s) for s in self._slots)
+
+    def add(self, sock) -> None:
+        sock.last_seen = self._loop.time()
+        slot = self._slots[self._next]
+        self._next = (self._next + 1) % len(self._slots)
+        slot.add(sock)
+        sock.heartbeat_slot = slot
+        if self._handle is None:
+            self._handle = self._loop.call_later(self.tick, self._tick)
+
+    def forget(self, sock) -> None:
+        slot = getattr(sock, "heartbeat_slot", None)
+        if slot is not None:
+            slot.discard(sock)
+
+    def pong(self, sock, data: bytes) -> None:
+        now = self._loop.time()
+        sock.last_seen = now
+        if len(data) == 8:
+            metrics.observe("heartbeat.rtt_ms", (now - struct.unpack(">d", data)[0]) * 1000)
+
+    def _tick(self) -> None:
+        self._handle = None
+        try:
+            self._ping_slot()
+        finally:
+            total = len(self)
+            metrics.set_gauge("heartbeat.sockets", total)
+            if total:
+                self._handle = self._loop.call_later(self.tick, self._tick)
+
+    def _ping_slot(self) -> None:
+        now = self._loop.time()
+        slot = self._slots[self._cursor]
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        stamp = struct.pack(">d", now)
+        for sock in list(slot):
+            if sock.ws_connection is None:
+                continue  # still handshaking, or closed and about to be forgotten
+            if now - sock.last_seen > self.timeout:
+                slot.discard(sock)
+                sock.reap("heartbeat_timeout")
+                continue
+            try:
+                sock.ping(stamp)
+            except tornado.websocket.WebSocketClosedError:
+                slot.discard(sock)  # closing: its on_close unhooks it from the room
+                continue
+            metrics.inc("heartbeat.pings")
+
+
+_wheels: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Heartbeat]" = weakref.WeakKeyDictionary()
+
+
+def heartbeat() -> Heartbeat:
+    loop = asyncio.get_running_loop()
+    wheel = _wheels.get(loop)
+    if wheel is None:
+        wheel = _wheels[loop] = Heartbeat(loop, INTERVAL, TIMEOUT, TICK)
+    return wheel
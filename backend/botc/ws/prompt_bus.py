@@ -1,28 +1,149 @@
 from __future__ import annotations
 import asyncio
-from typing import Any, Dict
+import heapq
+import itertools
+import weakref
+from typing import Any, Dict, List, Tuple
+
+from botc import metrics
+from botc.prompt import PromptExpired
+
+# wait_for(default=EXPIRE): the future fails with PromptExpired instead of resolving
+EXPIRE = object()
+
+
+class DeadlineScheduler:
+    """
+    One timer for every prompt deadline on a loop: a heap of (when, seq, bus, cid, fut)
+    and a single call_at handle armed for the earliest entry. Fulfilled prompts are
+    dropped lazily when they surface, or in bulk once they outnumber live ones.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._heap: List[Tuple[float, int, "PromptBus", int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._handle: asyncio.TimerHandle | None = None
+        self._armed_for: float | None = None
+        self._compact_at = 64
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, delay: float, bus: "PromptBus", cid: int, fut: asyncio.Future) -> None:
+        when = self._loop.time() + delay
+        heapq.heappush(self._heap, (when, next(self._seq), bus, cid, fut))
+        if self._armed_for is None or when < self._armed_for:
+            self._arm(when)
+        self._maybe_compact()
+
+    def _arm(self, when: float) -> None:
+        if self._handle:
+            self._handle.cancel()
+        self._handle = self._loop.call_at(when, self._fire)
+        self._armed_for = when
+
+    def _fire(self) -> None:
+        self._handle = None
+        self._armed_for = None
+        now = self._loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, bus, cid, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                bus.expire(cid, fut)
+        while self._heap and self._heap[0][4].done():
+            heapq.heappop(self._heap)
+        if self._heap:
+            self._arm(self._heap[0][0])
+
+    def _maybe_compact(self) -> None:
+        # amortised: only rescan once the heap has doubled since the last compaction
+        if len(self._heap) < self._compact_at:
+            return
+        self._heap = [e for e in self._heap if not e[4].done()]
+        heapq.heapify(self._heap)
+        self._compact_at = max(64, 2 * len(self._heap))
+
+
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, DeadlineScheduler]" = weakref.WeakKeyDictionary()
+
+
+def deadline_scheduler() -> DeadlineScheduler:
+    loop = asyncio.get_running_loop()
+    sched = _schedulers.get(loop)
+    if sched is None:
+        sched = _schedulers[loop] = DeadlineScheduler(loop)
+    return sched
 
 
 class PromptBus:
-    def __init__(self):
+    def __init__(self, default_timeout: float | None = None):
         self._next_cid = 1
         self._waiters: Dict[int, asyncio.Future] = {}
+        self._defaults: Dict[int, Any] = {}
+        self.default_timeout = default_timeout
+        self.expired = 0
+        self.orphaned = 0
 
     def new_cid(self) -> int:
         cid = self._next_cid
         self._next_cid += 1
         return cid
 
-    def wait_for(self, cid: int) -> asyncio.Future:
-        fut = asyncio.get_event_loop().create_future()
+    def pending(self) -> int:
+        return len(self._waiters)
+
+    def wait_for(self, cid: int, timeout: float | None = None, default: Any = EXPIRE) -> asyncio.Future:
+        """
+        Future for the answer to cid. After `timeout` seconds (default_timeout when None)
+        it resolves to `default`, or fails with PromptExpired if no default was given.
+        """
+        fut = asyncio.get_running_loop().create_future()
         self._waiters[cid] = fut
+        self._defaults[cid] = default
+        # covers the awaiting task being cancelled, which cancels fut behind our back
+        fut.add_done_callback(lambda f, cid=cid: self._forget(cid, f))
+        timeout = self.default_timeout if timeout is None else timeout
+        if timeout is not None:
+            deadline_scheduler().add(timeout, self, cid, fut)
         return fut
 
     def fulfill(self, cid: int, value: Any):
         fut = self._waiters.pop(cid, None)
+        self._defaults.pop(cid, None)
         if fut and not fut.done():
             fut.set_result(value)
 
+    def expire(self, cid: int, fut: asyncio.Future | None = None) -> None:
+        """Deadline reached: answer with the prompt's default or fail it."""
+        if fut is not None and self._waiters.get(cid) is not fut:
+            return
+        if self._settle(cid):
+            self.expired += 1
+            metrics.inc("prompts.expired")
+
+    def orphan_all(self) -> int:
+        """Storyteller gone: settle every pending prompt now rather than waiting for deadlines."""
+        n = sum(1 for cid in list(self._waiters) if self._settle(cid))
+        self.orphaned += n
+        metrics.inc("prompts.orphaned", n)
+        return n
+
+    def _forget(self, cid: int, fut: asyncio.Future) -> None:
+        if self._waiters.get(cid) is fut:
+            del self._waiters[cid]
+            self._defaults.pop(cid, None)
+
+    def _settle(self, cid: int) -> bool:
+        fut = self._waiters.pop(cid, None)
+        default = self._defaults.pop(cid, EXPIRE)
+        if not fut or fut.done():
+            return False
+        if default is EXPIRE:
+            fut.set_exception(PromptExpired(cid))
+        else:
+            fut.set_result(default)
+        return True
+
     def cancel_all(self, exc: Exception | None = None):
         for cid, fut in list(self._waiters.items()):
             if not fut.done():
@@ -31,3 +152,4 @@ class PromptBus:
                 else:
                     fut.cancel()
             self._waiters.pop(cid, None)
+        self._defaults.clear()
@@ -0,0 +1,99 @@
+"""
+Server-wide state throttle driven by event-loop lag.
+
+A probe timer measures how late the loop runs it (its lag), smoothed over a few
+samples. As the lag crosses the LEVELS thresholds the throttle steps up and rooms send
+state less often to audiences that only need the latest picture: room viewers first,
+then, at the top level, players' views when only public parts (seats, spectators)
+changed. What they skip is never replayed; the next state they get is the newest.
+Storyteller traffic, events and anything private to a player go out unthrottled.
+
+The level steps back down once the lag falls below HYSTERESIS times the threshold that
+raised it, so it doesn't flap around a threshold.
+"""
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Dict
+
+from botc import metrics
+
+PROBE = 0.1        # seconds between lag samples
+SMOOTHING = 0.3    # weight of the newest sample in the smoothed lag
+HYSTERESIS = 0.5
+# per level: (smoothed lag in ms that turns it on,
+#             min seconds between states to room viewers, to players' public-only changes)
+LEVELS = (
+    (50.0, 0.5, 0.0),
+    (150.0, 1.0, 0.0),
+    (400.0, 2.0, 1.0),
+)
+
+
+class Throttle:
+    def __init__(self, loop: asyncio.AbstractEventLoop, probe: float = PROBE, levels=LEVELS):
+        self._loop = loop
+        self.probe = probe
+        self.levels = levels
+        self.level = 0
+        self.lag_ms = 0.0
+        self._due = loop.time() + probe
+        self._handle = loop.call_later(probe, self._sample)
+
+    def _sample(self) -> None:
+        now = self._loop.time()
+        lag = max(0.0, now - self._due) * 1000
+        self.lag_ms += SMOOTHING * (lag - self.lag_ms)
+        self._set_level()
+        self._due = now + self.probe
+        self._handle = self._loop.call_later(self.probe, self._sample)
+
+    def _set_level(self) -> None:
+        level = self.level
+        while level < len(self.levels) and self.lag_ms >= self.levels[level][0]:
+            level += 1
+        while level and self.lag_ms < self.levels[level - 1][0] * HYSTERESIS:
+            level -= 1
+        if level != self.level:
+            metrics.inc("throttle.raised" if level > self.level else "throttle.lowered")
+            self.level = level
+        metrics.set_gauge("throttle.level", level)
+        metrics.set_gauge("loop.lag_ms", round(self.lag_ms, 3))
+
+    def viewer_interval(self) -> float:
+        return self.levels[self.level - 1][1] if self.level else 0.0
+
+    def player_interval(self) -> float:
+        return self.levels[self.level - 1][2] if self.level else 0.0
+
+    def stop(self) -> None:
+        self._handle.cancel()
+
+    def status(self) -> Dict[str, float]:
+        return {
+            "level": self.level,
+            "lag_ms": round(self.lag_ms, 3),
+            "viewer_interval": self.viewer_interval(),
+            "player_interval": self.player_interval(),
+        }
+
+
+_throttles: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Throttle]" = weakref.WeakKeyDictionary()
+
+
+def throttle() -> Throttle:
+    """The running loop's throttle, started on first use."""
+    loop = asyncio.get_running_loop()
+    t = _throttles.get(loop)
+    if t is None:
+        t = _throttles[loop] = Throttle(loop, PROBE, LEVELS)
+    return t
+
+
+def current() -> Throttle | None:
+    """The running loop's throttle if one has been started (none outside a loop)."""
+    try:
+        return _throttles.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
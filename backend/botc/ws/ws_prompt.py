@@ -1,21 +1,26 @@
 from __future__ import annotations
 
-import asyncio
-from typing import Sequence
-from botc.prompt import Prompt
-from botc.ws.prompt_bus import PromptBus
+from typing import Any, Dict, Sequence
+from botc.prompt import AsyncPrompt, PromptExpired
+from botc.ws.prompt_bus import EXPIRE, PromptBus
 
-class WsPrompt(Prompt):
+class WsPrompt(AsyncPrompt):
     """Sends prompts to the room's storyteller socket and awaits a reply."""
-    def __init__(self, send_func, bus: PromptBus):
+    def __init__(self, send_func, bus: PromptBus, timeout: float | None = None,
+                 defaults: Dict[str, Any] | None = None):
         """
         send_func(payload: dict) -> None  # sends to storyteller socket
         bus: shared PromptBus instance
+        timeout: seconds before an unanswered prompt expires (bus default when None)
+        defaults: prompt kind -> answer used on expiry; kinds not listed raise PromptExpired
         """
         self._send = send_func
         self._bus = bus
+        self._timeout = timeout
+        self._defaults = defaults or {}
 
-    async def _ask(self, requester_pid: int, kind: str, title: str, candidates: Sequence[int] | None = None):
+    async def _ask(self, requester_pid: int, kind: str, title: str, candidates: Sequence[int] | None = None,
+                   timeout: float | None = None, default: Any = EXPIRE):
         cid = self._bus.new_cid()
         payload = {
             "type": "prompt",
@@ -26,22 +31,28 @@ class WsPrompt(Prompt):
         }
         if candidates is not None:
             payload["candidates"] = list(candidates)
+        if default is EXPIRE:
+            default = self._defaults.get(kind, EXPIRE)
+        # register before sending so a fast reply is never lost
+        fut = self._bus.wait_for(cid, self._timeout if timeout is None else timeout, default)
         self._send(payload)
-        answer = await self._bus.wait_for(cid)
-        return answer
+        try:
+            return await fut
+        except PromptExpired:
+            self._send({"type": "prompt_expired", "cid": cid})
+            raise
 
-    # Adapter methods for your Sync Prompt Protocol – provide sync wrappers
-    def choose_one(self, requester_pid: int, candidates: Sequence[int], title: str) -> int | None:
-        return asyncio.get_event_loop().run_until_complete(
-            self._ask(requester_pid, "choose_one", title, candidates)
-        )
+    # Native AsyncPrompt protocol: each call parks on a PromptBus future, so the
+    # IOLoop keeps serving every other room while the storyteller decides.
+    async def choose_one(self, requester_pid: int, candidates: Sequence[int], title: str, *,
+                         timeout: float | None = None, default: Any = EXPIRE) -> int | None:
+        return await self._ask(requester_pid, "choose_one", title, candidates, timeout, default)
 
-    def choose_two(self, requester_pid: int, candidates: Sequence[int], title: str):
-        return asyncio.get_event_loop().run_until_complete(
-            self._ask(requester_pid, "choose_two", title, candidates)
-        )
+    async def choose_two(self, requester_pid: int, candidates: Sequence[int], title: str, *,
+                         timeout: float | None = None, default: Any = EXPIRE):
+        answer = await self._ask(requester_pid, "choose_two", title, candidates, timeout, default)
+        return tuple(answer) if answer else None
 
-    def confirm(self, requester_pid: int, title: str) -> bool:
-        return asyncio.get_event_loop().run_until_complete(
-            self._ask(requester_pid, "confirm", title)
-        )
+    async def confirm(self, requester_pid: int, title: str, *,
+                      timeout: float | None = None, default: Any = EXPIRE) -> bool:
+        return bool(await self._ask(requester_pid, "confirm", title, None, timeout, default))
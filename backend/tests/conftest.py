@@ -0,0 +1,19 @@
+import pytest
+
+from botc.model import Game, Player
+from botc.scripts import trouble_brewing_script
+
+
+@pytest.fixture
+def make_game():
+    """Builds a Trouble Brewing game with one player per role class, seated in order (or at `seats`)."""
+    def build(role_classes, seats=None, rules=None, phase=None):
+        seats = seats or list(range(1, len(role_classes) + 1))
+        players = [Player(id=i + 1, name=f"P{i + 1}", seat=s) for i, s in enumerate(seats)]
+        g = Game(slots=[p.id for p in players], players=players, script=trouble_brewing_script(), rules=rules)
+        for p, cls in zip(players, role_classes):
+            g.assign_role(p.id, cls())
+        if phase is not None:
+            g.phase = phase
+        return g
+    return build
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+import tornado.httpclient
+import tornado.httpserver
+import tornado.testing
+import tornado.websocket
+
+from botc.rooms import GameRoom, rooms
+from botc.scripts import trouble_brewing_script
+from botc.server import make_app
+from botc.ws import admission
+from botc.ws.admission import Admission
+
+
+def test_burst_is_admitted_at_once_and_the_rest_queue_in_order():
+    async def scenario():
+        gate = Admission(asyncio.get_running_loop(), rate=1000, burst=2, max_pending=10)
+        order = []
+        futs = [gate.acquire() for _ in range(5)]
+        for i, f in enumerate(futs):
+            f.add_done_callback(lambda f, i=i: order.append(i))
+        immediate = sum(f.done() for f in futs)
+        results = await asyncio.gather(*futs)
+        return immediate, results, order, gate.pending()
+
+    immediate, results, order, pending = asyncio.run(scenario())
+    assert immediate == 2
+    assert results == [True] * 5 and order == [0, 1, 2, 3, 4] and pending == 0
+
+
+def test_storyteller_jumps_the_queue_and_overflow_is_refused():
+    async def scenario():
+        gate = Admission(asyncio.get_running_loop(), rate=1000, burst=1, max_pending=2)
+        first = gate.acquire()
+        waiting = gate.acquire()
+        st = gate.acquire(priority=True)
+        refused = gate.acquire()
+        order = []
+        for name, f in (("player", waiting), ("st", st)):
+            f.add_done_callback(lambda f, name=name: order.append(name))
+        await asyncio.gather(waiting, st)
+        return first.result(), refused.result(), order
+
+    first, refused, order = asyncio.run(scenario())
+    assert first is True and refused is False
+    assert order == ["st", "player"]
+
+
+def test_storytellers_are_admitted_in_their_own_arrival_order():
+    async def scenario():
+        gate = Admission(asyncio.get_running_loop(), rate=1000, burst=1, max_pending=10)
+        gate.acquire()
+        order = []
+        futs = [gate.acquire(), gate.acquire(priority=True), gate.acquire(priority=True)]
+        for name, f in zip(("player", "st1", "st2"), futs):
+            f.add_done_callback(lambda f, name=name: order.append(name))
+        await asyncio.gather(*futs)
+        return order
+
+    assert asyncio.run(scenario()) == ["st1", "st2", "player"]
+
+
+def test_a_client_that_goes_away_while_queued_gives_up_its_place():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        rooms["busy"] = GameRoom("busy", "r", trouble_brewing_script(), {"id": 9, "name": "ST"})
+        gate = admission._gates[loop] = Admission(loop, rate=0.5, burst=0, max_pending=10)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /ws/busy/room HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\n"
+                         b"Connection: Upgrade\r\nSec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n"
+                         b"Sec-WebSocket-Version: 13\r\n\r\n")
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            queued = gate.pending()
+            writer.close()
+            await asyncio.sleep(0.05)
+            return queued, gate.pending(), len(rooms["busy"].room_viewers)
+        finally:
+            rooms.pop("busy", None)
+            server.stop()
+
+    assert asyncio.run(scenario()) == (1, 0, 0)
+
+
+def test_admission_is_paced_by_rate():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        gate = Admission(loop, rate=200, burst=1, max_pending=100)
+        started = loop.time()
+        await asyncio.gather(*(gate.acquire() for _ in range(11)))
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) >= 0.045  # 10 queued at 200/s
+
+
+def test_socket_is_refused_with_503_before_upgrading_when_the_queue_is_full():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        rooms["busy"] = GameRoom("busy", "r", trouble_brewing_script(), {"id": 9, "name": "ST"})
+        admission._gates[loop] = Admission(loop, rate=1, burst=1, max_pending=0)
+        try:
+            url = f"ws://127.0.0.1:{port}/ws/busy/room"
+            first = await tornado.websocket.websocket_connect(url)
+            assert (await first.read_message()) is not None
+            with pytest.raises(tornado.httpclient.HTTPClientError) as refused:
+                await tornado.websocket.websocket_connect(url)
+            first.close()
+            return refused.value.code, len(rooms["busy"].room_viewers)
+        finally:
+            rooms.pop("busy", None)
+            server.stop()
+
+    code, viewers = asyncio.run(scenario())
+    assert code == 503 and viewers == 1
@@ -0,0 +1,51 @@
+import re
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from botc.batch import RoleTable, deal, first_night, run
+from botc.cli import new_game
+from botc.scripts import trouble_brewing_script
+
+
+def test_deal_respects_role_counts():
+    script = trouble_brewing_script()
+    table = RoleTable.from_script(script)
+    deals = deal(script, table, 9, 500, np.random.default_rng(1))
+    assert deals.shape == (500, 9)
+    groups = table.group[deals]
+    # 5 townsfolk, 2 outsiders, 1 minion, 1 demon; no role twice
+    assert (np.count_nonzero(groups == 0, axis=1) == 5).all()
+    assert (np.count_nonzero(groups == 1, axis=1) == 2).all()
+    assert (np.count_nonzero(groups == 3, axis=1) == 1).all()
+    assert all(len(set(row)) == 9 for row in deals.tolist())
+
+
+def test_chef_and_empath_match_role_hooks():
+    script = trouble_brewing_script()
+    table = RoleTable.from_script(script)
+    deals = deal(script, table, 10, 200, np.random.default_rng(2))
+    fn = first_night(table, deals)
+    chef_i, empath_i = table.index("Chef"), table.index("Empath")
+    checked = 0
+    for row, pairs, empath in zip(deals.tolist(), fn.chef_pairs.tolist(), fn.empath.tolist()):
+        if chef_i not in row or empath_i not in row:
+            continue
+        g = new_game([f"P{i}" for i in range(10)], script, [table.names[r] for r in row])
+        g.night = 1
+        g.log.clear()
+        g.player_by_role("Chef").role.on_night(g)
+        em = g.player_by_role("Empath")
+        em.role.on_night(g)
+        assert f"learns there are {pairs} pairs" in g.log[0]
+        assert int(re.search(r"senses (\d)", g.log[1]).group(1)) == empath[em.seat - 1]
+        checked += 1
+    assert checked > 0
+
+
+def test_run_accumulates_over_chunks():
+    rates = run(7, 3000, seed=0, chunk=1000).rates()
+    assert rates["games"] == 3000
+    assert rates["seat_evil"].sum() == pytest.approx(2.0)
+    assert rates["chef"].sum() == pytest.approx(1.0)
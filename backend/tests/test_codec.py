@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import tornado.httpserver
+import tornado.testing
+import tornado.websocket
+
+from botc.codec import JSON, KEYS, PACK, negotiate
+from botc.rooms import GameRoom, rooms
+from botc.scripts import trouble_brewing_script
+from botc.server import make_app
+
+VALUES = [
+    None, True, False, 0, 1, 127, 128, 255, 256, 65535, 65536, 2 ** 32, 2 ** 63, -1, -32, -33, -129,
+    -(2 ** 15) - 1, -(2 ** 31) - 1, -(2 ** 63), 1.5, -0.25, "", "é" * 40, "x" * 300, "y" * 70000,
+    list(range(20)), {"k%d" % i: i for i in range(20)}, [{"seat": 1, "occupant": None}], [[], {}],
+]
+
+
+def test_pack_roundtrips_json_values():
+    for value in VALUES:
+        assert PACK.decode(PACK.encode(value)) == value
+        assert PACK.decode(PACK.encode({"value": value})) == {"value": value}
+
+
+def test_known_keys_travel_as_indexes():
+    view = {"seats": [{"seat": i, "occupant": {"id": i, "name": "P%d" % i}} for i in range(1, 16)]}
+    packed = PACK.encode(view)
+    assert b"occupant" not in packed and PACK.decode(packed) == view
+    assert len(packed) < len(JSON.encode(view)) / 2
+    assert PACK.decode(PACK.encode({1: "a"})) == {"1": "a"}  # JSON semantics for non-string keys
+    assert KEYS.index("type") == 0  # the dictionary is append-only
+
+
+def test_joined_frames_decode_as_an_array():
+    msgs = [{"type": "event", "n": i} for i in range(20)]
+    for codec in (JSON, PACK):
+        assert codec.decode(codec.join([codec.encode(m) for m in msgs])) == msgs
+
+
+def test_negotiate_picks_first_supported_subprotocol():
+    assert negotiate(["mqtt", "botc.pack", "botc.json"]) is PACK
+    assert negotiate(["mqtt"]) is None
+
+
+def test_socket_speaks_the_negotiated_codec():
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        room = rooms["codec-test"] = GameRoom("codec-test", "r", trouble_brewing_script(), {"id": 9, "name": "ST"})
+        try:
+            url = f"ws://127.0.0.1:{port}/ws/codec-test/room"
+            packed = await tornado.websocket.websocket_connect(url, subprotocols=["botc.pack"])
+            plain = await tornado.websocket.websocket_connect(url)
+            a, b = await packed.read_message(), await plain.read_message()
+            assert packed.selected_subprotocol == "botc.pack" and isinstance(a, bytes)
+            assert isinstance(b, str) and PACK.decode(a) == json.loads(b)
+            packed.write_message(PACK.encode({"type": "get_state"}), binary=True)
+            assert PACK.decode(await packed.read_message())["view"] == room._views["room"].view
+            packed.close()
+            plain.close()
+        finally:
+            rooms.pop("codec-test", None)
+            server.stop()
+
+    asyncio.run(scenario())
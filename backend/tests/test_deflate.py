@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import tornado.httpserver
+import tornado.testing
+import tornado.websocket
+
+from botc.rooms import GameRoom, rooms
+from botc.scripts import trouble_brewing_script
+from botc.server import make_app
+from botc.ws import deflate
+
+
+def test_viewers_share_compressed_frames_and_small_frames_skip_deflate():
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        room = rooms["deflate-test"] = GameRoom("deflate-test", "r", trouble_brewing_script(), {"id": 9, "name": "ST"},
+                                                initial_seat_count=15)
+        for i in range(1, 16):
+            room.join_unseated(i, f"Player number {i}")
+            room.sit(i, i)
+        base = f"ws://127.0.0.1:{port}/ws/deflate-test"
+        try:
+            viewers = [await tornado.websocket.websocket_connect(f"{base}/room", compression_options={})
+                       for _ in range(3)]
+            plain = await tornado.websocket.websocket_connect(f"{base}/room")
+            player = await tornado.websocket.websocket_connect(f"{base}/player/1", compression_options={})
+            first = [json.loads(await v.read_message()) for v in viewers]
+            hello = json.loads(await player.read_message())
+            await plain.read_message()
+            room.join_unseated(99, "Latecomer")  # one more shared frame for everyone
+            later = [json.loads(await v.read_message()) for v in viewers + [plain]]
+            headers = viewers[0].headers.get("Sec-WebSocket-Extensions")
+            # the storyteller keeps context takeover and still round-trips
+            st = await tornado.websocket.websocket_connect(f"{base}/st", compression_options={})
+            st_view = json.loads(await st.read_message())["view"]
+            room.join_unseated(98, "Another")
+            st_patch = json.loads(await st.read_message())
+            viewers.append(st)
+            for c in viewers + [plain, player]:
+                c.close()
+            return room, first, hello, later, headers, st_view, st_patch
+        finally:
+            rooms.pop("deflate-test", None)
+            server.stop()
+
+    deflate.reset()
+    room, first, hello, later, headers, st_view, st_patch = asyncio.run(scenario())
+    assert headers.startswith("permessage-deflate")
+    assert len(st_view["seats"]) == 15 and st_patch["kind"] == "StateDiff"
+    assert first[0] == first[1] == first[2] and first[0]["type"] == "state"
+    assert hello["type"] == "hello"
+    assert all(m == later[0] for m in later)
+
+    viewers = deflate.stats()["RoomViewerSocket"]
+    assert viewers["cache_hits"] == 2  # the full state was deflated once for three viewers
+    assert viewers["skipped"] >= 3  # the small spectator patch went out uncompressed
+    assert viewers["ratio"] < 0.5
+    assert deflate.stats()["PlayerSocket"]["skipped"] >= 1  # the tiny hello went out uncompressed
@@ -0,0 +1,43 @@
+from botc.model import RoleType, Team
+from botc.roles.empath import Empath
+from botc.roles.imp import Imp
+from botc.roles.poisoner import Poisoner
+from botc.roles.scarlet_woman import ScarletWoman
+from botc.roles.soldier import Soldier
+
+
+def test_lookups_by_id_seat_and_role(make_game):
+    g = make_game([Imp, Poisoner, Empath, Soldier, Soldier])
+    assert g.player(3).name == "P3"
+    assert g.player_at(2).id == 2
+    assert g.player_by_role("Imp").id == 1
+    assert [p.id for p in g.players_of_type(RoleType.MINION)] == [2]
+    assert {p.id for p in g.players_of_team(Team.GOOD)} == {3, 4, 5}
+
+
+def test_mark_dead_updates_alive_set(make_game):
+    g = make_game([Imp, Poisoner, Empath, Soldier, Soldier])
+    before = g.alive_players()
+    g.mark_dead(3, "in test")
+    assert not g.is_alive(3)
+    assert [p.id for p in g.alive_players()] == [1, 2, 4, 5]
+    assert len(before) == 5
+
+
+def test_scarlet_woman_promotion_reindexes_roles(make_game):
+    g = make_game([Imp, ScarletWoman, Empath, Soldier, Soldier, Soldier])
+    g.mark_dead(1, "in test")
+    assert g.player_by_role("Imp").id == 2
+    assert g.player_by_role("Scarlet Woman") is None
+    assert [p.id for p in g.players_of_type(RoleType.DEMON) if p.alive] == [2]
+    assert g.players_of_type(RoleType.MINION) == []
+
+
+def test_neighbours_follow_seat_order_with_gaps(make_game):
+    g = make_game([Imp, Poisoner, Empath], seats=[2, 5, 9])
+    left, right = g.neighbours(1)
+    assert (left.id, right.id) == (3, 2)
+    g.seat_player(3, 1)
+    left, right = g.neighbours(1)
+    assert (left.id, right.id) == (3, 2)
+    assert g.player_at(9) is None
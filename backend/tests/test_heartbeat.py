@@ -0,0 +1,96 @@
+import asyncio
+
+import tornado.websocket
+
+from botc import metrics
+from botc.rooms import GameRoom, STORYTELLER, ROOM
+from botc.scripts import trouble_brewing_script
+from botc.socket_handlers.player_handler import PlayerSocket
+from botc.socket_handlers.room_view_handler import RoomViewerSocket
+from botc.socket_handlers.story_teller_handler import StorytellerSocket
+from botc.ws.heartbeat import Heartbeat
+
+
+def quiet_socket(cls, room, audience, answers=True):
+    """A handler with no connection behind it; it answers pings only if told to."""
+    sock = cls.__new__(cls)
+    sock.initialize(rooms={room.info.gid: room})
+    sock.room, sock.audience = room, audience
+    sock.ws_connection = object()
+    sock.pings, sock.closed_with = [], None
+    sock.wheel = None
+
+    def ping(data):
+        sock.pings.append(data)
+        if answers:
+            asyncio.get_running_loop().call_soon(sock.wheel.pong, sock, data)
+
+    sock.ping = ping
+    sock.close = lambda code=None, reason=None: setattr(sock, "closed_with", reason)
+    return sock
+
+
+def test_every_socket_is_pinged_once_per_interval_and_round_trips_are_recorded():
+    async def scenario():
+        wheel = Heartbeat(asyncio.get_running_loop(), interval=0.04, timeout=1.0, tick=0.01)
+        room = GameRoom("hb", "r", trouble_brewing_script(), {"id": 9, "name": "ST"})
+        socks = [quiet_socket(RoomViewerSocket, room, ROOM) for _ in range(8)]
+        for s in socks:
+            s.wheel = wheel
+            wheel.add(s)
+        await asyncio.sleep(0.095)
+        return socks
+
+    metrics.reset()
+    socks = asyncio.run(scenario())
+    assert all(1 <= len(s.pings) <= 3 for s in socks)
+    assert metrics.counter("heartbeat.pings") == sum(len(s.pings) for s in socks)
+    assert metrics.snapshot()["summaries"]["heartbeat.rtt_ms"]["count"] == metrics.counter("heartbeat.pings")
+    assert not any(s.closed_with for s in socks)
+
+
+def test_unresponsive_sockets_are_reaped_and_unhooked_from_their_room():
+    async def scenario():
+        wheel = Heartbeat(asyncio.get_running_loop(), interval=0.02, timeout=0.05, tick=0.01)
+        room = GameRoom("hb", "r", trouble_brewing_script(), {"id": 9, "name": "ST"})
+        player = quiet_socket(PlayerSocket, room, "1", answers=False)
+        player.player_id = "1"
+        room.player_sockets["1"].add(player)
+        viewer = quiet_socket(RoomViewerSocket, room, ROOM, answers=False)
+        room.add_room_viewer(viewer)
+        st = quiet_socket(StorytellerSocket, room, STORYTELLER, answers=False)
+        room.storytellerSocket = st
+        alive = quiet_socket(RoomViewerSocket, room, ROOM)
+        room.add_room_viewer(alive)
+        for s in (player, viewer, st, alive):
+            s.wheel = wheel
+            wheel.add(s)
+        await asyncio.sleep(0.15)
+        return room, (player, viewer, st), alive
+
+    metrics.reset()
+    room, dead, alive = asyncio.run(scenario())
+    assert [s.closed_with for s in dead] == ["heartbeat_timeout"] * 3
+    assert "1" not in room.player_sockets and room.room_viewers == {alive} and room.storytellerSocket is None
+    assert alive.closed_with is None
+    assert metrics.counter("sockets.reaped") == 3
+
+
+def test_a_socket_closing_under_a_ping_does_not_stop_the_wheel():
+    async def scenario():
+        wheel = Heartbeat(asyncio.get_running_loop(), interval=0.01, timeout=1.0, tick=0.01)
+        room = GameRoom("hb", "r", trouble_brewing_script(), {"id": 9, "name": "ST"})
+        closing, live = quiet_socket(RoomViewerSocket, room, ROOM), quiet_socket(RoomViewerSocket, room, ROOM)
+
+        def refuse(data):
+            raise tornado.websocket.WebSocketClosedError()
+
+        closing.ping = refuse
+        for s in (closing, live):
+            s.wheel = wheel
+            wheel.add(s)
+        await asyncio.sleep(0.035)
+        return wheel, live
+
+    wheel, live = asyncio.run(scenario())
+    assert len(wheel) == 1 and len(live.pings) >= 2
@@ -0,0 +1,140 @@
+import asyncio
+import os
+
+from botc import journal, metrics
+from tests.test_rooms import make_room
+
+
+def test_commands_from_many_rooms_share_one_group_commit(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "_journal", None)
+    journal.open_journal(str(tmp_path / "j"))
+    before = metrics.snapshot()["counters"].get("journal.commits", 0)
+
+    async def scenario():
+        rooms = [make_room(players=2) for _ in range(5)]
+        for i, room in enumerate(rooms):
+            room.info.gid = f"g{i}"
+        return await asyncio.gather(*(room.submit(room.join_unseated, 10 + i, "Late")
+                                      for i, room in enumerate(rooms)))
+
+    asyncio.run(scenario())
+    assert metrics.snapshot()["counters"]["journal.commits"] - before == 1
+    records, _ = journal.read_frames(str(tmp_path / "j"))
+    assert [r[2] for r, _ in records] == ["join_unseated"] * 5
+
+
+def test_restart_replays_lobby_commands_and_the_started_game_from_its_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "j")
+    monkeypatch.setattr(journal, "_journal", None)
+    journal.open_journal(path)
+
+    async def scenario():
+        lobby, game = make_room(), make_room()
+        lobby.info.gid = "lobby"
+        journal.current().room(lobby)
+        journal.current().room(game)
+        await lobby.submit(lobby.join_unseated, 42, "Watcher")
+        await lobby.submit(lobby.update_max_seats, 7)
+        await game.submit(game.start_game)
+        await game.submit(game.join_unseated, 43, "Late")
+        return lobby, game
+
+    lobby, game = asyncio.run(scenario())
+    journal.current().close()
+
+    rooms = journal.Journal(path).open()
+    assert set(rooms) == {"lobby", "g1"}
+    assert rooms["lobby"].spectators == lobby.spectators and len(rooms["lobby"].seats) == 7
+    restored = rooms["g1"]
+    assert [(p.id, p.role.id) for p in restored.game.players] == [(p.id, p.role.id) for p in game.game.players]
+    assert restored.spectators == game.spectators
+
+
+def test_a_torn_tail_is_dropped_and_appends_continue_after_it(tmp_path, monkeypatch):
+    path = str(tmp_path / "j")
+    monkeypatch.setattr(journal, "_journal", None)
+    j = journal.Journal(path)
+    j.open()
+    room = make_room()
+    j.room(room)  # no loop: written straight away
+    j.command("g1", "join_unseated", (42, "Watcher"), {})
+    j.close()
+    whole = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(journal._frame(("cmd", "g1", "leave", (42,), {}))[:-3])  # crashed mid-write
+
+    j = journal.Journal(path)
+    rooms = j.open()
+    assert os.path.getsize(path) == whole
+    assert 42 in {s.id for s in rooms["g1"].spectators}
+    j.command("g1", "leave", (42,), {})
+    j.close()
+    assert 42 not in {s.id for s in journal.Journal(path).open()["g1"].spectators}
+
+
+def test_compaction_keeps_only_each_rooms_latest_snapshot_and_what_follows(tmp_path, monkeypatch):
+    path = str(tmp_path / "j")
+    monkeypatch.setattr(journal, "_journal", None)
+    journal.open_journal(path)
+    j = journal.current()
+
+    async def scenario():
+        room, gone = make_room(), make_room()
+        gone.info.gid = "gone"
+        for _ in range(3):
+            j.room(room)
+        j.room(gone)
+        j.drop("gone")
+        await room.submit(room.join_unseated, 42, "Watcher")
+        await j.commit()
+        size = os.path.getsize(path)
+        j.compact()
+        await j.commit()
+        return size
+
+    size = asyncio.run(scenario())
+    records, _ = journal.read_frames(path)
+    assert [r[0] for r, _ in records] == ["room", "cmd"]
+    assert os.path.getsize(path) < size
+    assert 42 in {s.id for s in journal.Journal(path).open()["g1"].spectators}
+
+
+def test_a_failed_journal_write_fails_the_batch_and_later_commands_still_run(tmp_path, monkeypatch):
+    path = str(tmp_path / "j")
+    monkeypatch.setattr(journal, "_journal", None)
+    monkeypatch.setattr(journal, "RETRY", 0.01)
+    journal.open_journal(path)
+    j = journal.current()
+
+    def broken(frames):
+        raise OSError("disk full")
+
+    async def scenario():
+        room = make_room()
+        j.room(room)
+        await j.commit()
+        j._write_frames = broken
+        failed = await asyncio.gather(room.submit(room.join_unseated, 42, "Watcher"), return_exceptions=True)
+        del j._write_frames  # the disk is back
+        later = await asyncio.wait_for(room.submit(room.join_unseated, 43, "Late"), 1)
+        return failed, later, room
+
+    failed, later, room = asyncio.run(scenario())
+    assert isinstance(failed[0], OSError)
+    assert later is not None and {42, 43} <= {s.id for s in room.spectators}
+    j.close()
+    # the frame that failed was written again, ahead of the one that followed it
+    assert {42, 43} <= {s.id for s in journal.Journal(path).open()["g1"].spectators}
+
+
+def test_short_writes_are_finished_rather_than_left_torn(tmp_path, monkeypatch):
+    path = str(tmp_path / "j")
+    write = os.write
+    monkeypatch.setattr(os, "write", lambda fd, data: write(fd, bytes(data)[:7]))
+    j = journal.Journal(path)
+    j.open()
+    j.room(make_room())
+    j.command("g1", "join_unseated", (42, "Watcher"), {})
+    j.close()
+    monkeypatch.undo()
+    assert 42 in {s.id for s in journal.Journal(path).open()["g1"].spectators}
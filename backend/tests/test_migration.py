@@ -0,0 +1,187 @@
+import asyncio
+import json
+
+import pytest
+import tornado.escape
+import tornado.httpclient
+import tornado.httpserver
+import tornado.testing
+import tornado.websocket
+
+from botc import codec, migration
+from botc.rooms import GameRoom, RoomMoving, STORYTELLER, rooms
+from botc.router import Placement, make_router, move
+from botc.server import make_app, start_workers
+from tests.test_rooms import FakeSocket, make_room
+
+ADMIN = {"X-Admin-Token": "admin"}
+
+
+def test_process_state_list_matches_what_init_process_state_sets():
+    room = GameRoom.__new__(GameRoom)
+    room._init_process_state()
+    assert set(vars(room)) == GameRoom._PROCESS_STATE
+
+
+def test_snapshot_carries_the_game_and_resume_points_and_freezes_the_source():
+    async def scenario():
+        room = make_room()
+        st = FakeSocket(STORYTELLER)
+        room.storytellerSocket = st
+        room.start_game()
+        room.bus.new_cid()
+        room.send_to_storyteller({"type": "event", "event": "note"})
+        await asyncio.sleep(0)
+        held = room.version
+
+        data = await migration.export(room)
+        with pytest.raises(RoomMoving):
+            await room.submit(room.step)
+        moved = migration.restore(data)
+        return room, moved, held
+
+    room, moved, held = asyncio.run(scenario())
+    assert room.frozen and not moved.frozen
+    assert moved.version == room.version and moved.bus.new_cid() == room.bus.new_cid()
+    assert [(p.id, p.seat, p.role.id) for p in moved.game.players] == \
+        [(p.id, p.seat, p.role.id) for p in room.game.players]
+    assert moved.game._emit.__self__ is moved and moved.game.players[0] is moved.players[0]
+    assert moved.storytellerSocket is None and not moved.player_sockets
+
+    back = FakeSocket(STORYTELLER)
+    moved.storytellerSocket = back
+    moved.resume(back, held)
+    assert back.sent == []  # it held the newest already: nothing to resend
+
+
+def test_export_waits_for_a_pending_prompt():
+    async def scenario():
+        room = make_room()
+        room.bus.wait_for(room.bus.new_cid(), timeout=None)
+        busy = await migration.export(room, timeout=0.05)
+        room.bus.fulfill(1, 3)
+        return busy, room.frozen, await migration.export(room, timeout=0.05)
+
+    busy, frozen, data = asyncio.run(scenario())
+    assert busy is None and not frozen and data
+
+
+def test_room_moves_between_workers_and_its_sockets_resume_on_the_new_one():
+    procs, workers = start_workers(2, token="secret")
+
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_router(workers, token="secret", admin_token="admin"))
+        server.add_sockets([sock])
+        client = tornado.httpclient.AsyncHTTPClient()
+        base = f"http://127.0.0.1:{port}"
+        try:
+            r = await client.fetch(f"{base}/api/rooms", method="POST",
+                                   body=json.dumps({"name": "r", "creator": {"id": 1, "name": "ST"}}))
+            gid = json.loads(r.body)["gid"]
+            lobby = json.loads((await client.fetch(f"{base}/api/lobby")).body)
+            source = next(s["shard"] for s in lobby["shards"] if s["rooms"])
+
+            ws = await tornado.websocket.websocket_connect(f"ws://127.0.0.1:{port}/ws/{gid}/room")
+            seen = tornado.escape.json_decode(await ws.read_message())["version"]
+            forbidden = await client.fetch(f"{base}/api/admin/rooms/{gid}/move", method="POST", raise_error=False,
+                                           body=json.dumps({"to": 1 - source}))
+            assert forbidden.code == 403
+            moved = json.loads((await client.fetch(f"{base}/api/admin/rooms/{gid}/move", method="POST",
+                                                   headers=ADMIN, body=json.dumps({"to": 1 - source}))).body)
+            assert await ws.read_message() is None
+            closed_with = ws.close_code
+
+            ws = await tornado.websocket.websocket_connect(f"ws://127.0.0.1:{port}/ws/{gid}/room?since={seen}")
+            await client.fetch(f"{base}/api/rooms/{gid}/join", method="POST", body=json.dumps({"id": 7, "name": "Ann"}))
+            update = tornado.escape.json_decode(await ws.read_message())
+
+            drained = json.loads((await client.fetch(f"{base}/api/admin/shards/{1 - source}/drain", method="POST",
+                                                     headers=ADMIN, body=b"")).body)
+            assert await ws.read_message() is None
+            lobby = json.loads((await client.fetch(f"{base}/api/lobby")).body)
+            return source, moved, closed_with, update, seen, drained, lobby
+        finally:
+            server.stop()
+
+    try:
+        source, moved, closed_with, update, seen, drained, lobby = asyncio.run(scenario())
+    finally:
+        for p in procs:
+            p.terminate()
+            p.join()
+
+    assert moved["ok"] and moved["to"] == 1 - source and moved["sockets"] == 1
+    assert moved["frozen_ms"] < 1000
+    assert closed_with == migration.MOVED
+    assert update["kind"] == "StateDiff" and update["data"]["from"] == seen  # resumed, not resent
+    assert drained["moved"] == 1 and not drained["failed"]
+    assert {s["shard"]: s["rooms"] for s in lobby["shards"]} == {source: 1, 1 - source: 0}
+    assert lobby["lobby"][0]["spectators"] == [{"id": 7, "name": "Ann"}]
+
+
+def test_socket_commands_on_a_frozen_room_or_malformed_get_an_error_frame():
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        rooms["g1"] = room = make_room()
+        try:
+            ws = await tornado.websocket.websocket_connect(f"ws://127.0.0.1:{port}/ws/g1/st")
+            await ws.read_message()  # the state
+            bad = []
+            for message in (json.dumps({"type": "command"}), "[1]", '"x"', "3"):  # no task, or not an object
+                ws.write_message(message)
+                bad.append(tornado.escape.json_decode(await ws.read_message()))
+            packed = await tornado.websocket.websocket_connect(f"ws://127.0.0.1:{port}/ws/g1/st",
+                                                               subprotocols=["botc.pack"])
+            await packed.read_message()
+            packed.write_message(b"\x81\xcd\x03\xe7\x01", binary=True)  # {999: 1}: no such key
+            bad.append(codec.PACK.decode(await packed.read_message()))
+            packed.close()
+            room.frozen = True
+            ws.write_message(json.dumps({"type": "respond", "cid": 1, "answer": 2}))
+            moving = tornado.escape.json_decode(await ws.read_message())
+            return bad, moving, await ws.read_message(), ws.close_code
+        finally:
+            del rooms["g1"]
+            server.stop()
+
+    bad, moving, closed, code = asyncio.run(scenario())
+    assert [(b["type"], b["error"]) for b in bad] == [("error", "bad_message")] * 5
+    assert moving == {"type": "error", "error": "room_moving"}
+    assert closed is None and code == migration.MOVED
+
+
+def test_an_unreachable_worker_fails_the_move_or_drain_and_thaws_the_room():
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False, cluster_token="secret"))
+        server.add_sockets([sock])
+        dead, dead_port = tornado.testing.bind_unused_port()
+        dead.close()  # nobody listens there
+        workers = [f"127.0.0.1:{port}", f"127.0.0.1:{dead_port}"]
+        placement = Placement(workers, token="secret")
+        rooms["g1"] = room = make_room()
+        placement.moved["g1"] = 0
+        router_sock, router_port = tornado.testing.bind_unused_port()
+        app = make_router(workers, token="secret", admin_token="admin")
+        router = tornado.httpserver.HTTPServer(app)
+        router.add_sockets([router_sock])
+        try:
+            moved = await move(placement, "g1", 1)
+            drained = await tornado.httpclient.AsyncHTTPClient().fetch(
+                f"http://127.0.0.1:{router_port}/api/admin/shards/0/drain", method="POST", headers=ADMIN, body=b"",
+                raise_error=False)
+            draining = app.wildcard_router.named_rules["lobby"].target_kwargs["placement"].draining
+            return moved, room.frozen, placement.shard("g1"), drained, draining
+        finally:
+            del rooms["g1"]
+            server.stop()
+            router.stop()
+
+    moved, frozen, shard, drained, draining = asyncio.run(scenario())
+    assert not moved["ok"] and moved["error"] == "import_failed_599"
+    assert not frozen and shard == 0
+    assert drained.code == 502 and json.loads(drained.body)["error"].startswith("lobby_failed")
+    assert not draining
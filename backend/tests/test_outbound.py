@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from botc.patch import apply
+from botc.rooms import GameRoom
+from botc.scripts import trouble_brewing_script
+from botc.socket_handlers.player_handler import PlayerSocket
+
+
+def make_room():
+    room = GameRoom("g1", "room", trouble_brewing_script(), {"id": 100, "name": "ST"}, initial_seat_count=5)
+    for i in range(1, 6):
+        room.join_unseated(i, f"P{i}")
+        room.sit(i, i)
+    return room
+
+
+def slow_socket(room, pid):
+    """A PlayerSocket whose writes only complete when the test says so."""
+    sock = PlayerSocket.__new__(PlayerSocket)
+    sock.initialize(rooms={room.info.gid: room})
+    sock.HIGH_WATER, sock.LOW_WATER, sock.STALL_TIMEOUT = 100, 10, 0.05
+    sock.room, sock.player_id, sock.audience = room, pid, pid
+    sock.pending, sock.frames, sock.closed_with = [], [], None
+    sock.ws_connection = None  # no handshake, so no compressor
+
+    def write_message(data, binary=False):
+        fut = asyncio.get_running_loop().create_future()
+        sock.pending.append(fut)
+        sock.frames.append(json.loads(data))
+        return fut
+
+    sock.write_message = write_message
+    sock.close = lambda code=None, reason=None: setattr(sock, "closed_with", reason)
+    room.player_sockets[pid].add(sock)
+    return sock
+
+
+def test_congested_socket_gets_only_the_newest_state_once_it_drains():
+    async def scenario():
+        room = make_room()
+        sock = slow_socket(room, 1)
+        room.flush()
+        assert sock.congested and len(sock.frames) == 1  # first full state is over the high watermark
+
+        for i in range(3):
+            room.join_unseated(40 + i, f"S{i}")
+            room.flush()
+        sock.send({"type": "event", "event": "hello"})
+        assert len(sock.frames) == 1 and len(sock.queue) == 1
+        assert room.outbound_stats()["superseded"] == 3
+
+        while not all(f.done() for f in sock.pending):
+            for fut in list(sock.pending):
+                if not fut.done():
+                    fut.set_result(None)
+            await asyncio.sleep(0)
+        return room, sock
+
+    room, sock = asyncio.run(scenario())
+    assert not sock.congested
+    # the catch-up is one diff from the state the socket held, skipping the superseded ones
+    first, event, catch_up = sock.frames
+    assert (first["type"], event["type"], catch_up["kind"]) == ("state", "event", "StateDiff")
+    assert catch_up["data"]["from"] == first["version"]
+    assert apply(first["view"], catch_up["data"]["ops"]) == room._views[1].view
+    assert sock.state_version == room._views[1].version
+
+
+def test_stalled_socket_is_disconnected():
+    async def scenario():
+        room = make_room()
+        sock = slow_socket(room, 2)
+        room.flush()
+        await asyncio.sleep(0.1)
+        return room, sock
+
+    room, sock = asyncio.run(scenario())
+    assert sock.closed_with == "send_stalled"
+    stats = room.outbound_stats()
+    assert stats["sockets"] == 1 and stats["congested"] == 1 and stats["buffered_bytes"] > 100
+
+
+def test_batching_socket_gets_one_array_frame_per_tick():
+    async def scenario():
+        room = make_room()
+        sock = slow_socket(room, 1)
+        sock.HIGH_WATER = 1 << 20
+        sock.batching = True
+        sock.send({"type": "hello"})
+        room.join_unseated(42, "Watcher")
+        sock.send({"type": "event", "event": "setup_tasks"})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return room, sock
+
+    room, sock = asyncio.run(scenario())
+    assert len(sock.frames) == 1
+    assert [m["type"] for m in sock.frames[0]] == ["hello", "event", "state"]
+    assert sock.frames[0][-1]["view"] == room._views[1].view
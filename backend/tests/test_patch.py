@@ -0,0 +1,26 @@
+import random
+
+from botc.patch import apply, diff
+
+
+def test_diff_roundtrips_nested_changes():
+    old = {"info": {"status": "open", "a/b": 1}, "seats": [{"seat": 1}, {"seat": 2}, {"seat": 3}], "gone": True}
+    new = {"info": {"status": "In-play", "a/b": 1, "x~y": 2}, "seats": [{"seat": 1, "role": None}], "phase": "NIGHT"}
+    ops = diff(old, new)
+    assert apply(old, ops) == new
+    assert {"op": "add", "path": "/info/x~0y", "value": 2} in ops
+    assert old["info"]["status"] == "open"  # apply works on a copy
+
+
+def test_equal_views_have_empty_diff_and_types_matter():
+    view = {"n": 1, "alive": True, "seats": [1, 2]}
+    assert diff(view, dict(view)) == []
+    assert diff({"v": 1}, {"v": True}) == [{"op": "replace", "path": "/v", "value": True}]
+
+
+def test_random_lists_grow_and_shrink():
+    rng = random.Random(7)
+    for _ in range(200):
+        old = [rng.randint(0, 3) for _ in range(rng.randint(0, 6))]
+        new = [rng.randint(0, 3) for _ in range(rng.randint(0, 6))]
+        assert apply({"l": old}, diff({"l": old}, {"l": new})) == {"l": new}
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from botc.cli import new_game
+from botc.model import Phase
+from botc.prompt import AutoPrompt, PromptExpired, SyncPromptAdapter, as_async, is_async_prompt, run_sync
+from botc.ws.prompt_bus import PromptBus, deadline_scheduler
+from botc.ws.ws_prompt import WsPrompt
+
+
+def test_sync_prompts_adapt_and_run_without_a_loop():
+    ap = as_async(AutoPrompt())
+    assert isinstance(ap, SyncPromptAdapter)
+    assert not is_async_prompt(ap)
+    assert run_sync(ap.choose_two(1, [4, 5, 6], "pick")) == (4, 5)
+
+
+def test_run_sync_refuses_to_block_on_a_real_prompt():
+    async def scenario():
+        ws = WsPrompt(lambda payload: None, PromptBus())
+        with pytest.raises(RuntimeError):
+            run_sync(ws.choose_one(1, [2, 3], "pick"))
+
+    asyncio.run(scenario())
+
+
+def test_hundreds_of_outstanding_prompts_resolve_concurrently():
+    async def scenario():
+        bus = PromptBus()
+        sent = []
+        prompts = [WsPrompt(sent.append, bus) for _ in range(300)]
+        tasks = [asyncio.ensure_future(p.choose_one(1, [i, i + 1], "pick")) for i, p in enumerate(prompts)]
+        await asyncio.sleep(0)
+        assert bus.pending() == 300
+        for payload in sent:
+            bus.fulfill(payload["cid"], payload["candidates"][1])
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [i + 1 for i in range(300)]
+
+
+def test_resolve_night_awaits_storyteller_answers():
+    async def scenario():
+        g = new_game(["A", "B", "C", "D", "E"], role_names=["Imp", "Poisoner", "Empath", "Monk", "Soldier"])
+        bus = PromptBus()
+        asked = []
+
+        def send(payload):
+            asked.append(payload)
+            # storyteller answers on a later loop iteration
+            asyncio.get_running_loop().call_soon(bus.fulfill, payload["cid"], payload["candidates"][-1])
+
+        g.prompt = WsPrompt(send, bus)
+        assert g.advance() == Phase.NIGHT
+        await g.resolve_night()
+        return g, asked
+
+    g, asked = asyncio.run(scenario())
+    assert [p["seat"] for p in asked] == [2]  # first night: only the Poisoner is prompted
+    assert g.player_by_role("Poisoner").role.poisoned_pid == 5
+
+
+def test_prompt_expires_to_default_or_fails():
+    async def scenario():
+        bus = PromptBus(default_timeout=0.01)
+        ws = WsPrompt(lambda payload: None, bus, defaults={"confirm": False})
+        assert await ws.confirm(1, "sure?") is False
+        with pytest.raises(PromptExpired):
+            await ws.choose_one(1, [2, 3], "pick")
+        return bus
+
+    bus = asyncio.run(scenario())
+    assert bus.expired == 2
+    assert bus.pending() == 0
+
+
+def test_orphaned_prompts_are_settled_when_storyteller_leaves():
+    async def scenario():
+        bus = PromptBus(default_timeout=60)
+        ws = WsPrompt(lambda payload: None, bus)
+        tasks = [asyncio.ensure_future(ws.choose_one(1, [2], "pick")) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert bus.orphan_all() == 5
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return bus, results
+
+    bus, results = asyncio.run(scenario())
+    assert all(isinstance(r, PromptExpired) for r in results)
+    assert bus.orphaned == 5 and bus.pending() == 0
+
+
+def test_answered_prompts_leave_nothing_behind():
+    async def scenario():
+        bus = PromptBus(default_timeout=3600)
+        for _ in range(1000):
+            fut = bus.wait_for(bus.new_cid())
+            bus.fulfill(bus._next_cid - 1, 1)
+            await fut
+        return bus, deadline_scheduler()
+
+    bus, sched = asyncio.run(scenario())
+    assert bus.pending() == 0
+    assert len(sched) < 200  # fulfilled deadlines are compacted away
+
+
+def test_expired_hook_skips_ability_but_night_continues():
+    async def scenario():
+        g = new_game(["A", "B", "C", "D", "E"], role_names=["Imp", "Poisoner", "Empath", "Monk", "Soldier"])
+        g.prompt = WsPrompt(lambda payload: None, PromptBus(default_timeout=0.01))
+        g.advance()
+        await g.resolve_night()
+        return g
+
+    g = asyncio.run(scenario())
+    assert g.player_by_role("Poisoner").role.poisoned_pid is None
+    assert any("Empath" in line for line in g.log)
@@ -0,0 +1,408 @@
+import asyncio
+import json
+
+import tornado.websocket
+
+import botc.rooms
+from botc import metrics
+from botc.model import Phase
+from botc.patch import apply
+from botc.rooms import GameRoom, GAME, ROOM, STORYTELLER
+from botc.scripts import trouble_brewing_script
+from botc.ws import throttle
+
+
+class FakeSocket:
+    def __init__(self, audience=None):
+        self.sent = []
+        self.state_version = 0
+        self.audience = audience
+
+        self.frames = []
+        self.view = None  # what the client would hold after applying every frame
+        self.version = 0
+
+    def send(self, obj):
+        self.sent.append(obj)
+
+    def send_raw(self, data):
+        self.frames.append(data)
+        msg = json.loads(data)
+        self.sent.append(msg)
+        if msg["type"] == "state":
+            self.view, self.version = msg["view"], msg["version"]
+        elif msg.get("kind") == "StateDiff":
+            assert msg["data"]["from"] == self.version
+            self.view, self.version = apply(self.view, msg["data"]["ops"]), msg["data"]["version"]
+
+
+def make_room(players=5):
+    room = GameRoom("g1", "room", trouble_brewing_script(), {"id": 100, "name": "ST"}, initial_seat_count=players)
+    for i in range(1, players + 1):
+        room.join_unseated(i, f"P{i}")
+        room.sit(i, i)
+    return room
+
+
+def connect(room):
+    st, viewer, p1 = FakeSocket(), FakeSocket(), FakeSocket()
+    room.storytellerSocket = st
+    room.broadcast(STORYTELLER)
+    room.add_room_viewer(viewer)
+    room.broadcast(ROOM)
+    room.player_sockets[1].add(p1)
+    room.broadcast(1)
+    return st, viewer, p1
+
+
+def test_new_socket_catches_up_without_resending_to_others():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    assert [len(s.sent) for s in (st, viewer, p1)] == [1, 1, 1]
+
+    p1b = FakeSocket()
+    room.player_sockets[1].add(p1b)
+    room.broadcast(1)
+    assert [len(s.sent) for s in (st, viewer, p1, p1b)] == [1, 1, 1, 1]
+    assert p1b.sent[0]["version"] == p1.sent[0]["version"]
+
+
+def test_unchanged_views_are_not_resent():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    room.broadcast()
+    room.broadcast(GAME)
+    assert [len(s.sent) for s in (st, viewer, p1)] == [1, 1, 1]
+
+
+def test_only_audiences_that_changed_receive_state():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    before = room.version
+
+    room.join_unseated(42, "Watcher")  # spectator list is in every view
+    assert [len(s.sent) for s in (st, viewer, p1)] == [2, 2, 2]
+
+    room.start_game()
+    assert len(viewer.sent) == 3  # status is now In-play
+    sent_to_p1 = len(p1.sent)
+    assert p1.view["player"]["you"]["role"] is None  # roles stay with the storyteller
+
+    room.game.advance()
+    room.broadcast(GAME)  # phase reaches players and storyteller, not the room view
+    assert len(viewer.sent) == 3
+    assert len(p1.sent) == sent_to_p1 + 1
+
+    assert before < st.version <= room.version
+
+
+def test_each_audience_is_encoded_once_and_shared_between_sockets(monkeypatch):
+    room = make_room()
+    viewers = [FakeSocket() for _ in range(300)]
+    p1s = [FakeSocket() for _ in range(3)]
+    room.room_viewers.update(viewers)
+    room.player_sockets[1].update(p1s)
+
+    encoded = []
+    real = botc.rooms.encode
+    monkeypatch.setattr(botc.rooms, "encode", lambda msg, codec: encoded.append(msg) or real(msg, codec))
+    room.join_unseated(42, "Watcher")
+
+    assert len(encoded) == 2  # one room frame, one frame for player 1
+    assert all(v.frames[0] is viewers[0].frames[0] for v in viewers)
+    assert all(p.frames[0] is p1s[0].frames[0] for p in p1s)
+
+
+def test_player_overlay_only_reveals_own_role():
+    room = make_room()
+    room.start_game()
+    p1, p2 = FakeSocket(), FakeSocket()
+    room.player_sockets[1].add(p1)
+    room.player_sockets[2].add(p2)
+    room.broadcast(GAME)
+
+    seats = p1.view["seats"]
+    assert seats[0]["occupant"]["role"]["id"] == room.game.player(1).role.id
+    assert all("role" not in s["occupant"] for s in seats[1:])
+    # the shared seats were not touched by player 1's overlay
+    assert "role" not in p2.view["seats"][0]["occupant"]
+
+
+def test_changes_after_connect_are_sent_as_patches_that_rebuild_the_view():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    room.join_unseated(42, "Watcher")
+    room.start_game()
+    room.game.advance()
+    room.broadcast(GAME)
+
+    for sock, key in ((st, STORYTELLER), (viewer, ROOM), (p1, 1)):
+        assert sock.sent[0]["type"] == "state"
+        assert len(sock.frames) > 1
+        assert all(json.loads(f)["kind"] == "StateDiff" for f in sock.frames[1:])
+        assert sock.view == room._views[key].view
+    assert len(p1.frames[-1]) < len(p1.frames[0])  # the phase change is much smaller than the table
+
+
+def test_resync_sends_full_state():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    room.join_unseated(42, "Watcher")
+    assert viewer.sent[-1]["type"] == "patch"
+    room.resync(viewer, ROOM)
+    assert viewer.sent[-1]["type"] == "state" and viewer.sent[-1]["view"] == viewer.view
+
+
+def test_changes_within_a_tick_coalesce_into_one_broadcast():
+    async def scenario():
+        room = make_room()
+        st, viewer, p1 = connect(room)
+        await asyncio.sleep(0)
+        metrics.reset()
+
+        room.join_unseated(42, "Watcher")
+        room.update_max_seats(6)
+        room.join_unseated(43, "Other")
+        assert len(viewer.sent) == 1  # nothing goes out until the loop turns
+        await asyncio.sleep(0)
+        return st, viewer, p1
+
+    st, viewer, p1 = asyncio.run(scenario())
+    assert [len(s.sent) for s in (st, viewer, p1)] == [2, 2, 2]
+    assert [s["id"] for s in viewer.view["spectators"]] == [42, 43]
+    assert len(viewer.view["seats"]) == 6
+    assert metrics.counter("broadcast.flushed") == 1
+    assert metrics.counter("broadcast.coalesced") == 2
+
+
+def test_reconnect_resumes_with_one_diff_and_nothing_for_anyone_else():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    room.player_sockets[1].discard(p1)  # the phone drops off
+    room.join_unseated(42, "Watcher")
+    room.update_max_seats(6)
+    seen = [len(s.sent) for s in (st, viewer)]
+
+    back = FakeSocket(audience=1)
+    back.view, back.version = p1.view, p1.version
+    room.player_sockets[1].add(back)
+    room.resume(back, since=p1.version)
+    assert [len(s.sent) for s in (st, viewer)] == seen
+    assert [m["kind"] for m in back.sent] == ["StateDiff"]
+    assert back.view == room._views[1].view and len(back.view["seats"]) == 6
+
+
+def test_storyteller_reconnect_replays_missed_events_in_order():
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    room.storytellerSocket = None
+    room.send_to_storyteller({"type": "event", "event": "one"})
+    room.join_unseated(42, "Watcher")
+    room.send_to_storyteller({"type": "event", "event": "two"})
+
+    back = FakeSocket(audience=STORYTELLER)
+    back.view, back.version = st.view, st.version
+    room.storytellerSocket = back
+    room.resume(back, since=st.version)
+    diff_msg, one, two = back.sent
+    assert diff_msg["kind"] == "StateDiff" and back.view == room._views[STORYTELLER].view
+    assert (one["event"], two["event"]) == ("one", "two") and st.version < one["seq"] < two["seq"]
+
+    again = FakeSocket(audience=STORYTELLER)
+    room.resume(again, since=max(back.version, two["seq"]))  # the highest version the client saw
+    assert again.sent == []  # already holds everything
+
+
+def test_reconnect_after_falling_off_the_ring_gets_a_snapshot(monkeypatch):
+    monkeypatch.setattr(botc.rooms, "RING_SIZE", 2)
+    room = make_room()
+    st, viewer, p1 = connect(room)
+    for i in range(4):
+        room.join_unseated(40 + i, f"S{i}")
+
+    late = FakeSocket(audience=ROOM)
+    room.resume(late, since=viewer.sent[0]["version"])
+    assert [m["type"] for m in late.sent] == ["state"] and late.view == viewer.view
+
+    foreign = FakeSocket(audience=ROOM)
+    room.resume(foreign, since=room.version + 10)  # from before a restart: don't trust it
+    assert foreign.sent[0]["type"] == "state"
+
+
+def test_commands_run_in_order_as_one_batch_with_one_flush():
+    async def scenario():
+        room = make_room()
+        st, viewer, p1 = connect(room)
+        await asyncio.sleep(0)
+        metrics.reset()
+        results = await asyncio.gather(
+            room.submit(room.join_unseated, 42, "Watcher"),
+            room.submit(room.sit, 42, 1),  # seat 1 is taken
+            room.submit(room.update_max_seats, 6),
+            room.submit(room.sit, 42, 6),
+        )
+        await asyncio.sleep(0)
+        return room, viewer, results
+
+    room, viewer, results = asyncio.run(scenario())
+    assert results == [{"id": 42, "name": "Watcher"}, (False, "seat_occupied"), (True, None), (True, None)]
+    assert viewer.view["seats"][5]["occupant"]["id"] == 42 and len(viewer.sent) == 2
+    assert metrics.counter("broadcast.flushed") == 1
+    summaries = metrics.snapshot()["summaries"]
+    assert summaries["room.batch_size"]["max"] == 4 and summaries["room.queue_ms"]["count"] == 4
+
+
+def test_a_failing_command_fails_only_its_own_caller():
+    async def scenario():
+        room = make_room()
+        bad = room.submit(room.step)  # no game yet
+        good = room.submit(room.join_unseated, 42, "Watcher")
+        return await asyncio.gather(bad, good, return_exceptions=True)
+
+    bad, good = asyncio.run(scenario())
+    assert isinstance(bad, AttributeError) and good == {"id": 42, "name": "Watcher"}
+
+
+def test_storyteller_frames_overtake_a_spectator_fan_out(monkeypatch):
+    monkeypatch.setattr(botc.rooms, "QUANTUM", 2)
+    log = []
+
+    class Recording(FakeSocket):
+        def __init__(self, name):
+            super().__init__()
+            self.name = name
+
+        def send(self, obj):
+            super().send(obj)
+            log.append(self.name)
+
+        def send_raw(self, data):
+            super().send_raw(data)
+            log.append(self.name)
+
+    async def scenario():
+        room = make_room()
+        room.storytellerSocket = Recording("st")
+        room.player_sockets[1].add(Recording("p1"))
+        viewers = [Recording("viewer") for _ in range(12)]
+        room.room_viewers.update(viewers)
+        room.flush()
+        assert log[:2] == ["st", "p1"] and log.count("viewer") == 2  # one round: 16 / 8 / 2 frames
+        room.send_to_storyteller({"type": "event", "event": "prompt"})
+        assert log[4:] == ["st", "viewer", "viewer"]  # sent straight away, ahead of the backlog
+        while room._outbox[botc.rooms.BULK]:
+            await asyncio.sleep(0)
+        return viewers
+
+    viewers = asyncio.run(scenario())
+    assert all(v.version for v in viewers) and log.count("viewer") == 12
+
+
+def test_lagging_loop_holds_back_viewer_and_public_player_states_but_not_the_storyteller():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        gate = throttle._throttles[loop] = throttle.Throttle(loop, probe=60, levels=((0.0, 0.05, 0.05),))
+        gate.level = 1
+        room = make_room()
+        st, viewer, p1 = connect(room)
+        await asyncio.sleep(0)
+        room.join_unseated(50, "A")
+        await asyncio.sleep(0)
+        counts = [len(s.sent) for s in (st, viewer, p1)]
+        room.join_unseated(51, "B")
+        await asyncio.sleep(0)
+        room.join_unseated(52, "C")
+        await asyncio.sleep(0)
+        held = [len(s.sent) for s in (st, viewer, p1)]
+        room.broadcast(1)  # private to p1: not held
+        await asyncio.sleep(0)
+        p1_now = len(p1.sent)
+        await asyncio.sleep(0.08)
+        gate.stop()
+        return counts, held, p1_now, viewer, room
+
+    counts, held, p1_now, viewer, room = asyncio.run(scenario())
+    assert counts == [2, 2, 2]
+    assert held == [4, 2, 2]
+    assert p1_now == 3
+    assert len(viewer.sent) == 3  # one state for B and C together, the newest
+    assert viewer.version == room._views[ROOM].version
+    assert [s["name"] for s in viewer.view["spectators"]] == ["A", "B", "C"]
+
+
+def test_a_closed_socket_is_dropped_and_a_failing_send_closes_its_socket():
+    class Closed(FakeSocket):
+        def send_raw(self, data):
+            raise tornado.websocket.WebSocketClosedError()
+
+    class Broken(FakeSocket):
+        closed = None
+
+        def send_raw(self, data):
+            raise RuntimeError("bug")
+
+        def close(self, code=None, reason=None):
+            self.closed = (code, reason)
+
+    room = make_room()
+    closed, broken, fine = Closed(), Broken(), FakeSocket()
+    for s in (closed, broken, fine):
+        room.add_room_viewer(s)
+    room.broadcast(ROOM)
+    assert room.room_viewers == {fine} and len(fine.sent) == 1
+    assert broken.closed == (1011, "send_failed")
+
+
+def test_leaving_or_vacating_after_the_start_keeps_the_games_seat_index():
+    room = make_room()
+    room.start_game()
+    assert room.vacate(3, 3) == (True, None)
+    room.leave(5)
+    game = room.game
+    assert game.player_at(3) is None and game.player_at(5) is None
+    assert [p.id for p in game.neighbours(4)] == [2, 1]
+
+
+def test_the_phase_does_not_step_while_a_night_is_being_resolved():
+    async def scenario():
+        room = make_room()
+        room.start_game()
+        while room.game.phase != Phase.NIGHT:
+            room.step()
+
+        async def wake_list():
+            await room.game.prompt.choose_one(1, [2, 3], "pick")
+
+        room.game.resolve_night = wake_list
+        night = asyncio.ensure_future(room.resolve_night())
+        await asyncio.sleep(0)
+        refused = await asyncio.gather(room.submit(room.step), return_exceptions=True)
+        room.respond(1, 2)
+        await night
+        return room, refused, await room.submit(room.step)
+
+    room, refused, stepped = asyncio.run(scenario())
+    assert isinstance(refused[0], ValueError) and str(refused[0]) == "night_in_progress"
+    assert stepped == ("DAY", 1)
+
+
+def test_a_storytellers_prompts_survive_a_reconnect_within_the_grace_period(monkeypatch):
+    monkeypatch.setattr(botc.rooms, "ORPHAN_GRACE", 0.02)
+
+    async def scenario():
+        room = make_room()
+        asked = room.bus.wait_for(room.bus.new_cid(), timeout=None)
+        room.storyteller_gone()  # a page refresh
+        await asyncio.sleep(0.01)
+        room.storytellerSocket = FakeSocket(STORYTELLER)
+        room.storyteller_back()
+        await asyncio.sleep(0.05)
+        kept = room.bus.pending()
+        room.storytellerSocket = None
+        room.storyteller_gone()  # gone for good
+        await asyncio.sleep(0.05)
+        return kept, room.bus.pending(), asked.done() and asked.exception() is not None
+
+    kept, left, settled = asyncio.run(scenario())
+    assert kept == 1
+    assert left == 0 and settled
@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+import tornado.escape
+import tornado.httpclient
+import tornado.httpserver
+import tornado.testing
+import tornado.websocket
+
+from botc.router import make_router
+from botc.server import start_workers
+from botc.shards import shard_of
+
+
+def test_rooms_sockets_and_lobby_route_to_the_owning_worker():
+    procs, workers = start_workers(2)
+
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_router(workers))
+        server.add_sockets([sock])
+        client = tornado.httpclient.AsyncHTTPClient()
+        base = f"http://127.0.0.1:{port}"
+        try:
+            gids = []
+            for i in range(4):
+                r = await client.fetch(f"{base}/api/rooms", method="POST",
+                                       body=json.dumps({"name": f"r{i}", "creator": {"id": 1, "name": "ST"}}))
+                gids.append(json.loads(r.body)["gid"])
+            details = [json.loads((await client.fetch(f"{base}/api/rooms/{gid}")).body) for gid in gids]
+            joined = await client.fetch(f"{base}/api/rooms/{gids[1]}/join", method="POST",
+                                        body=json.dumps({"id": 7, "name": "Ann"}), raise_error=False)
+            lobby = json.loads((await client.fetch(f"{base}/api/lobby")).body)
+
+            ws = await tornado.websocket.websocket_connect(f"ws://127.0.0.1:{port}/ws/{gids[1]}/room")
+            first = tornado.escape.json_decode(await ws.read_message())
+            ws.close()
+            return gids, details, joined.code, lobby, first
+        finally:
+            server.stop()
+
+    try:
+        gids, details, joined, lobby, first = asyncio.run(scenario())
+    finally:
+        for p in procs:
+            p.terminate()
+            p.join()
+
+    assert {shard_of(gid, 2) for gid in gids} == {0, 1}  # created on both workers in turn
+    assert all(d["ok"] for d in details)  # each found on the worker it was routed to
+    assert sorted(r["info"]["gid"] for r in lobby["lobby"]) == sorted(gids)
+    assert [s["rooms"] for s in lobby["shards"]] == [2, 2]
+    assert first["type"] == "state" and first["view"]["info"]["gid"] == gids[1]
+    assert joined == 200
@@ -0,0 +1,50 @@
+from botc.model import Phase, Team
+from botc.roles.empath import Empath
+from botc.roles.imp import Imp
+from botc.roles.saint import Saint
+from botc.roles.scarlet_woman import ScarletWoman
+from botc.roles.soldier import Soldier
+from botc.rules import Rules, EXECUTION
+
+
+def test_counters_follow_deaths(make_game):
+    g = make_game([Imp, ScarletWoman, Empath, Soldier, Soldier, Soldier], rules=Rules(), phase=Phase.DAY)
+    assert (g.alive_count(Team.GOOD), g.alive_count(Team.EVIL), g.demons_alive()) == (4, 2, 1)
+    g.mark_dead(3, "in test")
+    assert g.alive_count(Team.GOOD) == 3
+    assert g.winner is None
+    assert g.rules.check_end(g) is False
+
+
+def test_demon_death_ends_game_immediately(make_game):
+    g = make_game([Imp, Empath, Soldier, Soldier, Soldier], rules=Rules(), phase=Phase.DAY)
+    g.kill_now(1)
+    assert g.winner == "GOOD"
+    assert g.rules.check_end(g) is True
+
+
+def test_scarlet_woman_promotion_keeps_game_going(make_game):
+    g = make_game([Imp, ScarletWoman, Empath, Soldier, Soldier, Soldier], rules=Rules(), phase=Phase.DAY)
+    g.kill_now(1)
+    assert g.winner is None
+    assert g.demons_alive() == 1
+
+
+def test_evil_parity_on_execution(make_game):
+    g = make_game([Imp, ScarletWoman, Empath, Soldier], rules=Rules(), phase=Phase.DAY)
+    g.execute(3)
+    assert g.winner == "EVIL"
+
+
+def test_saint_execution_decides_on_the_event(make_game):
+    g = make_game([Imp, Saint, Empath, Soldier, Soldier], rules=Rules(), phase=Phase.DAY)
+    g.execute(2)
+    assert g.winner == "EVIL"
+    assert "Evil wins (forced)" in g.log
+
+
+def test_conditions_plug_into_trigger_table(make_game):
+    g = make_game([Imp, Empath, Soldier, Soldier, Soldier], rules=Rules(), phase=Phase.DAY)
+    g.rules.on(EXECUTION, lambda game, ctx: ("GOOD", "Good wins (custom)") if ctx["pid"] == 4 else None)
+    g.execute(4)
+    assert g.winner == "GOOD"
@@ -0,0 +1,28 @@
+from botc.simulate import play_game, simulate, summarize
+
+
+def test_same_seed_replays_same_game():
+    a = play_game(7, seed=42)
+    b = play_game(7, seed=42)
+    assert a == b
+    assert len(a.roles) == 7
+    assert "Imp" in a.roles
+
+
+def test_games_finish_with_a_winner():
+    records = [play_game(n, seed=s) for n in (5, 10, 15) for s in range(20)]
+    assert all(r.winner in ("GOOD", "EVIL") for r in records)
+
+
+def test_pool_and_inline_agree():
+    inline = sorted(simulate(5, [5, 8], seed=3, workers=1), key=lambda r: (r.players, r.seed))
+    pooled = sorted(simulate(5, [5, 8], seed=3, workers=2), key=lambda r: (r.players, r.seed))
+    assert inline == pooled
+
+
+def test_summarize_rates():
+    stats = summarize(simulate(10, [6], seed=0, workers=1))
+    six = stats["players"][6]
+    assert six["games"] == 10
+    assert abs(six["good"] + six["evil"] + six["unfinished"] - 1.0) < 1e-9
+    assert stats["roles"]["Imp"]["games"] == 10
@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+import time
+
+from botc import metrics, store
+from botc.rooms import RoomTable
+from tests.test_rooms import FakeSocket, make_room
+
+
+def open_store(path, monkeypatch, **kwargs):
+    table = RoomTable()
+    monkeypatch.setattr(store, "_store", None)
+    return table, store.open_store(str(path), table, **kwargs)
+
+
+def test_rooms_hydrate_on_first_lookup_and_the_lobby_loads_no_games(tmp_path, monkeypatch):
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+
+    async def scenario():
+        room = make_room()
+        table["g1"] = room
+        room.start_game()
+        s.tick()
+        return [(p.id, p.role.id) for p in room.game.players]
+
+    roles = asyncio.run(scenario())
+    s.close()
+
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+    hydrated = metrics.snapshot()["counters"].get("store.hydrated", 0)
+    lobby = s.lobby()
+    assert [e["info"]["gid"] for e in lobby] == ["g1"] and lobby[0]["players"] == 5
+    assert not table and metrics.snapshot()["counters"].get("store.hydrated", 0) == hydrated
+
+    assert "g1" in table and "nope" not in table and table.get("nope") is None
+    room = table.get("g1")
+    assert table["g1"] is room and list(table) == ["g1"]
+    assert [(p.id, p.role.id) for p in room.game.players] == roles
+    s.close()
+
+
+def test_idle_rooms_are_evicted_and_come_back_as_they_were(tmp_path, monkeypatch):
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch, idle=0)
+
+    async def scenario():
+        busy, idle = make_room(), make_room()
+        busy.info.gid = "busy"
+        table["busy"], table["g1"] = busy, idle
+        busy.add_room_viewer(FakeSocket())
+        s.tick()  # saved, not yet evicted
+        resident = sorted(table)
+        await idle.submit(idle.join_unseated, 42, "Watcher")
+        s.tick()  # changed: saved again
+        s.tick()
+        return resident, sorted(table)
+
+    before, after = asyncio.run(scenario())
+    assert before == ["busy", "g1"] and after == ["busy"]
+    assert 42 in {sp.id for sp in table["g1"].spectators}
+    s.close()
+
+
+def test_deleted_rooms_leave_the_store(tmp_path, monkeypatch):
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+    table["g1"] = make_room()
+    s.save(table["g1"])
+    del table["g1"]
+    assert "g1" not in table and s.lobby() == []
+    s.close()
+
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+    assert table.get("g1") is None
+    s.close()
+
+
+def test_count_covers_stored_pending_and_unsaved_resident_rooms(tmp_path, monkeypatch):
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+    for gid in ("a", "b"):
+        room = make_room()
+        room.info.gid = gid
+        table[gid] = room
+        s.save(room)
+    s.close()
+
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+    fresh = make_room()
+    table["g1"] = fresh  # not saved yet
+    assert s.count() == 3
+    s.save(fresh)
+    s.forget("a")  # deleted while not resident: a pending delete
+    assert s.count() == 2
+    s.close()
+
+
+def test_a_failed_write_is_retried_without_another_save(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "RETRY", 0.01)
+    failures = []
+    write_batch = store.RoomStore._write_batch
+
+    def flaky(db, batch):
+        if not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        write_batch(db, batch)
+
+    monkeypatch.setattr(store.RoomStore, "_write_batch", staticmethod(flaky))
+    table, s = open_store(tmp_path / "rooms.db", monkeypatch)
+    s.save(make_room())
+    for _ in range(100):
+        if not s._pending:
+            break
+        time.sleep(0.01)
+    assert failures and not s._pending
+    assert [e["info"]["gid"] for e in s.lobby()] == ["g1"]
+    s.close()
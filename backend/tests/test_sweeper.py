@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import tornado.httpclient
+import tornado.httpserver
+import tornado.testing
+
+from botc import metrics, store, sweeper
+from botc.rooms import RoomTable, ROOM
+from botc.server import make_app
+from tests.test_rooms import FakeSocket, make_room
+
+
+class ClosableSocket(FakeSocket):
+    closed = None
+
+    def close(self, code=None, reason=None):
+        self.closed = (code, reason)
+
+
+def test_expired_rooms_are_closed_and_dropped_by_status(monkeypatch):
+    monkeypatch.setitem(sweeper.TTL, "open", 0.0)
+    monkeypatch.setitem(sweeper.TTL, "In-play", 0.0)
+    monkeypatch.setitem(sweeper.TTL, "finished", 0.0)
+    table = RoomTable()
+    before = metrics.snapshot()["counters"]
+
+    async def scenario():
+        abandoned, playing, finished = make_room(), make_room(), make_room()
+        table["abandoned"], table["playing"], table["finished"] = abandoned, playing, finished
+        playing.info.status = "In-play"
+        finished.info.status = "finished"
+        watching, lingering = ClosableSocket(), ClosableSocket()
+        playing.add_room_viewer(watching)
+        finished.add_room_viewer(lingering)
+        waiter = abandoned.bus.wait_for(abandoned.bus.new_cid(), timeout=None)
+
+        expired = sweeper.Sweeper(asyncio.get_running_loop(), table).sweep()
+        await asyncio.sleep(0)
+        return expired, waiter, watching, lingering
+
+    expired, waiter, watching, lingering = asyncio.run(scenario())
+    after = metrics.snapshot()
+    assert expired == 2 and list(table) == ["playing"]  # a connected socket keeps a game alive
+    assert waiter.cancelled()
+    assert lingering.closed == (1001, "room_expired") and watching.closed is None
+    for status in ("open", "finished"):
+        assert after["counters"][f"sweeper.expired.{status}"] - before.get(f"sweeper.expired.{status}", 0) == 1
+    assert after["gauges"]["rooms.In-play"] == 1 and after["gauges"]["rooms.open"] == 0
+
+
+def test_rooms_are_kept_while_they_change(monkeypatch):
+    monkeypatch.setitem(sweeper.TTL, "open", 0.05)
+    table = RoomTable()
+
+    async def scenario():
+        room = table["g1"] = make_room()
+        s = sweeper.Sweeper(asyncio.get_running_loop(), table)
+        s.sweep()
+        await asyncio.sleep(0.06)
+        room.broadcast(ROOM)
+        kept = s.sweep()
+        await asyncio.sleep(0.06)
+        return kept, s.sweep()
+
+    assert asyncio.run(scenario()) == (0, 1) and not table
+
+
+def test_stored_rooms_expire_without_being_hydrated(tmp_path, monkeypatch):
+    monkeypatch.setitem(sweeper.TTL, "open", 0.0)
+    monkeypatch.setattr(store, "_store", None)
+    table = RoomTable()
+    s = store.open_store(str(tmp_path / "rooms.db"), table)
+    s.save(make_room())
+    hydrated = metrics.snapshot()["counters"].get("store.hydrated", 0)
+
+    async def scenario():
+        counted = sweeper.room_count(table)
+        return counted, sweeper.Sweeper(asyncio.get_running_loop(), table).sweep()
+
+    assert asyncio.run(scenario()) == (1, 1)
+    assert s.lobby() == [] and sweeper.room_count(table) == 0
+    assert metrics.snapshot()["counters"].get("store.hydrated", 0) == hydrated
+    s.close()
+
+
+def test_room_creation_is_refused_at_capacity(monkeypatch):
+    monkeypatch.setattr(sweeper, "MAX_ROOMS", 0)
+
+    async def scenario():
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(make_app(debug=False))
+        server.add_sockets([sock])
+        try:
+            return await tornado.httpclient.AsyncHTTPClient().fetch(
+                f"http://127.0.0.1:{port}/api/rooms", method="POST", raise_error=False,
+                body=json.dumps({"name": "r", "creator": {"id": 1, "name": "ST"}}))
+        finally:
+            server.stop()
+
+    r = asyncio.run(scenario())
+    assert r.code == 503 and r.headers["Retry-After"] == "60"
+    assert json.loads(r.body) == {"error": "at_capacity"}
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from botc import metrics
+from botc.ws.throttle import Throttle
+
+LEVELS = ((20.0, 0.5, 0.0), (60.0, 1.0, 0.5))
+
+
+def test_level_follows_loop_lag_up_and_back_down():
+    async def scenario():
+        gate = Throttle(asyncio.get_running_loop(), probe=0.01, levels=LEVELS)
+        seen = []
+        for _ in range(6):
+            time.sleep(0.1)  # a blocked loop: the probe fires ~100ms late
+            await asyncio.sleep(0.002)
+            seen.append(gate.level)
+        peak = gate.status()
+        await asyncio.sleep(0.3)
+        gate.stop()
+        return seen, peak, gate.level
+
+    metrics.reset()
+    seen, peak, settled = asyncio.run(scenario())
+    assert seen == sorted(seen) and seen[-1] == 2
+    assert peak["viewer_interval"] == 1.0 and peak["player_interval"] == 0.5
+    assert settled == 0
+    assert metrics.snapshot()["gauges"]["throttle.level"] == 0
+    assert metrics.counter("throttle.raised") >= 1 and metrics.counter("throttle.lowered") >= 1
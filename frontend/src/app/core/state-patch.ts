@@ -0,0 +1,74 @@
+// Applies the server's StateDiff patches (RFC 6902 add/remove/replace) to the last state.
+// Copies only along the patched paths, so unchanged parts of the view keep their identity.
+
+export interface PatchOp {
+  op: 'add' | 'remove' | 'replace';
+  path: string;
+  value?: unknown;
+}
+
+function tokens(path: string): string[] {
+  return path.split('/').slice(1).map(t => t.replace(/~1/g, '/').replace(/~0/g, '~'));
+}
+
+function applyOp(node: any, keys: string[], op: PatchOp): any {
+  if (keys.length === 0) {
+    return op.value;
+  }
+  const [key, ...rest] = keys;
+  if (Array.isArray(node)) {
+    const copy = node.slice();
+    const idx = key === '-' ? copy.length : Number(key);
+    if (rest.length) {
+      copy[idx] = applyOp(copy[idx], rest, op);
+    } else if (op.op === 'add') {
+      copy.splice(idx, 0, op.value);
+    } else if (op.op === 'remove') {
+      copy.splice(idx, 1);
+    } else {
+      copy[idx] = op.value;
+    }
+    return copy;
+  }
+  const copy: any = { ...node };
+  if (rest.length) {
+    copy[key] = applyOp(copy[key], rest, op);
+  } else if (op.op === 'remove') {
+    delete copy[key];
+  } else {
+    copy[key] = op.value;
+  }
+  return copy;
+}
+
+export function applyPatch<T>(doc: T, ops: PatchOp[]): T {
+  return ops.reduce((acc: any, op) => applyOp(acc, tokens(op.path), op), doc);
+}
+
+export function isStateDiff(msg: any): boolean {
+  return msg?.type === 'patch' && msg?.kind === 'StateDiff';
+}
+
+// The next state message, or null when the diff doesn't start from the state we hold
+// (the caller should then send {type: 'resync'} and wait for a full state).
+export function applyStateDiff(latest: any, msg: any): any | null {
+  const data = msg.data;
+  if (!latest || latest.version !== data.from) {
+    return null;
+  }
+  try {
+    return { type: 'state', version: data.version, view: applyPatch(latest.view, data.ops) };
+  } catch (err) {
+    console.error('Failed to apply state diff', err);
+    return null;
+  }
+}
+
+// Highest room version a message carries: a state's version, a diff's target, or an event's seq.
+// Sockets reconnect with ?since=<highest seen> and the server sends only what they missed.
+export function versionOf(msg: any): number {
+  return Math.max(msg?.version ?? 0, msg?.data?.version ?? 0, msg?.seq ?? 0);
+}
+
+// Close code for a room moved to another server process: reconnect at once and resume.
+export const ROOM_MOVED = 4002;
@@ -3,6 +3,7 @@ import { DestroyRef, Injectable, NgZone, Signal, signal, WritableSignal } from '
 import { webSocket, WebSocketSubject } from 'rxjs/webSocket';
 import { Subscription } from 'rxjs';
 import { environment } from '../../environments/environment';
+import { applyStateDiff, isStateDiff, ROOM_MOVED, versionOf } from '../../core/state-patch';
 
 @Injectable({ providedIn: 'root' })
 export class PlayerSocketService {
@@ -14,6 +15,8 @@ export class PlayerSocketService {
   private socket?: WebSocketSubject<any>;
   private sub?: Subscription;
   private current?: { gid: string; pid: number };
+  private seen = 0;  // highest room version received, sent back as ?since= on reconnect
+  private retry?: ReturnType<typeof setTimeout>;
 
   constructor(
     private readonly destroyRef: DestroyRef,
@@ -29,8 +32,12 @@ export class PlayerSocketService {
 
     this.teardown();
     this.current = { gid, pid };
+    await this.open(gid, pid);
+  }
 
-    const url = `${environment.botc_service_ws}/${gid}/player/${pid}`;
+  private async open(gid: string, pid: number): Promise<void> {
+    const since = this.seen ? `?since=${this.seen}` : '';
+    const url = `${environment.botc_service_ws}/${gid}/player/${pid}${since}`;
     let opened!: () => void;
     const openedPromise = new Promise<void>(res => (opened = res));
 
@@ -43,6 +50,9 @@ export class PlayerSocketService {
         next: ev => { 
           console.log('WS closed (player)', gid, pid, ev) 
           console.log("Do something here.  The player needs vacating from the seat/room/world")
+          // dropped rather than closed by us: come back and resume from what we hold
+          if (ev.code === ROOM_MOVED && this.current?.gid === gid && this.current?.pid === pid) this.reconnect(gid, pid, 50, 250);
+          else if (!ev.wasClean && this.current?.gid === gid && this.current?.pid === pid) this.reconnect(gid, pid);
         }
       }
     });
@@ -50,7 +60,11 @@ export class PlayerSocketService {
     this.sub = this.socket.subscribe({
       next: msg => this.zone.run(() => {
         console.log(msg);
-        if (msg.type === "state") {
+        this.seen = Math.max(this.seen, versionOf(msg));
+        if (isStateDiff(msg)) {
+          const next = applyStateDiff(this._latest(), msg);
+          if (next) this._latest.set(next); else this.send({ type: "resync" });
+        } else if (msg.type === "state") {
           this._latest.set(msg)
         } else {
           this._imperative.set(msg)
@@ -67,12 +81,23 @@ export class PlayerSocketService {
 
   close(): void { this.teardown(); }
 
+  private reconnect(gid: string, pid: number, base = 1000, spread = 2000): void {
+    clearTimeout(this.retry);
+    // jittered so a room's worth of clients dropped by the same blip don't all return at once
+    this.retry = setTimeout(() => {
+      this.sub?.unsubscribe();
+      this.open(gid, pid).catch(err => console.error('WS reconnect failed (player)', err));
+    }, base + Math.random() * spread);
+  }
+
   private teardown(): void {
+    clearTimeout(this.retry);
     try { this.sub?.unsubscribe(); } catch {}
     try { this.socket?.complete(); } catch {}
     this.sub = undefined;
     this.socket = undefined;
     this.current = undefined;
+    this.seen = 0;
     (this.latest as any).set?.(null);
   }
 }
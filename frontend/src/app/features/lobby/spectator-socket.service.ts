@@ -2,6 +2,7 @@ import { DestroyRef, Injectable, NgZone, Signal, signal } from '@angular/core';
 import { webSocket, WebSocketSubject } from 'rxjs/webSocket';
 import { Subscription } from 'rxjs';
 import { environment } from '../../environments/environment';
+import { applyStateDiff, isStateDiff } from '../../core/state-patch';
 
 @Injectable() 
 export class SpectatorSocketService {
@@ -42,7 +43,14 @@ export class SpectatorSocketService {
 
     // Service owns the subscription, not the component
     this.sub = this.socket.subscribe({
-      next: msg => this.zone.run(() => (this.latest as any).set?.(msg)),
+      next: msg => this.zone.run(() => {
+        if (isStateDiff(msg)) {
+          const next = applyStateDiff(this.latest(), msg);
+          if (next) (this.latest as any).set?.(next); else this.send({ type: "resync" });
+        } else {
+          (this.latest as any).set?.(msg);
+        }
+      }),
       error: err => console.error('WS error', err),
       complete: () => console.log('WS complete')
     });
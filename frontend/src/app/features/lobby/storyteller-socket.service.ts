@@ -2,6 +2,7 @@ import { DestroyRef, Injectable, NgZone, Signal, signal, WritableSignal } from '
 import { webSocket, WebSocketSubject } from 'rxjs/webSocket';
 import { Subscription } from 'rxjs';
 import { environment } from '../../environments/environment';
+import { applyStateDiff, isStateDiff, ROOM_MOVED, versionOf } from '../../core/state-patch';
 
 @Injectable({ providedIn: 'root' })
 export class StoryTellerSocketService {
@@ -15,6 +16,11 @@ export class StoryTellerSocketService {
   private socket?: WebSocketSubject<any>;
   private sub?: Subscription;
   private currentGid?: string;
+  private seen = 0;  // highest room version received, sent back as ?since= on reconnect
+  private retry?: ReturnType<typeof setTimeout>;
+  // received but not yet handled, in arrival order; see enqueue()
+  private pending: any[] = [];
+  private nextTask?: ReturnType<typeof setTimeout>;
 
   constructor(
     private readonly destroyRef: DestroyRef,
@@ -29,8 +35,13 @@ export class StoryTellerSocketService {
 
     this.teardown();
     this.currentGid = gid;
+    await this.open(gid);
+  }
 
-    const url = `${environment.botc_service_ws}/${gid}/st`;
+  private async open(gid: string): Promise<void> {
+    // batch=1: everything the server queues for us in one loop tick arrives as one array frame
+    const since = this.seen ? `&since=${this.seen}` : '';
+    const url = `${environment.botc_service_ws}/${gid}/st?batch=1${since}`;
     let opened!: () => void;
     const openedPromise = new Promise<void>(res => (opened = res));
 
@@ -43,21 +54,15 @@ export class StoryTellerSocketService {
         next: ev => { 
           console.log('WS closed (st)', gid, ev)
           console.log("Do something here.  If the storyteller goes then we are probably fucked!");
+          // dropped rather than closed by us: come back and resume from what we hold
+          if (ev.code === ROOM_MOVED && this.currentGid === gid) this.reconnect(gid, 50, 250);
+          else if (!ev.wasClean && this.currentGid === gid) this.reconnect(gid);
         }
       }
     });
 
     this.sub = this.socket.subscribe({
-      next: msg => this.zone.run(() => {
-        if (msg.type === "state") {
-          this._latest.set(msg);
-        } else if (msg.type === "event" || msg.type === "patch") {
-          this._imperative.set(msg);
-        } else {
-          console.log("What type have i just received " + msg.type);
-          console.log("Note to self.  When I receive a message I need to work out if I am updating the latest or the imperative"); 
-        }
-      }),
+      next: frame => this.enqueue(Array.isArray(frame) ? frame : [frame]),
       error: err => console.error('WS error (st)', err),
       complete: () => console.log('WS complete (st)')
     });
@@ -67,6 +72,39 @@ export class StoryTellerSocketService {
 
   
 
+  // One message per task, so effects watching the imperative signal see every event, not
+  // just the last one in a batch; a frame arriving while a batch is still being handled
+  // waits its turn, so versioned diffs are always applied in order.
+  private enqueue(msgs: any[]): void {
+    const idle = this.pending.length === 0;
+    this.pending.push(...msgs);
+    if (idle) this.handleNext();
+  }
+
+  private handleNext(): void {
+    try {
+      this.zone.run(() => this.handle(this.pending[0]));
+    } finally {
+      this.pending.shift();
+      if (this.pending.length) this.nextTask = setTimeout(() => this.handleNext());
+    }
+  }
+
+  private handle(msg: any): void {
+    this.seen = Math.max(this.seen, versionOf(msg));
+    if (isStateDiff(msg)) {
+      const next = applyStateDiff(this._latest(), msg);
+      if (next) this._latest.set(next); else this.send({ type: "resync" });
+    } else if (msg.type === "state") {
+      this._latest.set(msg);
+    } else if (msg.type === "event" || msg.type === "patch") {
+      this._imperative.set(msg);
+    } else {
+      console.log("What type have i just received " + msg.type);
+      console.log("Note to self.  When I receive a message I need to work out if I am updating the latest or the imperative"); 
+    }
+  }
+
   send(msg: unknown): void {
     this.socket?.next(msg);
   }
@@ -75,12 +113,25 @@ export class StoryTellerSocketService {
     this.teardown();
   }
 
+  private reconnect(gid: string, base = 1000, spread = 2000): void {
+    clearTimeout(this.retry);
+    // jittered so a room's worth of clients dropped by the same blip don't all return at once
+    this.retry = setTimeout(() => {
+      this.sub?.unsubscribe();
+      this.open(gid).catch(err => console.error('WS reconnect failed (st)', err));
+    }, base + Math.random() * spread);
+  }
+
   private teardown(): void {
+    clearTimeout(this.retry);
     try { this.sub?.unsubscribe(); } catch {}
     try { this.socket?.complete(); } catch {}
     this.sub = undefined;
     this.socket = undefined;
     this.currentGid = undefined;
+    this.seen = 0;
+    clearTimeout(this.nextTask);
+    this.pending = [];
     
     this._latest.set(null)
     this._imperative.set(null)
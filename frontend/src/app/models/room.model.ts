@@ -27,6 +27,7 @@ export interface LobbyResponse {
 
 export interface RoomStateResponse {
   type: 'state';
+  version: number;
   view: RoomView;
 }
 